@@ -0,0 +1,201 @@
+"""
+Content-addressed cache of transcript analyses.
+
+An analysis is keyed by a hash of the normalized transcript text, the
+prompt template version, the model name and the analysis mode, so the
+same transcript is never sent to the model twice, whichever video, CLI run
+or HTTP request it arrives through. Results live in SQLite (shared between
+processes, LRU-evicted past max_bytes). Identical requests that arrive
+while the first is still being analyzed wait for it instead of making
+their own model call: threads in one process share a future, and other
+processes see a short-lived lease row and poll for the result.
+
+Set ANALYSIS_CACHE_PATH to move the database, or ANALYSIS_CACHE_DISABLE=1
+to turn caching off.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import unicodedata
+import uuid
+import zlib
+from concurrent.futures import Future
+
+from sqlite_store import SQLiteStore
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'analyses.sqlite3')
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+LEASE_SECONDS = 300  # how long another process may wait on an in-flight analysis
+POLL_INTERVAL = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    key TEXT PRIMARY KEY,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS analyses_accessed ON analyses (accessed);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+
+
+def normalize_transcript(text):
+    """NFC-normalize and collapse whitespace per line, dropping empty lines."""
+    lines = (' '.join(line.split()) for line in unicodedata.normalize('NFC', text).splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def analysis_key(text, prompt_version, model, variant=''):
+    """Content address of an analysis request."""
+    digest = hashlib.sha256()
+    for part in (prompt_version, model, variant, normalize_transcript(text)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class AnalysisCache(SQLiteStore):
+    """SQLite-backed analysis cache with request coalescing."""
+
+    SCHEMA = SCHEMA
+    TABLE = 'analyses'
+    SIZED = True
+    COUNTERS = ('hits', 'misses', 'computed', 'coalesced', 'stores', 'evictions')
+    ENV_PREFIX = 'ANALYSIS_CACHE'
+    DEFAULT_PATH = DEFAULT_PATH
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=DEFAULT_MAX_BYTES, lease_seconds=LEASE_SECONDS):
+        self.max_bytes = max_bytes
+        self.lease_seconds = lease_seconds
+        self.owner = uuid.uuid4().hex
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        super().__init__(path)
+
+    def get(self, key, count=True):
+        """Return the cached analysis for key, or None."""
+        conn = self._connect()
+        row = conn.execute("SELECT payload FROM analyses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            if count:
+                self._count(conn, 'misses')
+            return None
+        conn.execute("UPDATE analyses SET accessed = ? WHERE key = ?", (time.time(), key))
+        if count:
+            self._count(conn, 'hits')
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key, analysis, model='', prompt_version=''):
+        conn = self._connect()
+        now = time.time()
+        payload = zlib.compress(json.dumps(analysis, ensure_ascii=False).encode('utf-8'), 6)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (key, payload, len(payload), model, prompt_version, now, now))
+            self._count(conn, 'stores')
+            self._evict(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM analyses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size FROM analyses ORDER BY accessed").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM analyses WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        self._count(conn, 'evictions', evicted)
+
+    def _acquire_lease(self, conn, key):
+        """Take the cross-process lease for key; False if another live process holds it."""
+        now = time.time()
+        conn.execute("DELETE FROM leases WHERE key = ? AND expires < ?", (key, now))
+        return conn.execute("INSERT OR IGNORE INTO leases VALUES (?, ?, ?)",
+                            (key, self.owner, now + self.lease_seconds)).rowcount == 1
+
+    def _release_lease(self, conn, key):
+        conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, self.owner))
+
+    def _wait_for_other_process(self, conn, key):
+        """Poll until the leaseholder stores a result or its lease lapses."""
+        while True:
+            time.sleep(POLL_INTERVAL)
+            result = self.get(key, count=False)
+            if result is not None:
+                return result
+            row = conn.execute("SELECT expires FROM leases WHERE key = ?", (key,)).fetchone()
+            if row is None or row[0] < time.time():
+                return None
+
+    def get_or_compute(self, key, compute, model='', prompt_version=''):
+        """
+        Return the cached analysis for key, or compute() it exactly once.
+
+        Concurrent callers with the same key in this process share one
+        compute(); callers in other processes wait on its lease. The result
+        is returned with 'cached' set to whether compute() was skipped.
+        """
+        result = self.get(key)
+        if result is not None:
+            return {**result, 'cached': True}
+
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            conn = self._connect()
+            self._count(conn, 'coalesced')
+            return {**future.result(), 'cached': True}
+
+        conn = self._connect()
+        try:
+            result = None
+            while result is None:
+                if self._acquire_lease(conn, key):
+                    try:
+                        # Another process may have finished between our miss and the lease
+                        result = self.get(key, count=False)
+                        if result is None:
+                            self._count(conn, 'computed')
+                            result = compute()
+                            self.put(key, result, model, prompt_version)
+                            future.set_result(result)
+                            return {**result, 'cached': False}
+                    finally:
+                        self._release_lease(conn, key)
+                else:
+                    self._count(conn, 'coalesced')
+                    result = self._wait_for_other_process(conn, key)
+            future.set_result(result)
+            return {**result, 'cached': True}
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+
+def default_cache():
+    """Return the process-wide cache, or None if ANALYSIS_CACHE_DISABLE is set."""
+    return AnalysisCache.default()
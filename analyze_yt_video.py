@@ -1,22 +1,74 @@
 import os
 import json
 import re
-from typing import Dict, Any, Optional
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api.formatters import WebVTTFormatter
-import google.generativeai as genai
-from dotenv import load_dotenv
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Union
+from caption_dedupe import CollapseStats, collapse_transcript_entries
+from transcript_export import export_transcript
+from analysis_cache import analysis_key, default_cache
+from transcript_compaction import DEFAULT_STEPS, CompactionStats, compact_transcript
+from transcript_languages import fetch_preferred_transcript
 
-# Load environment variables
-load_dotenv()
+MODEL_NAME = 'gemini-pro'
+# Bump whenever a prompt template changes, so cached analyses are not reused
+PROMPT_VERSION = '2'
 
-# Configure Gemini API
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY not found in environment variables")
+# The Gemini client is created on first use (see get_model), so importing this
+# module stays cheap for pool workers, tests and serverless handlers
+_model = None
+_model_lock = threading.Lock()
 
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-pro')
+def get_model():
+    """Return the shared Gemini model, configuring the client on first call."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                import google.generativeai as genai
+                from dotenv import load_dotenv
+                
+                # Load environment variables
+                load_dotenv()
+                
+                # Configure Gemini API
+                api_key = os.getenv('GEMINI_API_KEY')
+                if not api_key:
+                    raise ValueError("GEMINI_API_KEY not found in environment variables")
+                
+                genai.configure(api_key=api_key)
+                _model = genai.GenerativeModel(MODEL_NAME)
+    return _model
+
+# Transcripts longer than this are analyzed in chunks (map-reduce)
+CHUNK_THRESHOLD = 24000  # characters
+CHUNK_CHARS = 12000
+CHUNK_WORKERS = 4
+CHUNK_RETRIES = 2
+
+RATING_KEYS = ('clarityOfContent', 'emotionalImpact', 'videoStructure', 'retentionPower', 'commercialBalance')
+SUMMARY_LIMITS = {'positivePoints': 3, 'negativePoints': 2, 'suggestions': 5}
+
+RESPONSE_FORMAT = """
+Respond in valid JSON with this structure:
+{
+  "finalVerdict": {
+    "clarityOfContent": number,
+    "emotionalImpact": number,
+    "videoStructure": number,
+    "retentionPower": number,
+    "commercialBalance": number
+  },
+  "videoSummary": {
+    "overview": string,
+    "positivePoints": string[],
+    "negativePoints": string[],
+    "suggestions": string[]
+  }
+}
+"""
 
 def extract_video_id(url: str) -> Optional[str]:
     """Extract video ID from YouTube URL."""
@@ -31,42 +83,39 @@ def extract_video_id(url: str) -> Optional[str]:
             return match.group(1)
     return None
 
-def get_transcript(video_id: str, language: str = 'hi') -> str:
-    """Fetch transcript for a YouTube video."""
+def get_transcript_entries(video_id: str, language: str = 'hi') -> List[Dict[str, Any]]:
+    """Fetch transcript entries ({'text', 'start', 'duration'}) for a YouTube video."""
     try:
-        # Get available transcripts
-        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-        
-        # Try to get the specified language, fall back to any available
-        try:
-            transcript = transcript_list.find_transcript([language])
-        except:
-            transcript = next(iter(transcript_list))
-        
-        # Get the transcript data
-        transcript_data = transcript.fetch()
-        
-        # Format as plain text
-        text_formatted = "\n".join([entry['text'] for entry in transcript_data])
+        # Get the specified language, falling back to any available track;
+        # served from the shared transcript cache when possible
+        transcript = fetch_preferred_transcript(video_id, [language])
+        if transcript is None:
+            raise ValueError(f"No transcripts available for video {video_id}")
+        if transcript.get('cached'):
+            print("Transcript loaded from cache")
         
-        # Save VTT version
-        formatter = WebVTTFormatter()
-        vtt_formatted = formatter.format_transcript(transcript_data)
+        # Get the transcript data, collapsing rolling auto-caption repeats
+        stats = CollapseStats()
+        transcript_data = collapse_transcript_entries(transcript['entries'], stats)
+        print(f"Rolling captions collapsed: {stats}")
         
         # Save VTT file
-        vtt_filename = f"transcript_{video_id}.{transcript.language_code}.vtt"
-        with open(vtt_filename, 'w', encoding='utf-8') as f:
-            f.write("WEBVTT\n\n" + vtt_formatted)
+        vtt_filename = f"transcript_{video_id}.{transcript['language']}.vtt"
+        export_transcript(transcript_data, {'vtt': vtt_filename})
         print(f"Transcript saved as {vtt_filename}")
         
-        return text_formatted
+        return transcript_data
         
     except Exception as e:
         print(f"Error fetching transcript: {str(e)}")
         raise
 
-def analyze_transcript(transcript: str, video_id: str) -> Dict[str, Any]:
-    """Analyze transcript using Gemini API."""
+def get_transcript(video_id: str, language: str = 'hi') -> str:
+    """Fetch transcript for a YouTube video as plain text, one segment per line."""
+    return "\n".join(entry['text'] for entry in get_transcript_entries(video_id, language))
+
+def build_prompt(transcript: str) -> str:
+    """Build the full-transcript analysis prompt."""
     prompt = f"""You are an expert educational video analyst. Analyze the following YouTube video transcript and provide:
 1. Ratings (1-5) for: Clarity of Content, Emotional Impact, Video Structure, Retention Power, Commercial Balance.
 2. A summary overview of the video (2-3 sentences).
@@ -78,44 +127,224 @@ Transcript:
 """
     
     prompt += f'"""{transcript}"""'
+    prompt += "\n" + RESPONSE_FORMAT
+    return prompt
+
+def generate_json(prompt: str) -> Dict[str, Any]:
+    """Call the model and parse the JSON object in its reply."""
+    response = get_model().generate_content(prompt)
+    # Extract JSON from response
+    response_text = response.text.strip()
+    
+    # Clean the response to ensure it's valid JSON
+    json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+    if not json_match:
+        raise ValueError("Could not find JSON in response")
+    return json.loads(json_match.group(0))
+
+def save_analysis(analysis: Dict[str, Any], video_id: str) -> None:
+    analysis_filename = f"analysis_{video_id}.json"
+    with open(analysis_filename, 'w', encoding='utf-8') as f:
+        json.dump(analysis, f, indent=2, ensure_ascii=False)
+    print(f"Analysis saved as {analysis_filename}")
+
+def _format_time(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes // 60}:{minutes % 60:02d}:{seconds:02d}" if minutes >= 60 else f"{minutes}:{seconds:02d}"
+
+def chunk_transcript(entries: List[Union[str, Dict[str, Any]]], max_chars: int = CHUNK_CHARS) -> List[Dict[str, Any]]:
+    """
+    Split a transcript into chunks of at most max_chars, only at segment boundaries.
+
+    entries are transcript entries ({'text', 'start', 'duration'}) or plain
+    lines. Each chunk is {'index', 'text', 'start', 'end'} (times in
+    seconds, None for plain lines).
+    """
+    chunks = []
+    lines, size, start, end = [], 0, None, None
+    
+    def flush():
+        if lines:
+            chunks.append({'index': len(chunks), 'text': "\n".join(lines), 'start': start, 'end': end})
     
-    prompt += """
+    for entry in entries:
+        if isinstance(entry, str):
+            text, entry_start, entry_end = entry, None, None
+        else:
+            text = entry['text']
+            entry_start = entry.get('start')
+            entry_end = entry_start + entry.get('duration', 0) if entry_start is not None else None
+        if not text.strip():
+            continue
+        if lines and size + len(text) + 1 > max_chars:
+            flush()
+            lines, size, start = [], 0, None
+        lines.append(text)
+        size += len(text) + 1
+        if start is None:
+            start = entry_start
+        end = entry_end
+    flush()
+    return chunks
+
+def build_chunk_prompt(chunk: Dict[str, Any], total: int) -> str:
+    """Prompt for one chunk (the map step)."""
+    position = f"part {chunk['index'] + 1} of {total}"
+    if chunk['start'] is not None:
+        position += f" ({_format_time(chunk['start'])} - {_format_time(chunk['end'])})"
+    return f"""You are an expert educational video analyst. The following is {position} of a long YouTube video transcript. Analyze only this part and provide:
+1. Ratings (1-5) for: Clarity of Content, Emotional Impact, Video Structure, Retention Power, Commercial Balance, judged on this part.
+2. A short overview of what this part covers (1-2 sentences).
+3. Up to three positive points (bullet list).
+4. Up to two areas for improvement (bullet list).
+5. Up to five actionable suggestions for the teacher, focusing on content quality, retention, and engagement.
+
+Transcript part:
+\"\"\"{chunk['text']}\"\"\"
+{RESPONSE_FORMAT}"""
+
+def build_reduce_prompt(partials: List[Dict[str, Any]]) -> str:
+    """Prompt that merges the per-chunk summaries into one (the reduce step)."""
+    summaries = json.dumps([p['videoSummary'] for p in partials], ensure_ascii=False, indent=1)
+    return f"""You are an expert educational video analyst. A long YouTube video was analyzed in {len(partials)} consecutive parts. These are the per-part summaries, in order:
+{summaries}
+
+Merge them into one summary of the whole video:
+1. A summary overview of the whole video (2-3 sentences).
+2. The three most important positive points (bullet list).
+3. The two most important areas for improvement (bullet list).
+4. Five actionable suggestions for teachers to improve future videos, focusing on content quality, retention, and engagement.
 
 Respond in valid JSON with this structure:
-{
-  "finalVerdict": {
-    "clarityOfContent": number,
-    "emotionalImpact": number,
-    "videoStructure": number,
-    "retentionPower": number,
-    "commercialBalance": number
-  },
-  "videoSummary": {
-    "overview": string,
-    "positivePoints": string[],
-    "negativePoints": string[],
-    "suggestions": string[]
-  }
-}
+{{
+  "overview": string,
+  "positivePoints": string[],
+  "negativePoints": string[],
+  "suggestions": string[]
+}}
 """
+
+def _merge_summaries(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Mechanical reduce used when the reduce call fails: join overviews, keep unique points."""
+    merged = {'overview': " ".join(p['videoSummary'].get('overview', '') for p in partials).strip()}
+    for key, limit in SUMMARY_LIMITS.items():
+        points = []
+        for partial in partials:
+            for point in partial['videoSummary'].get(key, []):
+                if point not in points:
+                    points.append(point)
+        merged[key] = points[:limit]
+    return merged
+
+def reduce_analyses(partials: List[Dict[str, Any]], weights: List[float]) -> Dict[str, Any]:
+    """Combine per-chunk analyses into the finalVerdict/videoSummary structure."""
+    total = sum(weights) or 1
+    verdict = {}
+    for key in RATING_KEYS:
+        rated = [(float(p['finalVerdict'][key]), w) for p, w in zip(partials, weights)
+                 if isinstance(p.get('finalVerdict', {}).get(key), (int, float))]
+        weight = sum(w for _, w in rated)
+        verdict[key] = round(sum(r * w for r, w in rated) / weight, 1) if weight else None
+    
+    if len(partials) == 1:
+        summary = partials[0]['videoSummary']
+    else:
+        try:
+            summary = generate_json(build_reduce_prompt(partials))
+        except Exception as e:
+            print(f"Reduce step failed ({str(e)}), merging chunk summaries directly")
+            summary = _merge_summaries(partials)
+    return {'finalVerdict': verdict, 'videoSummary': summary}
+
+def _analyze_chunk(chunk: Dict[str, Any], total: int, retries: int) -> Dict[str, Any]:
+    for attempt in range(retries + 1):
+        try:
+            partial = generate_json(build_chunk_prompt(chunk, total))
+            if 'finalVerdict' not in partial or 'videoSummary' not in partial:
+                raise ValueError("Chunk analysis is missing finalVerdict/videoSummary")
+            return partial
+        except Exception as e:
+            if attempt == retries:
+                raise
+            print(f"Chunk {chunk['index'] + 1}/{total} failed ({str(e)}), retrying")
+            time.sleep(random.uniform(0, 2 ** attempt))
+
+def analyze_transcript_chunked(transcript: Union[str, List[Dict[str, Any]]],
+                               max_chars: int = CHUNK_CHARS, max_workers: int = CHUNK_WORKERS,
+                               retries: int = CHUNK_RETRIES) -> Dict[str, Any]:
+    """
+    Analyze a long transcript map-reduce style.
+
+    The transcript (text or entries) is split on segment boundaries, chunks
+    are analyzed concurrently on a bounded pool with per-chunk retries, and
+    the partial results are merged: ratings are averaged weighted by chunk
+    length, summaries are merged by one small reduce call.
+    """
+    entries = transcript.splitlines() if isinstance(transcript, str) else transcript
+    chunks = chunk_transcript(entries, max_chars)
+    if not chunks:
+        raise ValueError("Transcript is empty")
+    print(f"Analyzing {len(chunks)} chunks with up to {max_workers} workers...")
+    
+    partials = [None] * len(chunks)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+        futures = {pool.submit(_analyze_chunk, chunk, len(chunks), retries): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            chunk = futures[future]
+            partials[chunk['index']] = future.result()
+            print(f"Chunk {chunk['index'] + 1}/{len(chunks)} analyzed")
     
+    analysis = reduce_analyses(partials, [len(chunk['text']) for chunk in chunks])
+    analysis['chunks'] = len(chunks)
+    return analysis
+
+def analyze_transcript(transcript: Union[str, List[Dict[str, Any]]], video_id: str,
+                       chunked: Optional[bool] = None,
+                       compaction_steps: Optional[tuple] = DEFAULT_STEPS,
+                       cache=None, save: bool = True) -> Dict[str, Any]:
+    """
+    Analyze transcript using Gemini API.
+
+    transcript is plain text or transcript entries. It is first compacted
+    with compaction_steps (see transcript_compaction; None sends it as is).
+    With chunked=None, transcripts longer than CHUNK_THRESHOLD characters go
+    through analyze_transcript_chunked; True/False forces either mode.
+    Results are served from the content-addressed analysis cache (the
+    shared default one unless cache is given; cache=False bypasses it), and
+    identical concurrent requests share one model call. With save=False
+    the analysis_<video_id>.json file is left to the caller.
+    """
+    stats = None
+    if compaction_steps:
+        stats = CompactionStats()
+        transcript = compact_transcript(transcript, compaction_steps, stats)
+        print(f"Prompt compaction: {stats}")
+    text = transcript if isinstance(transcript, str) else "\n".join(entry['text'] for entry in transcript)
+    if chunked is None:
+        chunked = len(text) > CHUNK_THRESHOLD
+    
+    def compute():
+        if chunked:
+            return analyze_transcript_chunked(transcript)
+        return generate_json(build_prompt(text))
+    
+    if cache is None:
+        cache = default_cache()
     try:
-        response = model.generate_content(prompt)
-        # Extract JSON from response
-        response_text = response.text.strip()
-        
-        # Clean the response to ensure it's valid JSON
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        if not json_match:
-            raise ValueError("Could not find JSON in response")
-            
-        analysis = json.loads(json_match.group(0))
+        if cache:
+            variant = f"chunked:{CHUNK_CHARS}" if chunked else "single"
+            key = analysis_key(text, PROMPT_VERSION, MODEL_NAME, variant)
+            analysis = cache.get_or_compute(key, compute, MODEL_NAME, PROMPT_VERSION)
+            if analysis.pop('cached'):
+                print("Analysis loaded from cache")
+        else:
+            analysis = compute()
+        if stats is not None:
+            analysis['compaction'] = stats.to_dict()
         
         # Save analysis to file
-        analysis_filename = f"analysis_{video_id}.json"
-        with open(analysis_filename, 'w', encoding='utf-8') as f:
-            json.dump(analysis, f, indent=2, ensure_ascii=False)
-        print(f"Analysis saved as {analysis_filename}")
+        if save:
+            save_analysis(analysis, video_id)
         
         return analysis
         
@@ -143,7 +372,7 @@ def main():
         try:
             # Get transcript
             print("Fetching transcript...")
-            transcript = get_transcript(video_id)
+            transcript = get_transcript_entries(video_id)
             
             # Analyze transcript
             print("Analyzing content...")
@@ -1,11 +1,33 @@
 # Python backend for YouTube transcript using youtube-transcript-api
+import os
+import sqlite3
+import sys
 from flask import Flask, request, jsonify
 from youtube_transcript_api import YouTubeTranscriptApi
 from flask_cors import CORS
 
+# Share the transcript modules (and their persistent cache) in the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from transcript_languages import fetch_preferred_transcript
+
 app = Flask(__name__)
 CORS(app)
 
+def fetch_transcript(video_id, languages):
+    """Fetch through the shared cache, falling back to an uncached fetch if it can't be used (e.g. read-only disk)"""
+    try:
+        from transcript_cache import default_cache
+        cache = default_cache() or False
+    except Exception as e:
+        print(f"Transcript cache unavailable, fetching uncached: {e}")
+        cache = False
+    if cache:
+        try:
+            return fetch_preferred_transcript(video_id, languages, cache=cache)
+        except sqlite3.Error as e:
+            print(f"Transcript cache failed, fetching uncached: {e}")
+    return fetch_preferred_transcript(video_id, languages, cache=False)
+
 @app.route('/api/yt_transcript', methods=['POST'])
 def get_yt_transcript():
     data = request.get_json()
@@ -14,22 +36,14 @@ def get_yt_transcript():
         return jsonify({'error': 'Missing videoId'}), 400
     try:
         try:
-            from youtube_transcript_api import YouTubeTranscriptApi
-            from youtube_transcript_api.formatters import TextFormatter
             video_id = str(video_id)
-            transcripts = YouTubeTranscriptApi.list_transcripts(video_id)
-            print('Available languages:')
-            for t in transcripts:
-                print(t.language, t.language_code)
-            # Prefer Hindi if available
-            try:
-                transcript_obj = transcripts.find_transcript(['hi'])
-            except Exception:
-                # Otherwise just use the 'best' transcript (first available)
-                transcript_obj = next(iter(transcripts))
-            transcript_list = transcript_obj.fetch()
-            formatter = TextFormatter()
-            transcript = formatter.format_transcript(transcript_list)
+            # Prefer Hindi if available, otherwise the 'best' transcript;
+            # repeated requests for the same video are served from the cache
+            result = fetch_transcript(video_id, ['hi'])
+            if result is None:
+                return jsonify({'error': 'No transcripts available'}), 404
+            print(f"Using {result['language']} transcript{' (cached)' if result.get('cached') else ''}")
+            transcript = '\n'.join(entry['text'] for entry in result['entries'])
             print(f"Returning transcript of length {len(transcript)}")
             if transcript.strip():
                 return jsonify({'transcript': transcript})
@@ -0,0 +1,199 @@
+"""
+Non-interactive, pipelined batch analysis of many videos.
+
+Each video goes through four stages: fetch (transcript), compact (prompt
+compaction), analyze (Gemini, through the analysis cache) and save
+(analysis_<video_id>.json). Every stage has its own worker count and the
+stages are joined by bounded queues, so fetching video N+1 overlaps with
+analyzing video N while a slow stage can't pile up unbounded work. One
+JSON line per video is written to stdout (or --output); progress messages
+go to stderr, followed by a throughput and latency-percentile summary.
+
+Usage:
+    python batch_analyze.py video_ids.txt [--fetch-workers 4] [--analyze-workers 2]
+        [--queue-size 4] [--output results.jsonl]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import analyze_yt_video
+from bulk_ingest import read_video_ids
+from transcript_compaction import ALL_STEPS, DEFAULT_STEPS, CompactionStats, compact_transcript
+
+STAGES = ('fetch', 'compact', 'analyze', 'save')
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of values (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def _stage_functions(language, chunked, steps):
+    def fetch(item):
+        item['entries'] = analyze_yt_video.get_transcript_entries(item['video_id'], language)
+
+    def compact(item):
+        stats = CompactionStats()
+        item['transcript'] = compact_transcript(item.pop('entries'), steps, stats)
+        item['compaction'] = stats.to_dict()
+
+    def analyze(item):
+        item['analysis'] = analyze_yt_video.analyze_transcript(
+            item.pop('transcript'), item['video_id'], chunked, compaction_steps=None, save=False)
+
+    def save(item):
+        item['analysis']['compaction'] = item['compaction']
+        analyze_yt_video.save_analysis(item['analysis'], item['video_id'])
+
+    return {'fetch': fetch, 'compact': compact, 'analyze': analyze, 'save': save}
+
+
+async def _run_stage(name, func, inbox, outbox, workers, next_workers, latencies):
+    async def worker():
+        while True:
+            item = await inbox.get()
+            if item is None:
+                return
+            if name == STAGES[0]:
+                # Latency counts from when the pipeline starts work on the video, not from
+                # when it was queued, so it doesn't grow with the position in the batch
+                item['started'] = time.perf_counter()
+            if 'error' not in item:
+                started = time.perf_counter()
+                try:
+                    await asyncio.to_thread(func, item)
+                except Exception as e:
+                    item['error'] = f"{name}: {e}"
+                elapsed = time.perf_counter() - started
+                item['timings'][name] = round(elapsed, 3)
+                latencies[name].append(elapsed)
+            await outbox.put(item)
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    for _ in range(next_workers):
+        await outbox.put(None)
+
+
+def _result_line(item):
+    line = {
+        'video_id': item['video_id'],
+        'status': 'error' if 'error' in item else 'success',
+        'latency': round(item['finished'] - item['started'], 3),
+        'timings': item['timings'],
+    }
+    if 'error' in item:
+        line['error'] = item['error']
+    else:
+        line['analysis'] = item['analysis']
+    return line
+
+
+async def run_pipeline(video_ids, output, language='hi', workers=None, queue_size=4, chunked=None,
+                       steps=DEFAULT_STEPS):
+    """
+    Run video_ids through the pipeline, writing one JSON line per video to
+    output; returns a summary dict.
+
+    workers maps stage name to worker count (defaults: fetch 4, compact 1,
+    analyze 2, save 1).
+    """
+    workers = {'fetch': 4, 'compact': 1, 'analyze': 2, 'save': 1, **(workers or {})}
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=sum(workers.values()),
+                                                 thread_name_prefix='batch-analyze'))
+    functions = _stage_functions(language, chunked, steps)
+    latencies = {name: [] for name in STAGES}
+    end_to_end = []
+    summary = {'total': len(video_ids), 'done': 0, 'failed': 0}
+    started = time.perf_counter()
+
+    # The input queue holds every video; the queues between stages are bounded
+    queues = [asyncio.Queue()] + [asyncio.Queue(maxsize=queue_size) for _ in STAGES]
+    for video_id in video_ids:
+        queues[0].put_nowait({'video_id': video_id, 'timings': {}})
+    for _ in range(workers[STAGES[0]]):
+        queues[0].put_nowait(None)
+
+    stages = [
+        asyncio.ensure_future(_run_stage(name, functions[name], queues[i], queues[i + 1], workers[name],
+                                         workers[STAGES[i + 1]] if i + 1 < len(STAGES) else 1, latencies))
+        for i, name in enumerate(STAGES)
+    ]
+
+    while True:
+        item = await queues[-1].get()
+        if item is None:
+            break
+        item['finished'] = time.perf_counter()
+        end_to_end.append(item['finished'] - item['started'])
+        summary['failed' if 'error' in item else 'done'] += 1
+        output.write(json.dumps(_result_line(item), ensure_ascii=False) + '\n')
+        output.flush()
+        print(f"[{summary['done'] + summary['failed']}/{len(video_ids)}] {item['video_id']}: "
+              f"{item.get('error', 'ok')}", file=sys.stderr)
+    await asyncio.gather(*stages)
+
+    summary['seconds'] = time.perf_counter() - started
+    summary['videos_per_second'] = len(end_to_end) / summary['seconds'] if end_to_end else 0.0
+    summary['latency'] = {
+        name: {f"p{p}": percentile(values, p) for p in (50, 90, 99)}
+        for name, values in [('end_to_end', end_to_end)] + [(name, latencies[name]) for name in STAGES]
+    }
+    return summary
+
+
+def _format_seconds(value):
+    return '-' if value is None else f"{value:.2f}s"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze many YouTube videos as a pipeline.")
+    parser.add_argument('sources', nargs='+', help="files with one video ID or URL per line ('-' for stdin)")
+    parser.add_argument('--language', default='hi')
+    parser.add_argument('--fetch-workers', type=int, default=4)
+    parser.add_argument('--compact-workers', type=int, default=1)
+    parser.add_argument('--analyze-workers', type=int, default=2)
+    parser.add_argument('--save-workers', type=int, default=1)
+    parser.add_argument('--queue-size', type=int, default=4, help="items buffered between two stages")
+    parser.add_argument('--chunked', choices=('auto', 'always', 'never'), default='auto')
+    parser.add_argument('--drop-fillers', action='store_true', help="also drop hesitation sounds")
+    parser.add_argument('--output', default='-', help="JSON lines output file ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    video_ids = read_video_ids(args.sources)
+    workers = {'fetch': args.fetch_workers, 'compact': args.compact_workers,
+               'analyze': args.analyze_workers, 'save': args.save_workers}
+    chunked = {'auto': None, 'always': True, 'never': False}[args.chunked]
+    steps = ALL_STEPS if args.drop_fillers else DEFAULT_STEPS
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        # Keep stdout for the JSON lines; the stages' progress messages go to stderr
+        with contextlib.redirect_stdout(sys.stderr):
+            print(f"Analyzing {len(video_ids)} videos")
+            summary = asyncio.run(run_pipeline(video_ids, output, args.language, workers, args.queue_size,
+                                               chunked, steps))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print("\nBatch summary", file=sys.stderr)
+    print("=" * 80, file=sys.stderr)
+    print(f"Done: {summary['done']}  Failed: {summary['failed']}  Elapsed: {summary['seconds']:.1f}s "
+          f"({summary['videos_per_second']:.2f} videos/s)", file=sys.stderr)
+    for name, values in summary['latency'].items():
+        print(f"{name:>10}: p50 {_format_seconds(values['p50'])}  p90 {_format_seconds(values['p90'])}  "
+              f"p99 {_format_seconds(values['p99'])}", file=sys.stderr)
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
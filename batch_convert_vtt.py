@@ -0,0 +1,238 @@
+"""
+Convert many VTT files in parallel.
+
+Every file is parsed, collapsed (unless --raw) and exported in the
+requested formats on a pool of worker processes. Files whose outputs are
+already up to date are skipped, either by modification time (default) or
+by a content hash recorded in a manifest next to the outputs.
+
+Usage:
+    python batch_convert_vtt.py <dir_or_glob_or_file> [...] [--workers N]
+        [--formats txt,srt] [--raw] [--check mtime|hash] [--output-dir DIR]
+
+With --output-dir, each file keeps its path relative to the directory (or
+the fixed prefix of the pattern) it was found under; inputs that would
+still write the same output are rejected.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from caption_dedupe import CollapseStats, collapse_captions
+from parse_vtt import iter_captions
+from transcript_export import FORMATS, export_transcript, output_paths
+
+MANIFEST_NAME = '.vtt_batch_manifest.json'
+
+
+def find_vtt_files(inputs):
+    """
+    Expand directories (recursively), glob patterns and plain paths into
+    (vtt_file, root) pairs, root being the directory the input was
+    relative to (the directory itself, a pattern's fixed prefix, or a
+    file's own directory).
+    """
+    files = []
+    seen = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            root = item
+            matches = glob.glob(os.path.join(glob.escape(item), '**', '*.vtt'), recursive=True)
+        elif os.path.isfile(item):
+            root = os.path.dirname(item)
+            matches = [item]
+        else:
+            root = _glob_root(item)
+            matches = glob.glob(item, recursive=True)
+        root = os.path.abspath(root)
+        for path in sorted(matches):
+            # Skip our own cleaned VTT outputs
+            if path.endswith('.clean.vtt'):
+                continue
+            path = os.path.abspath(path)
+            if path not in seen:
+                seen.add(path)
+                files.append((path, root))
+    return files
+
+
+def _glob_root(pattern):
+    """The leading directories of pattern that contain no wildcards."""
+    parts = []
+    for part in os.path.dirname(pattern).split(os.sep):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return os.sep.join(parts) or os.curdir
+
+
+def outputs_for(vtt_file, formats, output_dir=None, root=None):
+    """
+    Output paths for vtt_file: next to it, or under output_dir at the same
+    path relative to root, so files with the same name in different
+    subdirectories don't overwrite each other.
+    """
+    base_path = os.path.splitext(vtt_file)[0]
+    if output_dir:
+        relative = os.path.relpath(base_path, root) if root else os.path.basename(base_path)
+        base_path = os.path.join(output_dir, relative)
+    outputs = output_paths(base_path, formats)
+    if 'vtt' in outputs:
+        outputs['vtt'] = base_path + '.clean.vtt'
+    return outputs
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_up_to_date(vtt_file, outputs, check, manifest, collapse):
+    """Return (up_to_date, source_hash) for a file under the chosen check."""
+    if not all(os.path.exists(path) for path in outputs.values()):
+        return False, None
+    if check == 'mtime':
+        source_mtime = os.path.getmtime(vtt_file)
+        return all(os.path.getmtime(path) >= source_mtime for path in outputs.values()), None
+    source_hash = file_hash(vtt_file)
+    entry = manifest.get(vtt_file)
+    return (entry is not None and entry.get('sha256') == source_hash
+            and entry.get('collapse') == collapse
+            and set(outputs) <= set(entry.get('formats', []))), source_hash
+
+
+def convert_file(job):
+    """Worker: parse, collapse and export one file. Returns a result dict."""
+    vtt_file, outputs, collapse = job
+    started = time.perf_counter()
+    result = {'path': vtt_file, 'bytes': os.path.getsize(vtt_file)}
+    try:
+        captions = iter_captions(vtt_file)
+        stats = CollapseStats()
+        if collapse:
+            captions = collapse_captions(captions, stats)
+        result['entries'] = export_transcript(captions, outputs, os.path.basename(vtt_file))
+        result['reduction_ratio'] = stats.reduction_ratio if collapse else 1.0
+    except Exception as e:
+        result['error'] = str(e)
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(path, manifest):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def batch_convert(inputs, workers=None, formats=('txt',), collapse=True, check='mtime', output_dir=None):
+    """Convert every VTT file found in inputs and return a summary dict."""
+    started = time.perf_counter()
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir or os.getcwd(), MANIFEST_NAME)
+    manifest = load_manifest(manifest_path) if check == 'hash' else {}
+
+    jobs = []
+    hashes = {}
+    skipped = 0
+    owners = {}
+    for vtt_file, root in find_vtt_files(inputs):
+        outputs = outputs_for(vtt_file, formats, output_dir, root)
+        for path in outputs.values():
+            # Separate inputs (e.g. two directories with the same layout) can still map to one output
+            other = owners.setdefault(os.path.abspath(path), vtt_file)
+            if other != vtt_file:
+                raise ValueError(f"{vtt_file} and {other} would both write {path}")
+        if output_dir:
+            os.makedirs(os.path.dirname(os.path.abspath(next(iter(outputs.values())))), exist_ok=True)
+        up_to_date, source_hash = is_up_to_date(vtt_file, outputs, check, manifest, collapse)
+        if up_to_date:
+            skipped += 1
+            continue
+        hashes[vtt_file] = source_hash
+        jobs.append((vtt_file, outputs, collapse))
+
+    converted = failed = total_bytes = 0
+    if jobs:
+        workers = workers or os.cpu_count() or 1
+        # Hand out small files in chunks so thousands of tiny jobs don't
+        # spend their time in inter-process round trips
+        chunksize = max(1, min(32, len(jobs) // (workers * 4)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for result in executor.map(convert_file, jobs, chunksize=chunksize):
+                if 'error' in result:
+                    failed += 1
+                    print(f"Error converting {result['path']}: {result['error']}")
+                    continue
+                converted += 1
+                total_bytes += result['bytes']
+                if check == 'hash':
+                    manifest[result['path']] = {
+                        'sha256': hashes[result['path']] or file_hash(result['path']),
+                        'formats': sorted(formats),
+                        'collapse': collapse,
+                    }
+
+    if check == 'hash' and converted:
+        save_manifest(manifest_path, manifest)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'converted': converted,
+        'skipped': skipped,
+        'failed': failed,
+        'bytes': total_bytes,
+        'seconds': elapsed,
+        'files_per_second': converted / elapsed if elapsed else 0.0,
+        'mb_per_second': total_bytes / (1024 * 1024) / elapsed if elapsed else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert VTT files to clean transcripts in parallel.")
+    parser.add_argument('inputs', nargs='+', help="VTT files, directories (searched recursively) or glob patterns")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--formats', default='txt', help=f"comma-separated output formats from {','.join(FORMATS)}")
+    parser.add_argument('--raw', action='store_true', help="keep every rolling auto-caption cue")
+    parser.add_argument('--check', choices=('mtime', 'hash'), default='mtime',
+                        help="how to decide that existing outputs are up to date")
+    parser.add_argument('--output-dir', help="write outputs here instead of next to each VTT file")
+    args = parser.parse_args(argv)
+
+    formats = [fmt.strip() for fmt in args.formats.split(',') if fmt.strip()]
+    if not formats or set(formats) - set(FORMATS):
+        parser.error(f"--formats must be a comma-separated subset of {','.join(FORMATS)}")
+
+    try:
+        summary = batch_convert(args.inputs, args.workers, formats, not args.raw, args.check, args.output_dir)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print("\nBatch conversion summary")
+    print("=" * 80)
+    print(f"Converted: {summary['converted']}  Skipped (up to date): {summary['skipped']}  Failed: {summary['failed']}")
+    print(f"Input: {summary['bytes'] / (1024 * 1024):.2f} MB in {summary['seconds']:.2f}s")
+    print(f"Throughput: {summary['files_per_second']:.1f} files/s, {summary['mb_per_second']:.2f} MB/s")
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+Bulk ingestion of transcripts for many videos.
+
+Video IDs or URLs are read from files (or stdin) and fetched concurrently
+on asyncio through TranscriptFetcher, which stores every transcript in the
+persistent transcript cache. A semaphore caps the number of videos in
+flight, a token bucket caps the request rate, transient failures
+(network errors, HTTP 429/5xx) are retried with jittered exponential
+backoff while videos without a transcript fail at once, and every
+finished video is appended to a checkpoint file so an interrupted run
+resumes where it stopped.
+
+Usage:
+    python bulk_ingest.py video_ids.txt [--concurrency 8] [--rate 2]
+        [--checkpoint ingest.checkpoint.jsonl] [--output-dir transcripts]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+from transcript_export import export_transcript
+from transcript_fetcher import TranscriptFetcher, is_transient
+from youtube_transcript_helper import extract_video_id
+
+# SupaData transcription is billed per video, so it is not part of the bulk default
+DEFAULT_BACKENDS = ('youtube_transcript_api', 'caption_tracks', 'yt_dlp')
+
+
+class TokenBucket:
+    """Allow rate acquisitions per second on average, with bursts up to capacity."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Reserve a token under the lock (the balance may go negative) and wait
+        # for it outside, so waiters queue up in order without holding the lock
+        async with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            await asyncio.sleep(wait)
+
+
+class Checkpoint:
+    """Append-only JSON Lines record of finished videos."""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self.failed = set()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from an interrupted run
+                    if record.get('status') == 'done':
+                        self.done.add(record['video_id'])
+                        self.failed.discard(record['video_id'])
+                    else:
+                        self.failed.add(record['video_id'])
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def record(self, entry):
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """Full-jitter exponential backoff for the given (0-based) retry attempt."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def read_video_ids(sources):
+    """Read video IDs or URLs (one per line, '#' comments allowed) from files or '-' for stdin."""
+    video_ids = []
+    seen = set()
+    for source in sources:
+        f = sys.stdin if source == '-' else open(source, 'r', encoding='utf-8')
+        try:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if not line:
+                    continue
+                video_id = extract_video_id(line)
+                if video_id not in seen:
+                    seen.add(video_id)
+                    video_ids.append(video_id)
+        finally:
+            if f is not sys.stdin:
+                f.close()
+    return video_ids
+
+
+async def ingest(video_ids, language='hi', concurrency=8, rate=2.0, burst=None, retries=4,
+                 checkpoint_path='ingest.checkpoint.jsonl', output_dir=None, backends=DEFAULT_BACKENDS,
+                 retry_failed=False):
+    """Fetch transcripts for video_ids and return a summary dict."""
+    checkpoint = Checkpoint(checkpoint_path)
+    skip = checkpoint.done if retry_failed else checkpoint.done | checkpoint.failed
+    pending = [video_id for video_id in video_ids if video_id not in skip]
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    fetcher = TranscriptFetcher(order=backends)
+    bucket = TokenBucket(rate, burst)
+    semaphore = asyncio.Semaphore(concurrency)
+    summary = {'total': len(video_ids), 'skipped': len(video_ids) - len(pending), 'done': 0, 'failed': 0,
+               'retries': 0, 'cached': 0}
+    started = time.perf_counter()
+
+    async def process(video_id):
+        async with semaphore:
+            result = error = None
+            for attempt in range(retries + 1):
+                if attempt:
+                    summary['retries'] += 1
+                    await asyncio.sleep(backoff_delay(attempt - 1))
+                await bucket.acquire()
+                try:
+                    result = await asyncio.to_thread(fetcher.fetch, video_id, language)
+                    break
+                except Exception as e:
+                    error = str(e)
+                    # "No transcript" won't change on retry; only network, 429 and 5xx errors might
+                    if not is_transient(e):
+                        break
+            if result is None:
+                summary['failed'] += 1
+                checkpoint.record({'video_id': video_id, 'status': 'failed', 'error': error,
+                                   'attempts': attempt + 1})
+                print(f"[failed] {video_id}: {error}")
+                return
+
+            if output_dir:
+                path = os.path.join(output_dir, f"{video_id}.{result['language']}.jsonl")
+                await asyncio.to_thread(export_transcript, result['entries'], {'jsonl': path})
+            summary['done'] += 1
+            summary['cached'] += bool(result.get('cached'))
+            checkpoint.record({'video_id': video_id, 'status': 'done', 'language': result['language'],
+                               'backend': result.get('backend'), 'entries': len(result['entries'])})
+            print(f"[done] {video_id} ({result['language']}, {len(result['entries'])} entries"
+                  f"{', cached' if result.get('cached') else ''})")
+
+    try:
+        await asyncio.gather(*(process(video_id) for video_id in pending))
+    finally:
+        checkpoint.close()
+        fetcher.close()
+
+    summary['seconds'] = time.perf_counter() - started
+    summary['videos_per_second'] = (summary['done'] + summary['failed']) / summary['seconds'] if pending else 0.0
+    summary['backend_stats'] = fetcher.stats()
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch transcripts for many YouTube videos concurrently.")
+    parser.add_argument('sources', nargs='+', help="files with one video ID or URL per line ('-' for stdin)")
+    parser.add_argument('--language', default='hi')
+    parser.add_argument('--concurrency', type=int, default=8, help="videos fetched at the same time")
+    parser.add_argument('--rate', type=float, default=2.0, help="average fetch attempts per second")
+    parser.add_argument('--burst', type=float, default=None, help="token bucket size (default: max(1, rate))")
+    parser.add_argument('--retries', type=int, default=4, help="retries per video after the first attempt")
+    parser.add_argument('--checkpoint', default='ingest.checkpoint.jsonl', help="resume file")
+    parser.add_argument('--retry-failed', action='store_true', help="retry videos the checkpoint marks as failed")
+    parser.add_argument('--output-dir', help="also write each transcript as <video_id>.<lang>.jsonl here")
+    parser.add_argument('--backends', default=','.join(DEFAULT_BACKENDS), help="comma-separated backend order")
+    args = parser.parse_args(argv)
+
+    video_ids = read_video_ids(args.sources)
+    print(f"Ingesting {len(video_ids)} videos (checkpoint: {args.checkpoint})")
+    summary = asyncio.run(ingest(
+        video_ids, args.language, args.concurrency, args.rate, args.burst, args.retries,
+        args.checkpoint, args.output_dir, [b.strip() for b in args.backends.split(',') if b.strip()],
+        args.retry_failed))
+
+    print("\nIngestion summary")
+    print("=" * 80)
+    print(f"Done: {summary['done']} ({summary['cached']} from cache)  Failed: {summary['failed']}  "
+          f"Skipped (checkpoint): {summary['skipped']}  Retries: {summary['retries']}")
+    print(f"Elapsed: {summary['seconds']:.1f}s ({summary['videos_per_second']:.2f} videos/s)")
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
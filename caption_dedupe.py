@@ -0,0 +1,137 @@
+"""
+Collapse YouTube rolling auto-captions into clean, non-overlapping segments.
+
+Auto-generated captions use a two-line rolling layout: every sentence shows
+up in the cue where it is being spoken, again in a 10 ms "bridge" cue, and
+once more as the first line of the following cue. The collapsing stage keeps
+only the words each cue adds on top of the previous one, which is found with
+a KMP suffix/prefix overlap so the whole pass stays linear in the number of
+words.
+"""
+from caption_timestamps import with_ms, with_timestamps
+
+
+class CollapseStats:
+    """Counters describing how much a collapsing pass removed."""
+
+    def __init__(self):
+        self.cues_in = 0
+        self.segments_out = 0
+        self.chars_in = 0
+        self.chars_out = 0
+
+    @property
+    def reduction_ratio(self):
+        """How many times smaller the collapsed text is than the input (e.g. 2.7)."""
+        return self.chars_in / self.chars_out if self.chars_out else 0.0
+
+    def to_dict(self):
+        return {
+            'cues_in': self.cues_in,
+            'segments_out': self.segments_out,
+            'chars_in': self.chars_in,
+            'chars_out': self.chars_out,
+            'reduction_ratio': round(self.reduction_ratio, 3),
+        }
+
+    def __str__(self):
+        return (f"{self.cues_in} cues -> {self.segments_out} segments, "
+                f"{self.chars_in} -> {self.chars_out} chars ({self.reduction_ratio:.2f}x reduction)")
+
+
+def _overlap(prev_words, words):
+    """Length of the longest suffix of prev_words that is also a prefix of words."""
+    n = min(len(words), len(prev_words))
+    if not n:
+        return 0
+
+    # KMP failure function over the candidate prefix of words
+    failure = [0] * n
+    k = 0
+    for i in range(1, n):
+        while k and words[i] != words[k]:
+            k = failure[k - 1]
+        if words[i] == words[k]:
+            k += 1
+        failure[i] = k
+
+    # Run the matcher over the tail of prev_words that could overlap
+    k = 0
+    for word in prev_words[len(prev_words) - n:]:
+        while k and (k == n or word != words[k]):
+            k = failure[k - 1]
+        if word == words[k]:
+            k += 1
+    return k
+
+
+def collapse_segments(segments, stats=None, min_overlap=2):
+    """
+    Collapse an iterable of (start_ms, end_ms, text) cues into new segments.
+
+    Words repeated from the end of the previous cue are dropped; cues that
+    add nothing (bridge cues, carry-over only) extend the previous segment
+    instead. Overlaps shorter than min_overlap words are ignored unless they
+    cover a whole cue, so a word that happens to be repeated in ordinary
+    captions is not swallowed. Yields (start_ms, end_ms, text) tuples whose
+    time ranges never overlap.
+    """
+    if stats is None:
+        stats = CollapseStats()
+
+    pending = None
+    prev_words = []
+    for start, end, text in segments:
+        stats.cues_in += 1
+        stats.chars_in += len(text)
+        words = text.split()
+        if not words:
+            continue
+
+        k = _overlap(prev_words, words)
+        if k < min_overlap and k < len(words) and k < len(prev_words):
+            k = 0
+        prev_words = words
+
+        if k == len(words):
+            # Nothing new: the cue only repeats text already emitted
+            if pending is not None and end > pending[1]:
+                pending[1] = end
+            continue
+
+        if pending is not None:
+            if start < pending[1]:
+                pending[1] = max(pending[0], start)
+            start = max(start, pending[1])
+            stats.segments_out += 1
+            stats.chars_out += len(pending[2])
+            yield tuple(pending)
+        pending = [start, max(start, end), ' '.join(words[k:])]
+
+    if pending is not None:
+        stats.segments_out += 1
+        stats.chars_out += len(pending[2])
+        yield tuple(pending)
+
+
+def collapse_captions(captions, stats=None, min_overlap=2):
+    """Collapse parse_vtt caption records ({'index','start','end','text'}) lazily."""
+    cues = ((start, end, c['text']) for c, start, end in with_ms(captions))
+    segments = with_timestamps(collapse_segments(cues, stats, min_overlap))
+    for i, (start, end, text) in enumerate(segments):
+        yield {
+            'index': i + 1,
+            'start': start,
+            'end': end,
+            'text': text
+        }
+
+
+def collapse_transcript_entries(entries, stats=None, min_overlap=2):
+    """Collapse youtube_transcript_api entries ({'text','start','duration'} in seconds)."""
+    cues = ((round(e['start'] * 1000), round((e['start'] + e.get('duration', 0)) * 1000), e['text'])
+            for e in entries)
+    return [
+        {'text': text, 'start': start / 1000, 'duration': (end - start) / 1000}
+        for start, end, text in collapse_segments(cues, stats, min_overlap)
+    ]
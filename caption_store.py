@@ -0,0 +1,238 @@
+"""
+Compact, array-backed storage for transcripts.
+
+A CaptionStore holds integer millisecond start/end times in typed arrays
+and all caption text in one contiguous UTF-8 buffer indexed by an offsets
+array, instead of one dict (and two timestamp strings) per caption. It
+iterates and slices like the list of caption dicts returned by
+parse_vtt.parse_vtt_file, and can be saved to a binary file that is
+memory-mapped back without re-parsing.
+
+Binary layout (.caps), all integers in the byte order recorded in the header:
+    header   magic b'CAPS', uint16 version, uint8 byte order, pad,
+             uint32 count, uint32 text length               (16 bytes)
+    starts   int32[count]       start times in ms
+    ends     int32[count]       end times in ms
+    offsets  uint32[count + 1]  caption i is text[offsets[i]:offsets[i + 1]]
+    text     UTF-8 bytes
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from caption_timestamps import format_timestamps, ms_to_timestamp, with_ms
+from json3_captions import decode_json3
+from parse_vtt import iter_captions
+
+MAGIC = b'CAPS'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHBxII')
+BYTE_ORDERS = {'little': 0, 'big': 1}
+
+
+class CaptionStore:
+    """Transcript container backed by typed arrays and a single text buffer."""
+
+    def __init__(self, starts=None, ends=None, offsets=None, text=None, _mapping=None, first_index=1):
+        self.first_index = first_index  # 'index' of the first caption; slices keep the original numbering
+        self.starts = starts if starts is not None else array('i')
+        self.ends = ends if ends is not None else array('i')
+        self.offsets = offsets if offsets is not None else array('I', [0])
+        self.text = text if text is not None else bytearray()
+        self._mapping = _mapping
+
+    # -- construction -------------------------------------------------------
+
+    def append(self, start_ms, end_ms, text):
+        if self._mapping is not None:
+            raise TypeError("Memory-mapped caption stores are read-only")
+        self.starts.append(start_ms)
+        self.ends.append(end_ms)
+        self.text += text.encode('utf-8')
+        self.offsets.append(len(self.text))
+
+    @classmethod
+    def from_captions(cls, captions):
+        """Build from parse_vtt caption records ({'index','start','end','text'})."""
+        store = cls()
+        for caption, start, end in with_ms(captions):
+            store.append(start, end, caption['text'])
+        return store
+
+    @classmethod
+    def from_transcript_entries(cls, entries):
+        """Build from youtube_transcript_api entries ({'text','start','duration'} in seconds)."""
+        store = cls()
+        for entry in entries:
+            start = round(entry['start'] * 1000)
+            store.append(start, start + round(entry.get('duration', 0) * 1000), entry['text'])
+        return store
+
+    @classmethod
+    def from_json3(cls, source):
+        """Build from a json3 caption body (bytes, str, file or chunk stream), decoded incrementally."""
+        store = cls()
+        for segment in decode_json3(source):
+            store.append(segment['start_ms'], segment['start_ms'] + segment['duration_ms'], segment['text'])
+        return store
+
+    @classmethod
+    def from_json3_events(cls, events):
+        """Build from an already parsed json3 'events' list."""
+        store = cls()
+        for event in events:
+            text = ''.join(seg.get('utf8', '') for seg in event.get('segs') or ()).strip()
+            if text:
+                start = event.get('tStartMs', 0)
+                store.append(start, start + event.get('dDurationMs', 0), text)
+        return store
+
+    @classmethod
+    def from_vtt(cls, vtt_file):
+        """Stream a VTT file straight into a store."""
+        return cls.from_captions(iter_captions(vtt_file))
+
+    # -- sequence API -------------------------------------------------------
+
+    def __len__(self):
+        return len(self.starts)
+
+    def text_at(self, i):
+        return str(self.text[self.offsets[i]:self.offsets[i + 1]], 'utf-8')
+
+    def _record(self, i):
+        return {
+            'index': self.first_index + i,
+            'start': ms_to_timestamp(self.starts[i]),
+            'end': ms_to_timestamp(self.ends[i]),
+            'text': self.text_at(i)
+        }
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("CaptionStore slices must be contiguous")
+            stop = max(start, stop)
+            base = self.offsets[start]
+            return CaptionStore(
+                array('i', self.starts[start:stop]),
+                array('i', self.ends[start:stop]),
+                array('I', (offset - base for offset in self.offsets[start:stop + 1])),
+                bytearray(self.text[base:self.offsets[stop]]),
+                first_index=self.first_index + start,
+            )
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("caption index out of range")
+        return self._record(key)
+
+    def __iter__(self, batch_size=1024):
+        # Format the timestamp columns a batch at a time rather than per record
+        for base in range(0, len(self), batch_size):
+            stop = min(base + batch_size, len(self))
+            starts = format_timestamps(self.starts[base:stop])
+            ends = format_timestamps(self.ends[base:stop])
+            for i in range(base, stop):
+                yield {
+                    'index': self.first_index + i,
+                    'start': starts[i - base],
+                    'end': ends[i - base],
+                    'text': self.text_at(i)
+                }
+
+    def entries(self):
+        """Yield captions in the youtube_transcript_api shape ({'text','start','duration'})."""
+        for i in range(len(self)):
+            yield {
+                'text': self.text_at(i),
+                'start': self.starts[i] / 1000,
+                'duration': (self.ends[i] - self.starts[i]) / 1000
+            }
+
+    @property
+    def nbytes(self):
+        """Bytes used by the arrays and text buffer."""
+        return (len(self.starts) + len(self.ends) + len(self.offsets)) * 4 + len(self.text)
+
+    # -- binary format ------------------------------------------------------
+
+    def save(self, path):
+        """Write the store in the .caps binary format."""
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, BYTE_ORDERS[sys.byteorder], len(self), len(self.text)))
+            for column, typecode in ((self.starts, 'i'), (self.ends, 'i'), (self.offsets, 'I')):
+                f.write(column if isinstance(column, array) else array(typecode, column))
+            f.write(self.text)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory-map a .caps file.
+
+        The arrays and text are views into the mapping, so nothing is
+        parsed or copied. Files written on a machine with the other byte
+        order are read into byte-swapped arrays instead.
+        """
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise ValueError(f"'{path}' is not a caption store file")
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, byte_order, count, text_len = HEADER.unpack_from(mapping)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            mapping.close()
+            raise ValueError(f"'{path}' is not a version {FORMAT_VERSION} caption store file")
+
+        view = memoryview(mapping)
+        pos = HEADER.size
+        columns = []
+        for typecode, length in (('i', count), ('i', count), ('I', count + 1)):
+            columns.append(view[pos:pos + length * 4].cast(typecode))
+            pos += length * 4
+        text = view[pos:pos + text_len]
+
+        if byte_order != BYTE_ORDERS[sys.byteorder]:
+            swapped = []
+            for column in columns:
+                column = array(column.format, column)
+                column.byteswap()
+                swapped.append(column)
+            columns = swapped
+
+        return cls(*columns, text=text, _mapping=mapping)
+
+    def close(self):
+        """Release the memory mapping of a store returned by load()."""
+        if self._mapping is not None:
+            for column in (self.starts, self.ends, self.offsets, self.text):
+                if isinstance(column, memoryview):
+                    column.release()
+            self._mapping.close()
+            self._mapping = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python caption_store.py <path_to_vtt_file> [output.caps]")
+        sys.exit(1)
+
+    vtt_file = sys.argv[1]
+    output_file = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(vtt_file)[0] + ".caps"
+
+    store = CaptionStore.from_vtt(vtt_file)
+    store.save(output_file)
+    print(f"Stored {len(store)} captions ({store.nbytes} bytes) in {output_file}")
+
+    with CaptionStore.load(output_file) as loaded:
+        for caption in loaded[:5]:
+            print(f"{caption['index']:4d}. [{caption['start']} --> {caption['end']}] {caption['text']}")
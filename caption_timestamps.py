@@ -0,0 +1,147 @@
+"""
+Timestamp conversion between VTT/SRT strings and integer milliseconds.
+
+The scalar helpers convert one value at a time. parse_timestamps and
+format_timestamps convert a whole column at once: with NumPy installed the
+fixed-width "HH:MM:SS.mmm" strings are reinterpreted as a (n, 12) array of
+code points and turned into milliseconds with a single dot product, so
+converting thousands of cues costs about as much as converting one.
+Without NumPy they fall back to the scalar helpers. NumPy is imported on
+first use, so modules that only need the scalar helpers import quickly.
+"""
+from itertools import islice
+
+_np = False  # not imported yet
+
+
+def _numpy():
+    """Return the numpy module, importing it on first call, or None if it is not installed."""
+    global _np
+    if _np is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _np = numpy
+    return _np
+
+# Milliseconds contributed by each character of "HH:MM:SS.mmm"
+_DIGIT_WEIGHTS = (36000000, 3600000, 0, 600000, 60000, 0, 10000, 1000, 0, 100, 10, 1)
+_DIGIT_COLUMNS = (0, 1, 3, 4, 6, 7, 9, 10, 11)
+# Largest value that still fits the two-digit hour field
+_MAX_FIXED_MS = 100 * 3600 * 1000 - 1
+
+
+def normalize_timestamp(timestamp):
+    """Return a VTT timestamp in HH:MM:SS.mmm form (hours are optional in VTT)."""
+    timestamp = timestamp.replace(',', '.')
+    if timestamp.count(':') == 1:
+        timestamp = '00:' + timestamp
+    return timestamp
+
+
+def timestamp_to_ms(timestamp):
+    """Convert a VTT/SRT timestamp ("HH:MM:SS.mmm", "MM:SS.mmm") to integer milliseconds."""
+    hours, minutes, seconds = normalize_timestamp(timestamp).split(':')
+    seconds, _, millis = seconds.partition('.')
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(millis.ljust(3, '0')[:3])
+
+
+def ms_to_timestamp(ms, separator='.'):
+    """Format integer milliseconds as "HH:MM:SS.mmm" (use separator=',' for SRT)."""
+    seconds, millis = divmod(int(ms), 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{millis:03d}"
+
+
+def parse_timestamps(timestamps):
+    """
+    Convert a sequence of VTT/SRT timestamps to milliseconds in one pass.
+
+    Returns an int64 NumPy array (or a list of ints without NumPy). Values
+    that are not in the fixed "HH:MM:SS.mmm" / "MM:SS.mmm" shapes, such as
+    three-digit hours, are converted individually.
+    """
+    np = _numpy()
+    if np is None:
+        return [timestamp_to_ms(ts) for ts in timestamps]
+
+    raw = np.asarray(timestamps, dtype=str)
+    if raw.size == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    lengths = np.char.str_len(raw)
+    fixed = raw.astype('U12')
+    short = lengths == 9
+    if short.any():
+        fixed[short] = np.char.add('00:', raw[short])
+    odd = (lengths != 12) & ~short
+
+    codes = fixed.view(np.uint32).reshape(-1, 12).astype(np.int64) - ord('0')
+    digits = codes[:, _DIGIT_COLUMNS]
+    separators_ok = ((codes[:, 2] == ord(':') - ord('0')) & (codes[:, 5] == ord(':') - ord('0'))
+                     & np.isin(codes[:, 8], (ord('.') - ord('0'), ord(',') - ord('0'))))
+    bad = ~odd & (~separators_ok | ((digits < 0) | (digits > 9)).any(axis=1))
+    if bad.any():
+        raise ValueError(f"Invalid timestamp: {str(raw[bad.argmax()])!r}")
+
+    codes[:, (2, 5, 8)] = 0
+    ms = codes @ np.array(_DIGIT_WEIGHTS, dtype=np.int64)
+    for i in np.flatnonzero(odd):
+        ms[i] = timestamp_to_ms(str(raw[i]))
+    return ms
+
+
+def format_timestamps(ms, separator='.'):
+    """Format a sequence of millisecond values as "HH:MM:SS.mmm" strings in one pass."""
+    np = _numpy()
+    if np is None:
+        return [ms_to_timestamp(value, separator) for value in ms]
+
+    ms = np.asarray(ms, dtype=np.int64)
+    if ms.size == 0:
+        return []
+    if ms.min() < 0 or ms.max() > _MAX_FIXED_MS:
+        return [ms_to_timestamp(value, separator) for value in ms.tolist()]
+
+    fields = (ms // 3600000, ms // 60000 % 60, ms // 1000 % 60, ms % 1000)
+    chars = np.empty((ms.size, 12), dtype=np.uint32)
+    chars[:, 2] = chars[:, 5] = ord(':')
+    chars[:, 8] = ord(separator)
+    for value, (column, width) in zip(fields, ((0, 2), (3, 2), (6, 2), (9, 3))):
+        for k in range(width):
+            chars[:, column + width - 1 - k] = value // 10 ** k % 10 + ord('0')
+    return chars.view('U12').ravel().tolist()
+
+
+def with_ms(captions, batch_size=1024):
+    """
+    Yield (caption, start_ms, end_ms) for caption records with string times.
+
+    Captions are pulled in batches of batch_size and each batch is converted
+    with parse_timestamps, so lazy inputs stay lazy.
+    """
+    captions = iter(captions)
+    while True:
+        batch = list(islice(captions, batch_size))
+        if not batch:
+            return
+        starts = parse_timestamps([c['start'] for c in batch])
+        ends = parse_timestamps([c['end'] for c in batch])
+        if not isinstance(starts, list):
+            starts, ends = starts.tolist(), ends.tolist()
+        yield from zip(batch, starts, ends)
+
+
+def with_timestamps(segments, batch_size=1024, separator='.'):
+    """Yield (start, end, *rest) with the leading millisecond fields formatted as strings."""
+    segments = iter(segments)
+    while True:
+        batch = list(islice(segments, batch_size))
+        if not batch:
+            return
+        starts = format_timestamps([s[0] for s in batch], separator)
+        ends = format_timestamps([s[1] for s in batch], separator)
+        for segment, start, end in zip(batch, starts, ends):
+            yield (start, end) + tuple(segment[2:])
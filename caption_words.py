@@ -0,0 +1,174 @@
+"""
+Word-level timestamps from YouTube auto-caption VTT files.
+
+Auto-captions carry the start time of every word inline, e.g.
+"नमस्कार<00:01:23.759><c> दोस्तों,</c><00:01:24.159><c> स्वागत</c>". The first
+word starts with the cue and every later word starts at the timestamp tag
+in front of it. WordTimeline keeps those timings in parallel arrays so time
+and word lookups are binary searches rather than scans over the lecture.
+"""
+import html
+import re
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+
+from caption_timestamps import ms_to_timestamp, timestamp_to_ms
+from parse_vtt import TAG_RE, iter_vtt_cues
+
+# Inline word timing tag, e.g. <00:01:23.759>
+INLINE_TIMESTAMP_RE = re.compile(r'<((?:\d+:)?\d{2}:\d{2}\.\d{3})>')
+
+
+class WordTimeline:
+    """
+    Parallel arrays of word start/end times (ms) and character offsets.
+
+    text holds every word joined by single spaces; offsets[k] is where word
+    k begins in it. starts is non-decreasing, which is what the bisect based
+    lookups rely on.
+    """
+
+    def __init__(self):
+        self.starts = array('q')
+        self.ends = array('q')
+        self.offsets = array('q')
+        self._parts = []
+        self._length = 0
+        self._text = None
+
+    def __len__(self):
+        return len(self.starts)
+
+    def append(self, start_ms, end_ms, word):
+        if self._length:
+            self._length += 1  # separating space
+        self.starts.append(start_ms)
+        self.ends.append(max(start_ms, end_ms))
+        self.offsets.append(self._length)
+        self._parts.append(word)
+        self._length += len(word)
+        self._text = None
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = ' '.join(self._parts)
+        return self._text
+
+    def word(self, k):
+        """Return (start_ms, end_ms, word) for word k."""
+        return self.starts[k], self.ends[k], self._parts[k]
+
+    def word_start(self, k):
+        """Return the start time of word k in milliseconds."""
+        return self.starts[k]
+
+    def word_at(self, t_ms):
+        """Return the index of the word being spoken at t_ms, or None in a pause."""
+        k = bisect_right(self.starts, t_ms) - 1
+        if k < 0 or t_ms >= self.ends[k]:
+            return None
+        return k
+
+    def word_at_offset(self, offset):
+        """Return the index of the word containing character offset in text."""
+        return max(bisect_right(self.offsets, offset) - 1, 0)
+
+    def words_between(self, start_ms, end_ms):
+        """Return the range of word indices that start within [start_ms, end_ms)."""
+        return range(bisect_left(self.starts, start_ms), bisect_left(self.starts, end_ms))
+
+    def text_between(self, start_ms, end_ms):
+        """Return the words spoken within [start_ms, end_ms) as a single string."""
+        return ' '.join(self._parts[k] for k in self.words_between(start_ms, end_ms))
+
+
+def _words(text):
+    return html.unescape(TAG_RE.sub('', text)).split()
+
+
+def parse_timed_line(line, cue_start_ms, cue_end_ms):
+    """
+    Split a payload line with inline timestamps into (start_ms, end_ms, word).
+
+    Returns an empty list for lines without inline timing, which in the
+    rolling layout are usually carry-over copies of words already timed
+    earlier (see parse_untimed_line for the exception).
+    """
+    pieces = INLINE_TIMESTAMP_RE.split(line)
+    if len(pieces) == 1:
+        return []
+
+    timed = []
+    start = cue_start_ms
+    for i in range(0, len(pieces), 2):
+        if i:
+            start = timestamp_to_ms(pieces[i - 1])
+        for word in _words(pieces[i]):
+            timed.append([start, None, word])
+
+    # Each word ends where the next one starts; the last ends with the cue
+    for k in range(len(timed)):
+        timed[k][1] = timed[k + 1][0] if k + 1 < len(timed) else cue_end_ms
+    return timed
+
+
+def parse_untimed_line(line, cue_start_ms, cue_end_ms):
+    """
+    Split a payload line without inline timestamps into (start_ms, end_ms, word),
+    spreading the words evenly over the cue.
+
+    YouTube leaves out the tags when a cue adds a single word (e.g. "नहीं?"),
+    so such a line is new text even though it carries no timing.
+    """
+    words = _words(line)
+    step = (cue_end_ms - cue_start_ms) / len(words) if words else 0
+    return [[cue_start_ms + round(k * step), cue_start_ms + round((k + 1) * step), word]
+            for k, word in enumerate(words)]
+
+
+def extract_words(vtt_file):
+    """Stream a VTT file and build its WordTimeline."""
+    timeline = WordTimeline()
+    last_start = 0
+    previous_line = None  # text of the previous cue's last line
+    for start, end, payload in iter_vtt_cues(vtt_file):
+        cue_start, cue_end = timestamp_to_ms(start), timestamp_to_ms(end)
+        lines = [line for line in payload if line.strip()]
+        if not lines:
+            continue
+        timed = []
+        for line in lines:
+            timed.extend(parse_timed_line(line, cue_start, cue_end))
+        last_line = _words(lines[-1])
+        # An untagged last line is new text unless it repeats the previous cue's last line
+        if not INLINE_TIMESTAMP_RE.search(lines[-1]) and last_line != previous_line:
+            timed.extend(parse_untimed_line(lines[-1], cue_start, cue_end))
+        previous_line = last_line
+
+        for word_start, word_end, word in timed:
+            # Keep starts sorted even if a cue overlaps the previous one
+            word_start = max(word_start, last_start)
+            timeline.append(word_start, word_end, word)
+            last_start = word_start
+    return timeline
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python caption_words.py <path_to_vtt_file> [seconds]")
+        sys.exit(1)
+
+    timeline = extract_words(sys.argv[1])
+    print(f"Extracted {len(timeline)} timed words")
+
+    if len(sys.argv) > 2:
+        t_ms = round(float(sys.argv[2]) * 1000)
+        k = timeline.word_at(t_ms)
+        if k is None:
+            print(f"No word is being spoken at {ms_to_timestamp(t_ms)}")
+        else:
+            start, end, word = timeline.word(k)
+            print(f"Word {k} at {ms_to_timestamp(t_ms)}: {word} [{ms_to_timestamp(start)} --> {ms_to_timestamp(end)}]")
+            print(f"Context: {timeline.text_between(t_ms - 5000, t_ms + 5000)}")
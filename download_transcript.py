@@ -1,79 +1,55 @@
-import yt_dlp
-import json
 import sys
 
-def download_transcript(video_url, language='hi'):
-    ydl_opts = {
-        'skip_download': True,
-        'writesubtitles': True,
-        'writeautomaticsub': True,
-        'subtitleslangs': [language],
-        'subtitlesformat': 'vtt',
-        'quiet': True
-    }
-    
+from caption_timestamps import ms_to_timestamp
+from ytdlp_subtitles import available_languages, extract_info, fetch_subtitles, get_ydl
+
+
+def download_transcript(video_url, language='hi', ydl=None):
+    """
+    Fetch and preview subtitles for one video with a single yt-dlp extraction.
+
+    The subtitle is read into memory and decoded there; nothing is written
+    to disk. Pass ydl to reuse one YoutubeDL across many videos. Returns the
+    fetch_subtitles() result, or None.
+    """
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # Get video info
-            info = ydl.extract_info(video_url, download=False)
-            
-            if 'subtitles' not in info and 'automatic_captions' not in info:
-                print("No subtitles or captions available for this video.")
-                return
-                
-            # Try to get manual subtitles first
-            if 'subtitles' and language in info['subtitles']:
-                print("Found manual subtitles:")
-                subtitles = info['subtitles'][language]
-            # Fall back to automatic captions
-            elif 'automatic_captions' and language in info['automatic_captions']:
-                print("Found automatic captions:")
-                subtitles = info['automatic_captions'][language]
-            else:
-                print(f"No {language} subtitles or captions available.")
-                # Show available languages
-                if 'automatic_captions' in info:
-                    print("\nAvailable automatic caption languages:")
-                    for lang in info['automatic_captions'].keys():
-                        print(f"- {lang}")
-                return
-            
-            # Download the first available subtitle format
-            if subtitles:
-                subtitle_url = subtitles[0].get('url')
-                if subtitle_url:
-                    print(f"\nDownloading {language} subtitles...")
-                    ydl.download([f"{video_url} --sub-lang {language}"])
-                    print("\nSubtitles downloaded successfully!")
-                    
-                    # Try to read and display the subtitles
-                    try:
-                        import webvtt
-                        import os
-                        safe_video_id = info['id'].replace('-', '_')
-                        vtt_file = f"{safe_video_id}_{language}.vtt"
-                        # Rename the downloaded file if it exists with the original ID
-                        if os.path.exists(f"{info['id']}.{language}.vtt"):
-                            os.rename(f"{info['id']}.{language}.vtt", vtt_file)
-                        elif os.path.exists(f"{info['id']}.vtt"):
-                            os.rename(f"{info['id']}.vtt", vtt_file)
-                        captions = webvtt.read(vtt_file)
-                        
-                        print("\nTranscript Preview:")
-                        print("-" * 50)
-                        for i, caption in enumerate(captions[:20]):  # Show first 20 captions
-                            print(f"{i+1}. [{caption.start} --> {caption.end}] {caption.text}")
-                        print("\n... (more captions available in the downloaded file)")
-                        
-                    except ImportError:
-                        print("\nInstall 'webvtt-py' to display the transcript content:")
-                        print("pip install webvtt-py")
-                    except Exception as e:
-                        print(f"\nCould not parse VTT file: {str(e)}")
-                        print(f"You can find the downloaded subtitles in: {vtt_file}")
-                
+        ydl = ydl or get_ydl()
+        info = extract_info(video_url, ydl)
+
+        if not info.get('subtitles') and not info.get('automatic_captions'):
+            print("No subtitles or captions available for this video.")
+            return None
+
+        result = fetch_subtitles(video_url, language, info=info, ydl=ydl)
+        if result is None:
+            print(f"No {language} subtitles or captions available.")
+            manual, automatic = available_languages(info)
+            if manual:
+                print("\nAvailable subtitle languages:")
+                for lang in manual:
+                    print(f"- {lang}")
+            if automatic:
+                print("\nAvailable automatic caption languages:")
+                for lang in automatic:
+                    print(f"- {lang}")
+            return None
+
+        kind = "automatic captions" if result['is_generated'] else "manual subtitles"
+        print(f"Found {kind} ({result['ext']}):")
+
+        segments = result['segments']
+        print("\nTranscript Preview:")
+        print("-" * 50)
+        for i, (start, end, text) in enumerate(segments[:20]):  # Show first 20 captions
+            print(f"{i+1}. [{ms_to_timestamp(start)} --> {ms_to_timestamp(end)}] {text}")
+        if len(segments) > 20:
+            print(f"\n... and {len(segments) - 20} more captions")
+        return result
+
     except Exception as e:
         print(f"Error: {str(e)}")
+        return None
+
 
 if __name__ == "__main__":
     video_url = sys.argv[1] if len(sys.argv) > 1 else "https://www.youtube.com/watch?v=-PAD2MYt0B0"
@@ -1,49 +1,21 @@
-from youtube_transcript_api import YouTubeTranscriptApi
+from transcript_languages import fetch_preferred_transcript
 import sys
 
 def get_transcript(video_id, language='hi'):
     try:
-        # Try to get the transcript in the specified language
-        try:
-            print(f"Attempting to fetch {language} transcript...")
-            transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=[language])
-            print(f"Successfully fetched {language} transcript!")
-            return transcript
-        except Exception as e:
-            print(f"Error fetching {language} transcript: {str(e)}")
-            
-            # Try English if the requested language fails
-            if language != 'en':
-                try:
-                    print("\nAttempting to fetch English transcript...")
-                    transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=['en'])
-                    print("Successfully fetched English transcript!")
-                    return transcript
-                except Exception as e2:
-                    print(f"Error fetching English transcript: {str(e2)}")
-            
-            # If both fail, try to list available transcripts
-            try:
-                print("\nAttempting to list available transcripts...")
-                transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-                
-                print("\nAvailable transcripts:")
-                for transcript in transcript_list:
-                    print(f"- {transcript.language} ({transcript.language_code}): {transcript}")
-                    
-                    # Try to fetch the first available transcript
-                    try:
-                        print(f"\nTrying to fetch {transcript.language_code} transcript...")
-                        transcript_data = transcript.fetch()
-                        print(f"Successfully fetched {transcript.language_code} transcript!")
-                        return transcript_data
-                    except Exception as e3:
-                        print(f"Error fetching {transcript.language_code} transcript: {str(e3)}")
-                        continue
-                        
-            except Exception as e4:
-                print(f"Error listing transcripts: {str(e4)}")
-                
+        # List the tracks once and pick the best one locally, so a missing
+        # language no longer costs extra round trips
+        preferences = [language] if language == 'en' else [language, 'en']
+        print(f"Attempting to fetch {language} transcript...")
+        result = fetch_preferred_transcript(video_id, preferences)
+        if result is None:
+            print("No transcripts available for this video.")
+            return None
+        
+        kind = 'auto-generated' if result['is_generated'] else 'manual'
+        print(f"Successfully fetched {result['language_name']} ({result['language']}, {kind}) transcript!")
+        return result['entries']
+        
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
         
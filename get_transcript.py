@@ -1,4 +1,4 @@
-from youtube_transcript_api import YouTubeTranscriptApi
+from transcript_languages import fetch_preferred_transcript, list_tracks
 import json
 import sys
 
@@ -7,7 +7,7 @@ def get_transcript(video_id):
         print(f"Fetching transcript for video: {video_id}")
         
         # First, list all available transcripts
-        transcripts = YouTubeTranscriptApi.list_transcripts(video_id)
+        transcripts = list_tracks(video_id)
         
         print("\nAvailable transcripts:")
         for transcript in transcripts:
@@ -15,7 +15,10 @@ def get_transcript(video_id):
         
         # Try to get Hindi or English transcript
         try:
-            transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=['hi', 'en'])
+            result = fetch_preferred_transcript(video_id, ['hi', 'en'], allow_any=False)
+            if result is None:
+                raise ValueError("No Hindi or English transcript listed")
+            transcript = result['entries']
             print("\nTranscript (Hindi/English):")
             print("-" * 50)
             for i, entry in enumerate(transcript, 1):
@@ -27,7 +30,10 @@ def get_transcript(video_id):
             
             # Try to get any available transcript
             try:
-                transcript = YouTubeTranscriptApi.get_transcript(video_id)
+                result = fetch_preferred_transcript(video_id, [], allow_any=True)
+                if result is None:
+                    raise ValueError("No transcripts listed")
+                transcript = result['entries']
                 print("\nTranscript (any language):")
                 print("-" * 50)
                 for i, entry in enumerate(transcript, 1):
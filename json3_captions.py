@@ -0,0 +1,108 @@
+"""
+Decode YouTube json3 caption files straight into segments.
+
+A json3 body is {"events": [{"tStartMs", "dDurationMs", "segs": [{"utf8",
+"tOffsetMs"}, ...]}, ...]}. iter_json3_events pulls the events out of the
+body one at a time as chunks arrive (a response stream, a file or a
+string), so the whole JSON tree is never built. decode_json3 turns each
+event into a final segment with its text joined, skipping empty "\\n"
+events and window-append events, and optionally keeps per-word offsets.
+"""
+import codecs
+import json
+import re
+
+EVENTS_RE = re.compile(r'"events"\s*:\s*\[')
+CHUNK_SIZE = 64 * 1024
+_SEPARATORS = ' \t\r\n,'
+
+
+def _iter_text_chunks(source, chunk_size=CHUNK_SIZE):
+    """Yield decoded text from bytes, str, a readable file or an iterable of chunks."""
+    if isinstance(source, str):
+        yield source
+        return
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield bytes(source).decode('utf-8')
+        return
+    if hasattr(source, 'read'):
+        reader = source
+        source = iter(lambda: reader.read(chunk_size), reader.read(0))
+
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for chunk in source:
+        text = chunk if isinstance(chunk, str) else decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def iter_json3_events(source, chunk_size=CHUNK_SIZE):
+    """Yield the objects of the top-level "events" array incrementally."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    in_events = False
+    for chunk in _iter_text_chunks(source, chunk_size):
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+        if not in_events:
+            match = EVENTS_RE.search(buffer)
+            if not match:
+                # Keep enough to catch the key split across two chunks
+                pos = max(0, len(buffer) - 32)
+                continue
+            pos = match.end()
+            in_events = True
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in _SEPARATORS:
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == ']':
+                return
+            try:
+                event, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # event continues in the next chunk
+            yield event
+
+    if in_events:
+        raise ValueError("Truncated json3 caption body: events array is not closed")
+
+
+def decode_json3(source, word_offsets=False, chunk_size=CHUNK_SIZE):
+    """
+    Yield caption segments ({'start_ms', 'duration_ms', 'text'}) from a json3 body.
+
+    With word_offsets=True each segment also carries 'words', a list of
+    (start_ms, word) pairs built from the segs' tOffsetMs.
+    """
+    for event in iter_json3_events(source, chunk_size):
+        segs = event.get('segs')
+        if not segs or event.get('aAppend'):
+            continue
+        text = ' '.join(''.join(seg.get('utf8', '') for seg in segs).split())
+        if not text:
+            continue
+
+        start = event.get('tStartMs', 0)
+        segment = {'start_ms': start, 'duration_ms': event.get('dDurationMs', 0), 'text': text}
+        if word_offsets:
+            segment['words'] = [
+                (start + seg.get('tOffsetMs', 0), seg['utf8'].strip())
+                for seg in segs if seg.get('utf8', '').strip()
+            ]
+        yield segment
+
+
+def segments_to_entries(segments):
+    """Convert decoded segments to youtube_transcript_api entries (seconds)."""
+    return [
+        {'text': segment['text'], 'start': segment['start_ms'] / 1000, 'duration': segment['duration_ms'] / 1000}
+        for segment in segments
+    ]
@@ -0,0 +1,154 @@
+"""
+Expiry-aware cache of yt-dlp extraction results.
+
+A yt-dlp extraction costs seconds, and the googlevideo/timedtext URLs it
+returns carry an expire= timestamp that keeps them valid for hours. The
+trimmed info dict (title, duration, formats, subtitle tracks) is stored in
+SQLite until shortly before the earliest of those expiries, so retries,
+SupaData re-submits and subtitle fetches for the same video reuse one
+extraction. The database is shared between processes like the transcript
+cache.
+
+Set MEDIA_CACHE_PATH to move the database, or MEDIA_CACHE_DISABLE=1 to turn
+caching off.
+"""
+import json
+import os
+import re
+import time
+import zlib
+from urllib.parse import parse_qs, urlparse
+
+from sqlite_store import SQLiteStore
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'media_info.sqlite3')
+DEFAULT_TTL = 3600  # seconds, for info without any expiring URL
+SAFETY_MARGIN = 600  # stop handing out URLs this long before they expire
+
+INFO_KEYS = ('id', 'title', 'duration', 'channel', 'uploader', 'upload_date', 'webpage_url', 'language')
+FORMAT_KEYS = ('format_id', 'ext', 'url', 'protocol', 'acodec', 'vcodec', 'abr', 'tbr', 'asr', 'filesize')
+SUBTITLE_KEYS = ('ext', 'url', 'name')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    video_id TEXT PRIMARY KEY,
+    payload BLOB NOT NULL,
+    expires REAL NOT NULL,
+    created REAL NOT NULL
+);
+"""
+
+_PATH_EXPIRE_RE = re.compile(r'/expire/(\d+)')
+
+
+def url_expiry(url):
+    """Return the expire= timestamp of a signed media URL (query or path form), or None."""
+    if not url:
+        return None
+    values = parse_qs(urlparse(url).query).get('expire')
+    if values and values[0].isdigit():
+        return float(values[0])
+    match = _PATH_EXPIRE_RE.search(url)
+    return float(match.group(1)) if match else None
+
+
+def trim_info(info):
+    """Keep the parts of a yt-dlp info dict other consumers need."""
+    trimmed = {key: info.get(key) for key in INFO_KEYS if info.get(key) is not None}
+    trimmed['formats'] = [
+        {key: fmt.get(key) for key in FORMAT_KEYS if fmt.get(key) is not None}
+        for fmt in info.get('formats') or [] if fmt.get('url')
+    ]
+    if info.get('url') and not trimmed['formats']:
+        trimmed['formats'] = [{key: info.get(key) for key in FORMAT_KEYS if info.get(key) is not None}]
+    for kind in ('subtitles', 'automatic_captions'):
+        trimmed[kind] = {
+            language: [{key: fmt.get(key) for key in SUBTITLE_KEYS if fmt.get(key) is not None} for fmt in formats]
+            for language, formats in (info.get(kind) or {}).items()
+        }
+    return trimmed
+
+
+def info_expiry(info, default_ttl=DEFAULT_TTL, now=None):
+    """Return when info stops being usable: the earliest URL expiry, else now + default_ttl."""
+    urls = [fmt.get('url') for fmt in info.get('formats') or []]
+    for kind in ('subtitles', 'automatic_captions'):
+        for formats in (info.get(kind) or {}).values():
+            urls.extend(fmt.get('url') for fmt in formats)
+    expiries = [e for e in map(url_expiry, urls) if e is not None]
+    return min(expiries) if expiries else (now or time.time()) + default_ttl
+
+
+def best_audio_url(info):
+    """Return the URL of the best audio stream in info, preferring audio-only formats."""
+    formats = [fmt for fmt in info.get('formats') or [] if fmt.get('url') and fmt.get('acodec') not in (None, 'none')]
+    audio_only = [fmt for fmt in formats if fmt.get('vcodec') == 'none']
+    candidates = audio_only or formats
+    if not candidates:
+        return info.get('url')
+    return max(candidates, key=lambda fmt: fmt.get('abr') or fmt.get('tbr') or 0)['url']
+
+
+class MediaInfoCache(SQLiteStore):
+    """SQLite-backed cache of trimmed yt-dlp info dicts, valid until their URLs expire."""
+
+    SCHEMA = SCHEMA
+    TABLE = 'media'
+    COUNTERS = ('hits', 'misses', 'stores', 'expired')
+    ENV_PREFIX = 'MEDIA_CACHE'
+    DEFAULT_PATH = DEFAULT_PATH
+
+    def __init__(self, path=DEFAULT_PATH, margin=SAFETY_MARGIN, default_ttl=DEFAULT_TTL):
+        self.margin = margin
+        self.default_ttl = default_ttl
+        super().__init__(path)
+
+    def get(self, video_id):
+        """Return the cached info dict, or None if missing or about to expire."""
+        conn = self._connect()
+        row = conn.execute("SELECT payload, expires FROM media WHERE video_id = ?", (video_id,)).fetchone()
+        if row is None:
+            self._count(conn, 'misses')
+            return None
+        payload, expires = row
+        if expires - self.margin <= time.time():
+            conn.execute("DELETE FROM media WHERE video_id = ?", (video_id,))
+            self._count(conn, 'expired')
+            self._count(conn, 'misses')
+            return None
+        self._count(conn, 'hits')
+        return json.loads(zlib.decompress(payload))
+
+    def put(self, video_id, info):
+        """Trim and store an info dict; returns the trimmed dict."""
+        conn = self._connect()
+        now = time.time()
+        trimmed = trim_info(info)
+        payload = zlib.compress(json.dumps(trimmed, ensure_ascii=False).encode('utf-8'), 6)
+        conn.execute("INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?)",
+                     (video_id, payload, info_expiry(trimmed, self.default_ttl, now), now))
+        self._count(conn, 'stores')
+        return trimmed
+
+    def forget(self, video_id):
+        """Drop a video, e.g. after its URL was rejected before the expiry."""
+        self._connect().execute("DELETE FROM media WHERE video_id = ?", (video_id,))
+
+    def get_or_extract(self, video_id, extract):
+        """Return cached info for video_id, or call extract() and cache the result."""
+        info = self.get(video_id)
+        if info is None:
+            info = self.put(video_id, extract())
+        return info
+
+    def purge_expired(self):
+        """Delete entries past their expiry and return how many were removed."""
+        conn = self._connect()
+        removed = conn.execute("DELETE FROM media WHERE expires - ? <= ?", (self.margin, time.time())).rowcount
+        self._count(conn, 'expired', removed)
+        return removed
+
+
+def default_cache():
+    """Return the process-wide cache, or None if MEDIA_CACHE_DISABLE is set."""
+    return MediaInfoCache.default()
@@ -1,45 +1,106 @@
 from http.server import BaseHTTPRequestHandler
 from youtube_transcript_api import YouTubeTranscriptApi
 import json
+import os
+import sys
+import time
+
+# The persistent transcript cache lives in the repository root. It is
+# available under `netlify dev`; deployed bundles only contain this
+# directory, so there the function runs without it.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+try:
+    from transcript_cache import default_cache
+except ImportError:
+    default_cache = None
+
+# Track listings survive between invocations of a warm function instance
+LISTING_TTL = 300  # seconds
+_listings = {}
+
+def _list_tracks(video_id):
+    """List the caption tracks of a video once, reusing a recent listing"""
+    now = time.monotonic()
+    cached = _listings.get(video_id)
+    if cached and now - cached[0] < LISTING_TTL:
+        return cached[1]
+    tracks = list(YouTubeTranscriptApi.list_transcripts(video_id))
+    if len(_listings) >= 128:
+        _listings.clear()
+    _listings[video_id] = (now, tracks)
+    return tracks
+
+def _choose_track(tracks, languages):
+    """Pick a track locally: preferred languages in order, manual before auto-generated"""
+    by_kind = sorted(tracks, key=lambda track: bool(track.is_generated))
+    for language in languages:
+        for track in by_kind:
+            if track.language_code == language:
+                return track, True
+    return (by_kind[0], False) if by_kind else (None, False)
+
+def _open_cache():
+    """Return the shared transcript cache, or None if it is unavailable (e.g. a read-only filesystem)"""
+    if not default_cache:
+        return None
+    try:
+        return default_cache()
+    except Exception as e:
+        print(f"Transcript cache unavailable, fetching uncached: {e}")
+        return None
+
+def _response(entries, language, languages):
+    """Build the API response from transcript entries"""
+    result = {
+        'success': True,
+        'transcript': ' '.join([entry['text'] for entry in entries]),
+        'language': language if language in languages else 'auto'
+    }
+    if language not in languages:
+        result['message'] = 'Fell back to auto-detected language'
+    return result
 
 def get_transcript(video_id, languages=None):
     """
-    Fetch transcript for a YouTube video with language fallback
+    Fetch transcript for a YouTube video with language fallback.
+    The track listing is fetched once and the fallback is resolved locally,
+    so every request makes exactly one caption fetch.
     """
     if languages is None:
         languages = ['hi', 'en']  # Default to Hindi first, then English
+    requested = 'netlify:' + ','.join(languages)
     
     try:
-        # Try to get transcript with specified languages
-        transcript = YouTubeTranscriptApi.get_transcript(
-            video_id,
-            languages=languages
-        )
-        return {
-            'success': True,
-            'transcript': ' '.join([entry['text'] for entry in transcript]),
-            'language': languages[0] if transcript else 'unknown'
-        }
-    except Exception as e:
-        # If primary language fails, try English
-        if 'hi' in languages and 'en' not in languages:
-            return get_transcript(video_id, ['en'])
-        # If English fails, try any available language
-        elif languages == ['en']:
+        cache = _open_cache()
+        if cache:
+            try:
+                cached = cache.get_requested(video_id, requested)
+            except Exception as e:
+                print(f"Transcript cache lookup failed: {e}")
+                cache, cached = None, None
+            if cached is not None:
+                return _response(cached['entries'], cached['language'], languages)
+        
+        track, _ = _choose_track(_list_tracks(video_id), languages)
+        if track is None:
+            return {
+                'success': False,
+                'error': 'No caption tracks listed',
+                'message': 'No transcript available for this video'
+            }
+        transcript = list(track.fetch())
+        if cache:
             try:
-                transcript = YouTubeTranscriptApi.get_transcript(video_id)
-                return {
-                    'success': True,
-                    'transcript': ' '.join([entry['text'] for entry in transcript]),
-                    'language': 'auto',
-                    'message': 'Fell back to auto-detected language'
-                }
+                cache.put(video_id, {
+                    'language': track.language_code,
+                    'language_name': track.language,
+                    'is_generated': track.is_generated,
+                    'entries': transcript
+                }, requested)
             except Exception as e:
-                return {
-                    'success': False,
-                    'error': str(e),
-                    'message': 'No transcript available for this video'
-                }
+                print(f"Could not cache transcript: {e}")
+        return _response(transcript, track.language_code, languages)
+    except Exception as e:
         return {
             'success': False,
             'error': str(e),
@@ -48,11 +109,6 @@ def get_transcript(video_id, languages=None):
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
         # Get video_id from query parameters
         from urllib.parse import urlparse, parse_qs
         query = urlparse(self.path).query
@@ -60,14 +116,18 @@ class handler(BaseHTTPRequestHandler):
         video_id = params.get('video_id', [''])[0]
         
         if not video_id:
-            self.wfile.write(json.dumps({
+            result = {
                 'success': False,
                 'error': 'video_id parameter is required'
-            }).encode('utf-8'))
-            return
-            
-        # Get the transcript
-        result = get_transcript(video_id)
+            }
+        else:
+            # Get the transcript before any header is sent
+            result = get_transcript(video_id)
+        
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
         self.wfile.write(json.dumps(result).encode('utf-8'))
         return
     
@@ -1,80 +1,235 @@
-import webvtt
+import html
+import re
 import sys
 import os
+from itertools import islice
+
+from caption_timestamps import normalize_timestamp, with_ms
+from transcript_export import FORMATS, export_transcript, output_paths
+
+# Matches the cue timing line, e.g. "00:01:23.119 --> 00:01:25.190 align:start position:0%"
+TIMING_RE = re.compile(r'^\s*(\S+)\s+-->\s+(\S+)')
+# Inline cue markup: <c>, </c>, <i>, <00:01:23.759>, <v Speaker>, ...
+TAG_RE = re.compile(r'<[^>]*>')
+# Blocks that can appear between cues and carry no caption text
+NON_CUE_BLOCKS = ('NOTE', 'STYLE', 'REGION')
+
+
+def clean_cue_text(lines):
+    """Strip inline tags and join the payload lines of a cue into a single line."""
+    text_lines = (html.unescape(TAG_RE.sub('', line)).strip() for line in lines)
+    return ' '.join(line for line in text_lines if line)
+
+
+def iter_vtt_cues(vtt_file):
+    """
+    Read a VTT file incrementally and yield (start, end, payload_lines) per cue.
+
+    vtt_file is a path or an open text stream (e.g. io.StringIO over a
+    subtitle downloaded into memory). Only the lines of the current cue are
+    held in memory, so memory use does not grow with the size of the file.
+    A file opened here is closed as soon as the generator is exhausted or
+    closed.
+    """
+    if hasattr(vtt_file, 'readline'):
+        yield from _iter_stream_cues(vtt_file, getattr(vtt_file, 'name', '<stream>'))
+        return
+    with open(vtt_file, 'r', encoding='utf-8-sig') as f:
+        yield from _iter_stream_cues(f, vtt_file)
+
+
+def _iter_stream_cues(f, vtt_file):
+    header = f.readline().lstrip('\ufeff')
+    if not header.startswith('WEBVTT'):
+        raise ValueError(f"'{vtt_file}' is not a WebVTT file (missing WEBVTT header)")
+
+    # Skip the header block ("Kind: captions", "Language: hi", ...)
+    for line in f:
+        if not line.rstrip('\r\n'):
+            break
+
+    timing = None
+    payload = []
+    skipping = False
+    for line in f:
+        line = line.rstrip('\r\n')
+
+        # An empty line terminates the current block
+        if not line:
+            if timing:
+                yield timing[0], timing[1], payload
+            timing = None
+            payload = []
+            skipping = False
+            continue
+
+        if skipping:
+            continue
+
+        if timing is None:
+            match = TIMING_RE.match(line) if '-->' in line else None
+            if match:
+                timing = (normalize_timestamp(match.group(1)), normalize_timestamp(match.group(2)))
+            elif line.startswith(NON_CUE_BLOCKS):
+                skipping = True
+            # Anything else before the timing line is a cue identifier
+            continue
+
+        payload.append(line)
+
+    if timing:
+        yield timing[0], timing[1], payload
+
+
+def iter_captions(vtt_file, include_ms=False):
+    """
+    Yield caption records ({'index', 'start', 'end', 'text'}) one at a time.
+
+    Cues with no text are skipped but still counted, so 'index' is the
+    position of the cue in the file. With include_ms=True each record also
+    gets integer 'start_ms'/'end_ms', converted a batch of cues at a time.
+    """
+    captions = _iter_caption_records(vtt_file)
+    if not include_ms:
+        yield from captions
+        return
+    for caption, start_ms, end_ms in with_ms(captions):
+        caption['start_ms'] = start_ms
+        caption['end_ms'] = end_ms
+        yield caption
+
+
+def _iter_caption_records(vtt_file):
+    for i, (start, end, payload) in enumerate(iter_vtt_cues(vtt_file)):
+        text = clean_cue_text(payload)
+        if text:  # Only include non-empty captions
+            yield {
+                'index': i + 1,
+                'start': start,
+                'end': end,
+                'text': text
+            }
+
+
+def parse_vtt_file(vtt_file, lazy=False):
+    """
+    Parse a VTT file into caption records.
+
+    With lazy=True a generator is returned and the file is read only as far
+    as the caller iterates; otherwise the captions are returned as a list.
+    """
+    # Check if file exists
+    if not os.path.exists(vtt_file):
+        print(f"Error: File '{vtt_file}' not found.")
+        return None
+
+    if lazy:
+        return iter_captions(vtt_file)
 
-def parse_vtt_file(vtt_file):
     try:
-        # Check if file exists
-        if not os.path.exists(vtt_file):
-            print(f"Error: File '{vtt_file}' not found.")
-            return None
-            
-        # Parse the VTT file
-        captions = webvtt.read(vtt_file)
-        
-        # Extract and format the captions
-        formatted_captions = []
-        for i, caption in enumerate(captions):
-            # Clean up the text (remove extra whitespace, newlines, etc.)
-            text = ' '.join(line.strip() for line in caption.text.splitlines() if line.strip())
-            if text:  # Only include non-empty captions
-                formatted_captions.append({
-                    'index': i + 1,
-                    'start': caption.start,
-                    'end': caption.end,
-                    'text': text
-                })
-        
-        return formatted_captions
-        
+        return list(iter_captions(vtt_file))
     except Exception as e:
         print(f"Error parsing VTT file: {str(e)}")
         return None
 
+
 def print_transcript(captions, max_lines=20):
-    if not captions:
-        print("No captions to display.")
-        return
-        
-    print(f"\nTranscript ({len(captions)} entries):")
+    """
+    Print the first max_lines captions.
+
+    Accepts a list or any iterable of captions; an iterator is consumed only
+    as far as needed for the preview.
+    """
+    if isinstance(captions, list):
+        total = len(captions)
+        if not total:
+            print("No captions to display.")
+            return
+        preview = captions[:max_lines]
+        print(f"\nTranscript ({total} entries):")
+    else:
+        captions = iter(captions)
+        preview = list(islice(captions, max_lines))
+        if not preview:
+            print("No captions to display.")
+            return
+        # Peek one caption ahead to know whether the preview is complete
+        has_more = next(captions, None) is not None
+        print(f"\nTranscript (first {len(preview)} entries):")
     print("=" * 80)
-    
+
     # Print the first few lines
-    for i, caption in enumerate(captions[:max_lines]):
+    for caption in preview:
         print(f"{caption['index']:4d}. [{caption['start']} --> {caption['end']}] {caption['text']}")
-    
+
     # If there are more lines, show a summary
-    if len(captions) > max_lines:
-        print(f"\n... and {len(captions) - max_lines} more entries")
-    
+    if isinstance(captions, list):
+        if total > max_lines:
+            print(f"\n... and {total - max_lines} more entries")
+    elif has_more:
+        print("\n... and more entries")
+
     print("=" * 80)
 
+
+def write_transcript_txt(captions, output_file, source_name):
+    """Stream captions to a plain-text transcript file and return how many were written."""
+    return export_transcript(captions, {'txt': output_file}, source_name)
+
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python parse_vtt.py <path_to_vtt_file> [max_lines]")
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    keep_rolling = '--raw' in sys.argv
+    formats = ['txt']
+    for arg in sys.argv[1:]:
+        if arg.startswith('--formats='):
+            formats = [fmt.strip() for fmt in arg.split('=', 1)[1].split(',') if fmt.strip()]
+
+    if not args or set(formats) - set(FORMATS):
+        print("Usage: python parse_vtt.py <path_to_vtt_file> [max_lines] [--raw] [--formats=txt,srt,vtt,jsonl,json]")
         print("Example: python parse_vtt.py 'Current Affairs Today ｜ 23 July Current Affairs 2025 ｜ Daily Current Affairs By Ashutosh Sir [-PAD2MYt0B0].hi.vtt' 20")
+        print("  --raw      keep every rolling auto-caption cue instead of collapsing repeats")
+        print("  --formats  comma-separated output formats, written in a single pass (default: txt)")
         sys.exit(1)
-    
-    vtt_file = sys.argv[1]
-    max_lines = int(sys.argv[2]) if len(sys.argv) > 2 else 20
-    
+
+    vtt_file = args[0]
+    max_lines = int(args[1]) if len(args) > 1 else 20
+
+    def load_captions(stats=None):
+        captions = iter_captions(vtt_file)
+        if keep_rolling:
+            return captions
+        from caption_dedupe import collapse_captions
+        return collapse_captions(captions, stats)
+
     print(f"Parsing VTT file: {vtt_file}")
-    captions = parse_vtt_file(vtt_file)
-    
-    if captions:
+    if not os.path.exists(vtt_file):
+        print(f"Error: File '{vtt_file}' not found.")
+        sys.exit(1)
+
+    captions = load_captions()
+    try:
         print_transcript(captions, max_lines)
-        
-        # Save the formatted transcript to a text file
-        output_file = os.path.splitext(vtt_file)[0] + ".txt"
-        try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(f"Transcript from: {os.path.basename(vtt_file)}\n")
-                f.write("=" * 80 + "\n\n")
-                
-                for caption in captions:
-                    f.write(f"[{caption['start']} --> {caption['end']}]\n")
-                    f.write(f"{caption['text']}\n\n")
-                    
-            print(f"\nTranscript saved to: {output_file}")
-        except Exception as e:
-            print(f"Error saving transcript to file: {str(e)}")
+    except Exception as e:
+        print(f"Error parsing VTT file: {str(e)}")
+        sys.exit(1)
+    finally:
+        captions.close()
+
+    # Export the transcript in every requested format, re-reading the VTT
+    # as a stream so the full caption list is never held in memory
+    base_path = os.path.splitext(vtt_file)[0]
+    outputs = output_paths(base_path, formats)
+    if 'vtt' in outputs:
+        outputs['vtt'] = base_path + '.clean.vtt'  # never overwrite the source file
+    try:
+        from caption_dedupe import CollapseStats
+        stats = CollapseStats()
+        count = export_transcript(load_captions(stats), outputs, os.path.basename(vtt_file))
+        print(f"\nTranscript saved ({count} entries) to:")
+        for output_file in outputs.values():
+            print(f"- {output_file}")
+        if not keep_rolling:
+            print(f"Rolling captions collapsed: {stats}")
+    except Exception as e:
+        print(f"Error saving transcript to file: {str(e)}")
@@ -1,6 +1,8 @@
 import os
+import re
 import sys
 from supadata_client import SupaDataClient
+from transcript_export import export_transcript, output_paths
 import json
 from urllib.parse import urlparse, parse_qs
 
@@ -19,42 +21,44 @@ def extract_video_id(url):
             return match.group(1)
     return url  # If no match, return the input as is (might already be an ID)
 
-def get_youtube_audio_url(video_id):
+def get_video_info(video_id):
     """
-    Get the audio stream URL for a YouTube video using yt-dlp
+    Get trimmed yt-dlp metadata (title, duration, formats, subtitles) for a video.
+
+    Served from the shared media info cache until the stream URLs expire,
+    so retries and re-submits don't extract the video again.
     """
-    import yt_dlp
-    
-    ydl_opts = {
-        'format': 'bestaudio/best',
-        'quiet': True,
-        'no_warnings': True,
-        'extract_flat': True,
-    }
-    
+    from ytdlp_subtitles import extract_info
+
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(f'https://www.youtube.com/watch?v={video_id}', download=False)
-            if 'url' in info:
-                return info['url']
-            
-            # If direct URL not available, try to find the best audio stream
-            for format in info.get('formats', []):
-                if format.get('acodec') != 'none' and format.get('url'):
-                    return format['url']
-                    
+        return extract_info(video_id)
     except Exception as e:
-        print(f"Error getting YouTube audio URL: {str(e)}")
-    
-    return None
+        print(f"Error extracting YouTube video info: {str(e)}")
+        return None
+
+def get_youtube_audio_url(video_id):
+    """
+    Get the audio stream URL for a YouTube video using yt-dlp
+    """
+    from media_info_cache import best_audio_url
+
+    info = get_video_info(video_id)
+    return best_audio_url(info) if info else None
 
-def process_youtube_video(video_url, language="hi"):
+def process_youtube_video(video_url, language="hi", queue=None):
     """
     Process a YouTube video with SupaData API
+
+    The submission is recorded in the durable job queue (supadata_jobs), so
+    a completed video is returned from the queue, a submitted one is polled
+    again instead of being re-submitted, and a crash never loses the ID.
     """
+    from supadata_jobs import JobQueue, transcript_name
+
     # Initialize the SupaData client
     SESSION_ID = "sd_34c7eee019290004202c004c0e4a9c24"
     client = SupaDataClient(SESSION_ID)
+    queue = queue or JobQueue()
     
     # Extract video ID
     video_id = extract_video_id(video_url)
@@ -63,61 +67,98 @@ def process_youtube_video(video_url, language="hi"):
     
     print(f"Processing YouTube video: {video_id}")
     
-    # Get audio URL
-    print("Extracting audio URL...")
-    audio_url = get_youtube_audio_url(video_id)
-    if not audio_url:
-        return {"status": "error", "message": "Could not extract audio URL from YouTube video"}
-    
-    print(f"Audio URL: {audio_url[:100]}...")
-    
-    # Create transcript using SupaData
-    print(f"Creating transcript with language: {language}")
-    transcript_name = f"YouTube_{video_id}_{language}"
-    
-    result = client.create_transcript(
-        audio_url=audio_url,
-        language=language,
-        name=transcript_name,
-        metadata={
-            "source": "youtube",
-            "video_id": video_id,
-            "original_url": video_url
-        }
-    )
-    
-    if 'id' in result:
-        print(f"Successfully created transcript with ID: {result['id']}")
+    queue.enqueue(video_id, language)
+    queue.requeue(video_id, language)
+    if queue.get(video_id, language)['state'] == 'submitting':
+        queue.recover(client)
+    job = queue.get(video_id, language)
+    if job['state'] == 'completed':
+        print(f"Transcript {job['transcript_id']} already completed (from job queue)")
+        return {"status": "success", "transcript": job['transcript']}
+    
+    if job['state'] == 'submitted':
+        transcript_id, duration = job['transcript_id'], job['duration']
+        print(f"Resuming transcript {transcript_id} submitted earlier")
+    elif queue.claim(video_id, language):
+        # Get audio URL (the same cached info also supplies title and duration)
+        print("Extracting audio URL...")
+        from media_info_cache import best_audio_url
+        info = get_video_info(video_id) or {}
+        audio_url = best_audio_url(info)
+        if not audio_url:
+            queue.release(video_id, language, "Could not extract audio URL from YouTube video")
+            return {"status": "error", "message": "Could not extract audio URL from YouTube video"}
         
-        # Poll for transcript completion
-        print("Waiting for transcript to be processed...")
-        import time
-        max_attempts = 10
-        for attempt in range(max_attempts):
-            transcript = client.get_transcript(result['id'])
-            status = transcript.get('status', 'processing')
-            
-            print(f"Status: {status} (attempt {attempt + 1}/{max_attempts})")
-            
-            if status == 'completed':
-                print("\nTranscript completed successfully!")
-                return {"status": "success", "transcript": transcript}
-            elif status == 'failed':
-                return {"status": "error", "message": "Transcript processing failed"}
-                
-            time.sleep(5)  # Wait 5 seconds before checking again
+        print(f"Audio URL: {audio_url[:100]}...")
         
-        return {
-            "status": "timeout", 
-            "message": "Transcript processing is taking longer than expected",
-            "transcript_id": result['id']
-        }
+        # Create transcript using SupaData
+        print(f"Creating transcript with language: {language}")
+        result = client.create_transcript(
+            audio_url=audio_url,
+            language=language,
+            name=transcript_name(video_id, language),
+            metadata={
+                "source": "youtube",
+                "video_id": video_id,
+                "original_url": video_url,
+                "title": info.get('title'),
+                "duration": info.get('duration')
+            }
+        )
+        if 'id' not in result:
+            if result.get('never_sent'):
+                queue.release(video_id, language, result.get('message', 'Failed to create transcript'))
+            else:
+                # The transcript may exist anyway; recover() resolves the job by name later
+                queue.note(video_id, language, result.get('message', 'Failed to create transcript'))
+            return {"status": "error", "message": "Failed to create transcript", "details": result}
+        
+        transcript_id, duration = result['id'], info.get('duration')
+        queue.mark_submitted(video_id, language, transcript_id, duration)
+        print(f"Successfully created transcript with ID: {transcript_id}")
     else:
-        return {"status": "error", "message": "Failed to create transcript", "details": result}
+        return {"status": "error", "message": "This video is already being submitted by another process"}
+    
+    # Poll for transcript completion, backing off from a delay seeded by the duration
+    print("Waiting for transcript to be processed...")
+    import time
+    from supadata_poller import first_poll_delay, job_deadline, next_poll_delay
+    deadline = time.monotonic() + job_deadline(duration)
+    delay = first_poll_delay(duration)
+    attempt = 0
+    while True:
+        time.sleep(delay)
+        attempt += 1
+        transcript = client.get_transcript(transcript_id)
+        status = transcript.get('status', 'processing')
+        
+        print(f"Status: {status} (check {attempt})")
+        
+        if status == 'completed':
+            print("\nTranscript completed successfully!")
+            queue.mark_completed(video_id, language, transcript)
+            return {"status": "success", "transcript": transcript}
+        elif status == 'failed':
+            queue.mark_failed(video_id, language, "Transcript processing failed")
+            return {"status": "error", "message": "Transcript processing failed"}
+        if time.monotonic() >= deadline:
+            break
+        delay = min(next_poll_delay(delay), max(0.0, deadline - time.monotonic()))
+    
+    queue.note(video_id, language, "Transcript processing is taking longer than expected")
+    return {
+        "status": "timeout", 
+        "message": "Transcript processing is taking longer than expected",
+        "transcript_id": transcript_id
+    }
+
+def export_segments(segments):
+    """SupaData segments as export_transcript captions; a missing start is 0 and a missing end the start."""
+    for segment in segments:
+        start = segment.get('start', 0)
+        yield {'text': segment.get('text', ''), 'start': start, 'end': segment.get('end', start)}
 
 if __name__ == "__main__":
-    import re
-    
     if len(sys.argv) < 2:
         print("Usage: python process_youtube_with_supadata.py <youtube_url_or_id> [language_code]")
         print("Example: python process_youtube_with_supadata.py https://www.youtube.com/watch?v=-PAD2MYt0B0 hi")
@@ -148,6 +189,11 @@ if __name__ == "__main__":
             print("\nFirst 5 segments:")
             for i, segment in enumerate(transcript['segments'][:5]):
                 print(f"[{segment.get('start', 0):.2f}s - {segment.get('end', 0):.2f}s] {segment.get('text', '')}")
+            
+            # Export the segments as subtitles and plain text in one pass
+            outputs = output_paths(os.path.splitext(output_file)[0], ('txt', 'srt', 'vtt'))
+            export_transcript(export_segments(transcript['segments']), outputs, transcript.get('name'))
+            print(f"\nSegments exported to: {', '.join(outputs.values())}")
         elif 'text' in transcript:
             print("\nTranscript text (first 500 chars):")
             print(transcript['text'][:500] + "...")
@@ -1,12 +1,15 @@
-from youtube_transcript_api import YouTubeTranscriptApi
+from transcript_languages import fetch_preferred_transcript
 import sys
 
 def get_transcript(video_id):
     try:
         print(f"Fetching transcript for video: {video_id}")
         
-        # Try to get transcript directly
-        transcript = YouTubeTranscriptApi.get_transcript(video_id)
+        # Try to get the English transcript directly (cached after the first fetch)
+        result = fetch_preferred_transcript(video_id, ['en'], allow_any=False)
+        if result is None:
+            raise ValueError(f"No English transcript found for video {video_id}")
+        transcript = result['entries']
         
         print("\nTranscript:")
         print("-" * 50)
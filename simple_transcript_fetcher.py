@@ -1,43 +1,21 @@
-from youtube_transcript_api import YouTubeTranscriptApi
+from transcript_languages import fetch_preferred_transcript
 import sys
 
 def get_transcript(video_id, language='hi'):
     try:
-        # Try to get transcript in the specified language
-        transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=[language])
-        return transcript
-    except Exception as e:
-        print(f"Error getting {language} transcript: {str(e)}")
-        
-        # If the specified language fails, try English
-        if language != 'en':
-            try:
-                print("Trying English transcript...")
-                transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=['en'])
-                return transcript
-            except Exception as e2:
-                print(f"Error getting English transcript: {str(e2)}")
+        # One listing, one caption fetch: the track is chosen locally
+        # (requested language, then English, then anything; manual first)
+        preferences = [language] if language == 'en' else [language, 'en']
+        result = fetch_preferred_transcript(video_id, preferences)
+        if result is None:
+            print("No transcripts available for this video.")
+            return None
         
-        # If both fail, try to get any available transcript
-        try:
-            print("Trying to list available transcripts...")
-            transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-            
-            print("\nAvailable transcripts:")
-            for transcript in transcript_list:
-                print(f"- {transcript.language} ({transcript.language_code}) - {'auto-generated' if transcript.is_generated else 'manual'}")
-                
-                # Try to get the first available transcript
-                try:
-                    transcript_data = transcript.fetch()
-                    print(f"\nSuccessfully fetched {transcript.language} transcript!")
-                    return transcript_data
-                except Exception as e3:
-                    print(f"Failed to fetch {transcript.language} transcript: {str(e3)}")
-                    continue
-                    
-        except Exception as e4:
-            print(f"Error listing transcripts: {str(e4)}")
+        if result['language'] != language:
+            print(f"No {language} transcript, using {result['language_name']} ({result['language']}) - {'auto-generated' if result['is_generated'] else 'manual'}")
+        return result['entries']
+    except Exception as e:
+        print(f"Error getting transcript: {str(e)}")
             
     return None
 
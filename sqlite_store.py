@@ -0,0 +1,92 @@
+"""
+Common plumbing of the SQLite-backed stores.
+
+transcript_cache, media_info_cache, analysis_cache and supadata_jobs all
+keep their data in a SQLite file shared between threads and processes:
+one WAL-mode connection per thread, a counters table that adds up across
+every process using the file, and a lazily created process-wide instance
+configured through <PREFIX>_PATH / <PREFIX>_DISABLE. Subclasses set SCHEMA
+and the class attributes below and add their own queries.
+"""
+import os
+import sqlite3
+import threading
+
+COUNTERS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class SQLiteStore:
+    """Base class: per-thread connections, counters, stats() and a process-wide default()."""
+
+    SCHEMA = ''
+    ROW_FACTORY = None
+    TABLE = None  # the table stats() reports 'entries' (and with SIZED, 'bytes') for
+    SIZED = False  # TABLE has a size column
+    COUNTERS = ()  # counters stats() reports even before they are first incremented
+    ENV_PREFIX = None  # e.g. 'TRANSCRIPT_CACHE' for TRANSCRIPT_CACHE_PATH / TRANSCRIPT_CACHE_DISABLE
+    DEFAULT_PATH = None
+
+    _defaults = {}
+    _defaults_lock = threading.Lock()
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            if self.ROW_FACTORY is not None:
+                conn.row_factory = self.ROW_FACTORY
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA + (COUNTERS_SCHEMA if self.COUNTERS else ''))
+            self._local.conn = conn
+        return conn
+
+    def _count(self, conn, name, amount=1):
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount))
+
+    def stats(self):
+        """Return the counters plus the number of entries (and their bytes for sized tables)."""
+        conn = self._connect()
+        stats = dict.fromkeys(self.COUNTERS, 0)
+        if self.COUNTERS:
+            stats.update((name, value) for name, value in conn.execute("SELECT name, value FROM counters"))
+        if self.SIZED:
+            count, size = conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.TABLE}").fetchone()
+            stats['entries'] = count
+            stats['bytes'] = size
+        else:
+            stats['entries'] = conn.execute(f"SELECT COUNT(*) FROM {self.TABLE}").fetchone()[0]
+        return stats
+
+    def close(self):
+        """Close this thread's connection; the next call reopens it."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @classmethod
+    def default(cls):
+        """Return the process-wide instance of cls, or None if <ENV_PREFIX>_DISABLE is set."""
+        if os.getenv(f'{cls.ENV_PREFIX}_DISABLE', '').lower() in ('1', 'true', 'yes'):
+            return None
+        with cls._defaults_lock:
+            store = SQLiteStore._defaults.get(cls)
+            if store is None:
+                store = SQLiteStore._defaults[cls] = cls(os.getenv(f'{cls.ENV_PREFIX}_PATH', cls.DEFAULT_PATH))
+            return store
@@ -1,16 +1,121 @@
+import asyncio
+import email.utils
+import functools
+import random
 import requests
 import json
 import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
 from typing import Dict, Optional, List, Any
 
+class SupaDataError(Exception):
+    """Raised where an error dict can't be returned (e.g. while iterating pages)."""
+
+# Requests that can be repeated without side effects
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE"))
+# Statuses worth retrying for idempotent requests
+RETRY_STATUSES = frozenset((408, 429, 500, 502, 503, 504))
+# Statuses that mean the request was rejected unprocessed, so even a POST is safe to resend
+REJECTED_STATUSES = frozenset((429, 503))
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+def _never_sent(error: Exception) -> bool:
+    """True if a request failed before a connection was established (safe to resend any method)."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+class CircuitBreaker:
+    """
+    Stop sending requests while the service keeps failing.
+
+    After failure_threshold consecutive failures the circuit opens and
+    requests are refused for reset_after seconds; then a single trial
+    request is let through (half-open), and its outcome closes or re-opens
+    the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_after: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_after:
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self) -> bool:
+        """Count a failure; returns True if this opened the circuit."""
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
 class SupaDataClient:
     BASE_URL = "https://api.supadata.ai/v1"
     
-    def __init__(self, session_id: str):
+    def __init__(self, session_id: str, timeout: Optional[float] = None, pool_size: int = 10,
+                 base_url: Optional[str] = None, max_retries: int = 4, backoff_base: float = 0.5,
+                 backoff_cap: float = 30.0, total_timeout: Optional[float] = None,
+                 breaker: Optional[CircuitBreaker] = None):
         """
         Initialize the SupaData client with a session ID.
+
+        timeout (seconds) applies to every request; pool_size is the number
+        of keep-alive connections kept open to the API. base_url (or
+        SUPADATA_BASE_URL) points the client at another server, e.g. a
+        local stub. Failed requests are retried up to max_retries times
+        with jittered exponential backoff (honouring Retry-After), within
+        total_timeout seconds if given, and a circuit breaker refuses
+        requests while the API keeps failing.
         """
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.timeout = timeout
+        self.base_url = (base_url or os.getenv("SUPADATA_BASE_URL") or self.BASE_URL).rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.total_timeout = total_timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.counters = Counter()
+        self._counters_lock = threading.Lock()
         self.session_id = session_id
         self.session.cookies.set("sd_session", session_id)
         self.headers = {
@@ -19,25 +124,93 @@ class SupaDataClient:
             "Accept": "application/json",
         }
     
+    def _count(self, *names: str):
+        with self._counters_lock:
+            self.counters.update(names)
+    
+    def stats(self) -> Dict:
+        """Return request counters plus the circuit breaker state."""
+        with self._counters_lock:
+            stats = dict(self.counters)
+        stats["circuit"] = self.breaker.state
+        return stats
+    
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_cap))
+        return delay
+    
     def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict:
         """
         Make an authenticated request to the SupaData API.
+
+        Connection errors and 408/429/5xx responses are retried for
+        idempotent methods. A POST is only resent when it provably never
+        reached the server (connect errors) or was rejected with 429/503,
+        so a transcript is never created twice. Error dicts carry
+        'never_sent': True in exactly those cases; any other failed POST may
+        or may not have been processed.
         """
-        url = f"{self.BASE_URL}/{endpoint.lstrip('/')}"
-        response = self.session.request(
-            method=method,
-            url=url,
-            headers={**self.headers, **kwargs.pop('headers', {})},
-            **kwargs
-        )
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        if self.timeout is not None:
+            kwargs.setdefault('timeout', self.timeout)
+        headers = {**self.headers, **kwargs.pop('headers', {})}
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        deadline = time.monotonic() + self.total_timeout if self.total_timeout else None
         
-        try:
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.JSONDecodeError:
-            return {"status": "error", "message": "Invalid JSON response", "raw_response": response.text}
-        except requests.exceptions.RequestException as e:
-            return {"status": "error", "message": str(e)}
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self._count("short_circuited")
+                return {"status": "error", "message": "SupaData circuit breaker is open", "circuit_open": True,
+                        "never_sent": True}
+            
+            self._count("requests")
+            retry_after = None
+            # Anything that escapes this attempt counts as a failure too, so a
+            # half-open trial that raises re-opens the circuit instead of
+            # leaving it half-open (refusing every request) for good
+            failed = True
+            try:
+                response = self.session.request(method=method, url=url, headers=headers, **kwargs)
+            except requests.exceptions.RequestException as e:
+                self._count("connection_errors")
+                error = {"status": "error", "message": str(e), "never_sent": _never_sent(e)}
+                retryable = idempotent or error["never_sent"]
+            else:
+                self._count(f"status_{response.status_code}")
+                failed = response.status_code >= 500 or response.status_code == 429
+                retryable = response.status_code in (RETRY_STATUSES if idempotent else REJECTED_STATUSES)
+                retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+                error = None
+            finally:
+                if failed:
+                    if self.breaker.record_failure():
+                        self._count("circuit_opened")
+                else:
+                    self.breaker.record_success()
+            
+            if failed and retryable and attempt < self.max_retries:
+                delay = self._backoff(attempt, retry_after)
+                if deadline is None or time.monotonic() + delay < deadline:
+                    attempt += 1
+                    self._count("retries")
+                    time.sleep(delay)
+                    continue
+            
+            if failed:
+                self._count("failures")
+            if error is not None:
+                return error
+            try:
+                response.raise_for_status()
+                return response.json()
+            except requests.exceptions.JSONDecodeError:
+                return {"status": "error", "message": "Invalid JSON response", "raw_response": response.text}
+            except requests.exceptions.RequestException as e:
+                return {"status": "error", "message": str(e), "status_code": response.status_code,
+                        "never_sent": response.status_code in REJECTED_STATUSES}
     
     def get_organization_info(self) -> Dict:
         """
@@ -85,12 +258,151 @@ class SupaDataClient:
         """
         return self._make_request("GET", f"/transcripts?limit={limit}&offset={offset}")
     
+    def iter_transcripts(self, page_size: int = 50, prefetch: int = 2):
+        """
+        Yield every transcript in the listing, page by page.
+
+        The next prefetch pages are requested in the background while the
+        current one is consumed. Raises SupaDataError if a page fails.
+        """
+        with ThreadPoolExecutor(max_workers=prefetch + 1, thread_name_prefix='supadata-page') as pool:
+            pending = deque(pool.submit(self.list_transcripts, page_size, page_size * i)
+                            for i in range(prefetch + 1))
+            next_page = prefetch + 1
+            while pending:
+                items = _page_items(pending.popleft().result())
+                yield from items
+                if len(items) < page_size:
+                    for future in pending:
+                        future.cancel()
+                    return
+                pending.append(pool.submit(self.list_transcripts, page_size, page_size * next_page))
+                next_page += 1
+    
     def delete_transcript(self, transcript_id: str) -> Dict:
         """
         Delete a transcript by ID.
         """
         return self._make_request("DELETE", f"/transcripts/{transcript_id}")
 
+def transcript_items(page) -> List[Dict]:
+    """
+    Return the transcripts in a list_transcripts response, whichever
+    envelope ('data', 'transcripts', 'items' or a bare list) it uses.
+    """
+    if isinstance(page, list):
+        return page
+    for key in ('data', 'transcripts', 'items', 'results'):
+        if isinstance(page.get(key), list):
+            return page[key]
+    return []
+
+def _page_items(page) -> List[Dict]:
+    if isinstance(page, dict) and page.get('status') == 'error':
+        raise SupaDataError(page.get('message', 'Failed to list transcripts'))
+    return transcript_items(page)
+
+class AsyncSupaDataClient:
+    """
+    asyncio variant of SupaDataClient with the same methods.
+
+    Requests share one pooled keep-alive session and run on a thread pool
+    sized to max_in_flight; a semaphore keeps at most that many requests
+    outstanding. timeout applies to each attempt, and a call (including its
+    retries) is abandoned with an error dict after total_timeout (default
+    4 x timeout). create_transcript is never abandoned that way: a POST cut
+    off mid-flight may still create the transcript, so it is bounded only
+    by the session's own timeouts and its error dict says whether it was
+    sent. Extra keyword arguments go to SupaDataClient. Use it as an async
+    context manager, or call aclose().
+    """
+
+    # Calls whose outcome is unknown if abandoned, so they run to completion
+    NON_IDEMPOTENT_CALLS = frozenset(("create_transcript",))
+
+    def __init__(self, session_id: str, max_in_flight: int = 16, timeout: Optional[float] = 30.0, **client_options):
+        self.max_in_flight = max_in_flight
+        # Retries happen inside the wrapped client, so the overall limit covers all attempts
+        client_options.setdefault('total_timeout', 4 * timeout if timeout else None)
+        self.timeout = client_options['total_timeout']
+        self.client = SupaDataClient(session_id, timeout=timeout, pool_size=max_in_flight, **client_options)
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='supadata')
+        self._semaphore = None
+        self.in_flight = 0
+        self.completed = 0
+        self.timeouts = 0
+
+    async def _call(self, method: str, *args, **kwargs) -> Dict:
+        if self._semaphore is None:
+            # Bound to the running loop, so created on first use
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            call = functools.partial(getattr(self.client, method), *args, **kwargs)
+            self.in_flight += 1
+            try:
+                limit = None
+                if self.timeout and method not in self.NON_IDEMPOTENT_CALLS:
+                    limit = self.timeout + (self.client.timeout or 0)
+                return await asyncio.wait_for(loop.run_in_executor(self._executor, call), limit)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                return {"status": "error", "message": f"Request timed out after {limit}s"}
+            finally:
+                self.in_flight -= 1
+                self.completed += 1
+
+    async def get_organization_info(self) -> Dict:
+        return await self._call("get_organization_info")
+
+    async def list_projects(self) -> Dict:
+        return await self._call("list_projects")
+
+    async def create_transcript(self, audio_url: str, language: str = "hi",
+                                name: str = None, **kwargs) -> Dict:
+        """Create a new transcript from an audio URL (see SupaDataClient.create_transcript)."""
+        return await self._call("create_transcript", audio_url, language, name, **kwargs)
+
+    async def get_transcript(self, transcript_id: str) -> Dict:
+        return await self._call("get_transcript", transcript_id)
+
+    async def list_transcripts(self, limit: int = 10, offset: int = 0) -> Dict:
+        return await self._call("list_transcripts", limit, offset)
+
+    async def iter_transcripts(self, page_size: int = 50, prefetch: int = 2):
+        """Async version of SupaDataClient.iter_transcripts, prefetching pages concurrently."""
+        pending = deque(asyncio.ensure_future(self.list_transcripts(page_size, page_size * i))
+                        for i in range(prefetch + 1))
+        next_page = prefetch + 1
+        try:
+            while pending:
+                items = _page_items(await pending.popleft())
+                for item in items:
+                    yield item
+                if len(items) < page_size:
+                    return
+                pending.append(asyncio.ensure_future(self.list_transcripts(page_size, page_size * next_page)))
+                next_page += 1
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def delete_transcript(self, transcript_id: str) -> Dict:
+        return await self._call("delete_transcript", transcript_id)
+
+    def stats(self) -> Dict:
+        return {**self.client.stats(), "timeouts": self.timeouts}
+
+    async def aclose(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.client.session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
 def test_supadata_client():
     # Initialize the client with your session ID
     SESSION_ID = "sd_34c7eee019290004202c004c0e4a9c24"
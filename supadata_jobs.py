@@ -0,0 +1,365 @@
+"""
+Durable SupaData transcription job queue.
+
+Every (video_id, language) submission is recorded in SQLite before and
+after create_transcript, so a crash never loses a transcript ID and a
+video that is already queued, submitted or completed is never submitted
+(and billed) again. Jobs move queued -> submitting -> submitted ->
+completed/failed. On restart, submitted jobs are polled again, and jobs
+left in 'submitting' (by a crash, or by a timeout or 5xx that may or may
+not have created the transcript) are matched against SupaData's
+transcript list by their deterministic name before being queued again.
+
+Usage:
+    python supadata_jobs.py add video_ids.txt [--language hi]
+    python supadata_jobs.py work [--parallelism 4]
+    python supadata_jobs.py status
+    python supadata_jobs.py retry-failed [--resubmit]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import time
+import zlib
+from datetime import datetime, timezone
+
+from sqlite_store import SQLiteStore
+from supadata_client import AsyncSupaDataClient, SupaDataClient, transcript_items
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'supadata_jobs.sqlite3')
+SESSION_ID = os.getenv('SUPADATA_SESSION_ID', "sd_34c7eee019290004202c004c0e4a9c24")
+MAX_SUBMIT_ATTEMPTS = 3
+STALE_SUBMITTING = 300  # seconds before a 'submitting' job is assumed to belong to a dead process
+STATES = ('queued', 'submitting', 'submitted', 'completed', 'failed')
+RECOVERY_PAGES = 200  # listing pages recover() reads at most
+CLOCK_SKEW = 300  # seconds of disagreement allowed between our clock and SupaData's
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    video_id TEXT NOT NULL,
+    language TEXT NOT NULL,
+    state TEXT NOT NULL,
+    transcript_id TEXT,
+    duration REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    payload BLOB,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (video_id, language)
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state);
+"""
+
+
+def transcript_name(video_id, language):
+    """Name given to the SupaData transcript of a job; used to find it again after a crash."""
+    return f"YouTube_{video_id}_{language}"
+
+
+def listed_time(item):
+    """Creation time of a listed transcript as a Unix timestamp, or None if it has none."""
+    for key in ('created_at', 'createdAt', 'created'):
+        value = item.get(key)
+        if isinstance(value, (int, float)):
+            return value / 1000 if value > 1e11 else float(value)  # seconds or milliseconds
+        if isinstance(value, str):
+            try:
+                created = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                continue
+            if created.tzinfo is None:
+                created = created.replace(tzinfo=timezone.utc)
+            return created.timestamp()
+    return None
+
+
+class JobQueue(SQLiteStore):
+    """SQLite-backed job table; safe to share between threads and processes."""
+
+    SCHEMA = SCHEMA
+    ROW_FACTORY = sqlite3.Row
+    TABLE = 'jobs'
+
+    def __init__(self, path=DEFAULT_PATH):
+        super().__init__(path)
+
+    def _update(self, video_id, language, **fields):
+        fields['updated'] = time.time()
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        self._connect().execute(f"UPDATE jobs SET {assignments} WHERE video_id = ? AND language = ?",
+                                (*fields.values(), video_id, language))
+
+    def enqueue(self, video_id, language='hi'):
+        """Queue a job; returns False if the video/language is already known (in any state)."""
+        now = time.time()
+        cursor = self._connect().execute(
+            "INSERT OR IGNORE INTO jobs (video_id, language, state, created, updated) VALUES (?, ?, 'queued', ?, ?)",
+            (video_id, language, now, now))
+        return cursor.rowcount == 1
+
+    def get(self, video_id, language='hi'):
+        """Return the job as a dict ('transcript' decoded for completed jobs), or None."""
+        row = self._connect().execute("SELECT * FROM jobs WHERE video_id = ? AND language = ?",
+                                      (video_id, language)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        payload = job.pop('payload')
+        if payload is not None:
+            job['transcript'] = json.loads(zlib.decompress(payload))
+        return job
+
+    def jobs(self, state):
+        """Return the (payload-free) jobs in a state, oldest first."""
+        rows = self._connect().execute(
+            "SELECT video_id, language, state, transcript_id, duration, attempts, error, created, updated "
+            "FROM jobs WHERE state = ? ORDER BY created", (state,))
+        return [dict(row) for row in rows]
+
+    def claim(self, video_id, language='hi'):
+        """Move a queued job to 'submitting'; True only for the one caller that wins it."""
+        cursor = self._connect().execute(
+            "UPDATE jobs SET state = 'submitting', attempts = attempts + 1, updated = ? "
+            "WHERE video_id = ? AND language = ? AND state = 'queued'",
+            (time.time(), video_id, language))
+        return cursor.rowcount == 1
+
+    def claim_queued(self, limit=None):
+        """Claim up to limit queued jobs at once and return them."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            query = "SELECT video_id, language FROM jobs WHERE state = 'queued' ORDER BY created"
+            rows = conn.execute(query + (" LIMIT ?" if limit else ""), (limit,) if limit else ()).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET state = 'submitting', attempts = attempts + 1, updated = ? "
+                "WHERE video_id = ? AND language = ?",
+                [(time.time(), row['video_id'], row['language']) for row in rows])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return [self.get(row['video_id'], row['language']) for row in rows]
+
+    def mark_submitted(self, video_id, language, transcript_id, duration=None):
+        self._update(video_id, language, state='submitted', transcript_id=transcript_id, duration=duration,
+                     error=None)
+
+    def mark_completed(self, video_id, language, transcript):
+        payload = zlib.compress(json.dumps(transcript, ensure_ascii=False).encode('utf-8'), 6)
+        self._update(video_id, language, state='completed', payload=payload, error=None)
+
+    def mark_failed(self, video_id, language, error):
+        self._update(video_id, language, state='failed', error=error)
+
+    def note(self, video_id, language, error):
+        """Record an error without changing the state (e.g. a polling timeout)."""
+        self._update(video_id, language, error=error)
+
+    def release(self, video_id, language, error):
+        """Return a job whose submission failed to the queue, or fail it after MAX_SUBMIT_ATTEMPTS."""
+        job = self.get(video_id, language)
+        state = 'failed' if job and job['attempts'] >= MAX_SUBMIT_ATTEMPTS else 'queued'
+        self._update(video_id, language, state=state, error=error)
+
+    def requeue(self, video_id, language='hi'):
+        """Queue one job that failed before SupaData accepted it again; True if there was one."""
+        return self._connect().execute(
+            "UPDATE jobs SET state = 'queued', attempts = 0, updated = ? "
+            "WHERE video_id = ? AND language = ? AND state = 'failed' AND transcript_id IS NULL",
+            (time.time(), video_id, language)).rowcount == 1
+
+    def requeue_failed(self, resubmit=False):
+        """
+        Queue failed jobs again and return how many there were.
+
+        Only jobs that never got a transcript ID are queued, unless
+        resubmit is set: then jobs whose transcript SupaData reported as
+        failed are submitted (and billed) again as well.
+        """
+        where = "state = 'failed'" if resubmit else "state = 'failed' AND transcript_id IS NULL"
+        return self._connect().execute(
+            f"UPDATE jobs SET state = 'queued', attempts = 0, transcript_id = NULL, updated = ? WHERE {where}",
+            (time.time(),)).rowcount
+
+    def recover(self, client, stale_after=STALE_SUBMITTING, page_size=50, max_pages=RECOVERY_PAGES):
+        """
+        Resolve jobs a dead process left in 'submitting'.
+
+        The transcript listing (newest first) is paged until it reaches
+        transcripts created before the oldest stale job, or its end. A
+        transcript with a job's name is adopted (create_transcript did
+        succeed). A job without one is queued again only if the listing
+        provably covered its whole lifetime; otherwise (max_pages reached,
+        no creation times listed) it stays in 'submitting' for a later
+        recovery rather than risk being billed twice. If any listing page
+        fails, nothing is changed. Returns (adopted, requeued).
+        """
+        stale = [job for job in self.jobs('submitting') if time.time() - job['updated'] > stale_after]
+        if not stale:
+            return 0, 0
+        oldest_job = min(job['created'] for job in stale)
+        by_name = {}
+        complete = False
+        reached = None  # oldest creation time seen in the listing
+        for page in range(max_pages):
+            response = client.list_transcripts(limit=page_size, offset=page * page_size)
+            if isinstance(response, dict) and response.get('status') == 'error':
+                print(f"Recovery skipped, could not list transcripts: {response.get('message')}")
+                return 0, 0
+            items = transcript_items(response)
+            for item in items:
+                by_name.setdefault(item.get('name'), item)
+                created = listed_time(item)
+                if created is not None and (reached is None or created < reached):
+                    reached = created
+            if len(items) < page_size:
+                complete = True
+                break
+            if reached is not None and reached < oldest_job - CLOCK_SKEW:
+                break
+
+        adopted = requeued = 0
+        for job in stale:
+            item = by_name.get(transcript_name(job['video_id'], job['language']))
+            if item and item.get('id'):
+                self.mark_submitted(job['video_id'], job['language'], item['id'], job['duration'])
+                adopted += 1
+            elif complete or (reached is not None and reached < job['created'] - CLOCK_SKEW):
+                self._update(job['video_id'], job['language'], state='queued')
+                requeued += 1
+        unresolved = len(stale) - adopted - requeued
+        if unresolved:
+            print(f"{unresolved} stale submissions left unresolved: the transcript listing "
+                  f"did not reach back to when they were created")
+        return adopted, requeued
+
+    def counts(self):
+        counts = {state: 0 for state in STATES}
+        counts.update(dict(self._connect().execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()))
+        return counts
+
+
+async def work(queue, parallelism=4, session_id=SESSION_ID, limit=None):
+    """Submit queued jobs (parallelism at a time) and poll every unfinished job; returns a summary."""
+    from process_youtube_with_supadata import get_video_info
+    from media_info_cache import best_audio_url
+    from supadata_poller import TranscriptPoller
+
+    adopted, requeued = await asyncio.to_thread(queue.recover, SupaDataClient(session_id, timeout=30))
+    summary = {'recovered': adopted, 'requeued': requeued, 'submitted': 0, 'completed': 0, 'failed': 0,
+               'timeouts': 0, 'poll_errors': 0, 'unresolved': 0}
+    started = time.perf_counter()
+
+    async with AsyncSupaDataClient(session_id, max_in_flight=max(8, 2 * parallelism)) as client:
+        poller = TranscriptPoller(client)
+        poll_task = None
+
+        def track(job):
+            nonlocal poll_task
+
+            def done(result):
+                if result['status'] == 'success':
+                    queue.mark_completed(job['video_id'], job['language'], result['transcript'])
+                    summary['completed'] += 1
+                elif result['status'] == 'timeout':
+                    # Still running on SupaData: keep the ID so the next run polls it again
+                    queue.note(job['video_id'], job['language'], result['message'])
+                    summary['timeouts'] += 1
+                elif result.get('transcript_status') == 'failed':
+                    queue.mark_failed(job['video_id'], job['language'], result['message'])
+                    summary['failed'] += 1
+                else:
+                    # Status checks failed (network, circuit open); the transcript itself may be fine
+                    queue.note(job['video_id'], job['language'], result['message'])
+                    summary['poll_errors'] += 1
+                print(f"[{result['status']}] {job['video_id']} ({job['language']}) after "
+                      f"{result['elapsed']:.0f}s, {result['checks']} checks")
+
+            poller.track(job['transcript_id'], job['duration'], done)
+            if poll_task is None or poll_task.done():
+                poll_task = asyncio.create_task(poller.run())
+
+        semaphore = asyncio.Semaphore(parallelism)
+
+        async def submit(job):
+            video_id, language = job['video_id'], job['language']
+            async with semaphore:
+                info = await asyncio.to_thread(get_video_info, video_id) or {}
+                audio_url = best_audio_url(info)
+                if not audio_url:
+                    queue.release(video_id, language, "Could not extract audio URL from YouTube video")
+                    return
+                result = await client.create_transcript(
+                    audio_url=audio_url, language=language, name=transcript_name(video_id, language),
+                    metadata={"source": "youtube", "video_id": video_id, "title": info.get('title'),
+                              "duration": info.get('duration')})
+            if 'id' not in result:
+                message = result.get('message', 'Failed to create transcript')
+                if result.get('never_sent'):
+                    queue.release(video_id, language, message)
+                    print(f"[retry] {video_id} ({language}): {message}")
+                else:
+                    # SupaData may have created the transcript anyway; leave the job in
+                    # 'submitting' so recover() can find it by name instead of resubmitting
+                    queue.note(video_id, language, message)
+                    summary['unresolved'] += 1
+                    print(f"[unresolved] {video_id} ({language}): {message}")
+                return
+            queue.mark_submitted(video_id, language, result['id'], info.get('duration'))
+            summary['submitted'] += 1
+            print(f"[submitted] {video_id} ({language}) -> {result['id']}")
+            track(queue.get(video_id, language))
+
+        for job in queue.jobs('submitted'):
+            track(job)
+        await asyncio.gather(*(submit(job) for job in queue.claim_queued(limit)))
+        if poll_task is not None:
+            await poll_task
+
+    summary['seconds'] = time.perf_counter() - started
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Durable SupaData transcription job queue.")
+    parser.add_argument('--db', default=os.getenv('SUPADATA_JOBS_PATH', DEFAULT_PATH), help="queue database")
+    commands = parser.add_subparsers(dest='command', required=True)
+    add = commands.add_parser('add', help="queue videos (already known video/language pairs are skipped)")
+    add.add_argument('sources', nargs='+', help="files with one video ID or URL per line ('-' for stdin)")
+    add.add_argument('--language', default='hi')
+    run = commands.add_parser('work', help="submit queued jobs and poll unfinished ones")
+    run.add_argument('--parallelism', type=int, default=4, help="submissions in flight at once")
+    run.add_argument('--limit', type=int, default=None, help="submit at most this many queued jobs")
+    commands.add_parser('status', help="show job counts")
+    retry = commands.add_parser('retry-failed', help="queue jobs that failed before submission again")
+    retry.add_argument('--resubmit', action='store_true',
+                       help="also resubmit jobs whose transcript SupaData reported as failed")
+    args = parser.parse_args(argv)
+
+    queue = JobQueue(args.db)
+    if args.command == 'add':
+        from bulk_ingest import read_video_ids
+
+        video_ids = read_video_ids(args.sources)
+        added = sum(queue.enqueue(video_id, args.language) for video_id in video_ids)
+        print(f"Queued {added} of {len(video_ids)} videos ({len(video_ids) - added} already known)")
+    elif args.command == 'work':
+        summary = asyncio.run(work(queue, args.parallelism, limit=args.limit))
+        print(f"\nSubmitted: {summary['submitted']}  Completed: {summary['completed']}  "
+              f"Failed: {summary['failed']}  Still running: {summary['timeouts']}  "
+              f"Poll errors: {summary['poll_errors']}  "
+              f"Unresolved: {summary['unresolved']}  Recovered: {summary['recovered']}  "
+              f"({summary['seconds']:.1f}s)")
+    elif args.command == 'retry-failed':
+        print(f"Re-queued {queue.requeue_failed(args.resubmit)} failed jobs")
+    print(f"Jobs: {queue.counts()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Incremental local mirror of SupaData transcripts.
+
+sync() walks the transcript listing with the prefetching paginator, then
+downloads bodies only for transcripts that are new or whose listing entry
+changed since the last sync. Everything lives under one directory, so the
+dashboard can read transcripts from local disk:
+
+    <mirror>/index.json               {transcript_id: {'fingerprint', 'item', 'synced'}}
+    <mirror>/transcripts/<id>.json    full get_transcript() responses
+
+Usage:
+    python supadata_mirror.py [--dir .cache/supadata_mirror] [--page-size 100] [--prune]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+
+from supadata_client import AsyncSupaDataClient
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'supadata_mirror')
+SESSION_ID = os.getenv('SUPADATA_SESSION_ID', "sd_34c7eee019290004202c004c0e4a9c24")
+UNFINISHED = ('queued', 'processing', 'pending')
+
+
+def fingerprint(item):
+    """Hash of a listing entry; any change to it (status, updated_at, ...) means re-fetch."""
+    return hashlib.sha1(json.dumps(item, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _write_json(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def load_index(mirror_dir=DEFAULT_DIR):
+    """Return the mirror index ({transcript_id: entry}), empty if never synced."""
+    path = os.path.join(mirror_dir, 'index.json')
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_transcript(transcript_id, mirror_dir=DEFAULT_DIR):
+    """Return a mirrored transcript body, or None."""
+    path = os.path.join(mirror_dir, 'transcripts', f"{transcript_id}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+async def sync(mirror_dir=DEFAULT_DIR, session_id=SESSION_ID, page_size=100, prefetch=3, concurrency=8,
+               prune=False):
+    """Bring the mirror up to date and return a summary dict."""
+    body_dir = os.path.join(mirror_dir, 'transcripts')
+    os.makedirs(body_dir, exist_ok=True)
+    index = load_index(mirror_dir)
+    summary = {'listed': 0, 'new': 0, 'changed': 0, 'unchanged': 0, 'fetched': 0, 'errors': 0, 'pruned': 0}
+    started = time.perf_counter()
+
+    async with AsyncSupaDataClient(session_id, max_in_flight=concurrency + prefetch + 1) as client:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch_body(transcript_id, entry):
+            async with semaphore:
+                body = await client.get_transcript(transcript_id)
+            if body.get('status') == 'error':
+                # Leave the fingerprint unset so the next sync tries again
+                summary['errors'] += 1
+                entry['fingerprint'] = None
+                return
+            _write_json(os.path.join(body_dir, f"{transcript_id}.json"), body)
+            summary['fetched'] += 1
+
+        listed = set()
+        fetches = []
+        async for item in client.iter_transcripts(page_size, prefetch):
+            transcript_id = item.get('id')
+            if not transcript_id:
+                continue
+            summary['listed'] += 1
+            listed.add(transcript_id)
+            digest = fingerprint(item)
+            previous = index.get(transcript_id)
+            if previous and previous.get('fingerprint') == digest:
+                summary['unchanged'] += 1
+                continue
+            summary['changed' if previous else 'new'] += 1
+            entry = index[transcript_id] = {'fingerprint': digest, 'item': item, 'synced': time.time()}
+            if item.get('status') in UNFINISHED:
+                continue  # no body yet; its status change will show up in a later listing
+            fetches.append(asyncio.ensure_future(fetch_body(transcript_id, entry)))
+        await asyncio.gather(*fetches)
+
+    if prune:
+        for transcript_id in set(index) - listed:
+            del index[transcript_id]
+            body = os.path.join(body_dir, f"{transcript_id}.json")
+            if os.path.exists(body):
+                os.remove(body)
+            summary['pruned'] += 1
+
+    _write_json(os.path.join(mirror_dir, 'index.json'), index)
+    summary['seconds'] = time.perf_counter() - started
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync SupaData transcripts into a local mirror.")
+    parser.add_argument('--dir', default=DEFAULT_DIR, help="mirror directory")
+    parser.add_argument('--page-size', type=int, default=100, help="transcripts per listing request")
+    parser.add_argument('--prefetch', type=int, default=3, help="listing pages requested ahead")
+    parser.add_argument('--concurrency', type=int, default=8, help="transcript bodies fetched at once")
+    parser.add_argument('--prune', action='store_true', help="drop transcripts no longer listed")
+    args = parser.parse_args(argv)
+
+    summary = asyncio.run(sync(args.dir, page_size=args.page_size, prefetch=args.prefetch,
+                               concurrency=args.concurrency, prune=args.prune))
+    print(f"Listed {summary['listed']}: {summary['new']} new, {summary['changed']} changed, "
+          f"{summary['unchanged']} unchanged; fetched {summary['fetched']} bodies "
+          f"({summary['errors']} errors, {summary['pruned']} pruned) in {summary['seconds']:.1f}s")
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Poll many SupaData transcript jobs from one loop.
+
+process_youtube_video used to sleep a fixed 5 s between checks and give up
+after 10 of them, so short clips waited longer than needed and anything
+over ~50 s of processing was dropped as a timeout. Here each job gets its
+own schedule: the first check is seeded from the media duration (a job
+can't finish much faster than a fraction of real time), later checks back
+off geometrically, and the deadline grows with the duration too. Jobs that
+are due at the same time are checked together, and each job's future (and
+optional callback) resolves as soon as it completes, so N jobs take about
+as long as the slowest one.
+"""
+import asyncio
+import heapq
+import itertools
+import random
+import time
+
+# Expected processing time as a fraction of media duration, used to seed the first check
+REALTIME_FACTOR = 0.1
+MIN_INTERVAL = 1.0
+MAX_INTERVAL = 30.0
+BACKOFF = 1.5
+MIN_DEADLINE = 600.0
+MAX_ERRORS = 5  # consecutive failed status checks before a job is given up
+
+
+def first_poll_delay(duration=None):
+    """Delay before the first status check, seeded from the media duration in seconds."""
+    if not duration:
+        return MIN_INTERVAL * 2
+    return min(MAX_INTERVAL, max(MIN_INTERVAL, duration * REALTIME_FACTOR))
+
+
+def next_poll_delay(previous):
+    """Delay before the next check after one that found the job still processing."""
+    return min(MAX_INTERVAL, max(MIN_INTERVAL, previous * BACKOFF)) * random.uniform(0.9, 1.1)
+
+
+def job_deadline(duration=None):
+    """Seconds to keep polling before reporting a timeout."""
+    return max(MIN_DEADLINE, 3 * (duration or 0))
+
+
+class _Job:
+    def __init__(self, transcript_id, duration, future, callback):
+        self.transcript_id = transcript_id
+        self.duration = duration
+        self.future = future
+        self.callback = callback
+        self.started = time.monotonic()
+        self.deadline = self.started + job_deadline(duration)
+        self.delay = first_poll_delay(duration)
+        self.checks = 0
+        self.errors = 0
+
+
+class TranscriptPoller:
+    """
+    Track SupaData transcript jobs and resolve a future per job.
+
+    client is an AsyncSupaDataClient. Each future resolves to
+    {"status": "success", "transcript": ...}, {"status": "error", ...} or
+    {"status": "timeout", ...}, matching process_youtube_video's results.
+    Errors SupaData itself reported carry "transcript_status": "failed";
+    errors without it only mean the status checks kept failing.
+    At most batch_size due jobs are checked concurrently per round.
+    """
+
+    def __init__(self, client, batch_size=16):
+        self.client = client
+        self.batch_size = batch_size
+        self._jobs = {}
+        self._queue = []
+        self._order = itertools.count()
+        self._wakeup = None
+        self.checks = 0
+
+    def track(self, transcript_id, duration=None, callback=None):
+        """Start tracking a job and return an asyncio.Future for its result."""
+        if transcript_id in self._jobs:
+            return self._jobs[transcript_id].future
+        future = asyncio.get_running_loop().create_future()
+        job = _Job(transcript_id, duration, future, callback)
+        self._jobs[transcript_id] = job
+        self._schedule(job, job.delay)
+        return future
+
+    def _schedule(self, job, delay):
+        heapq.heappush(self._queue, (time.monotonic() + delay, next(self._order), job))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _finish(self, job, result):
+        del self._jobs[job.transcript_id]
+        result['transcript_id'] = job.transcript_id
+        result['elapsed'] = time.monotonic() - job.started
+        result['checks'] = job.checks
+        if not job.future.done():
+            job.future.set_result(result)
+        if job.callback is not None:
+            job.callback(result)
+
+    async def _check(self, job):
+        job.checks += 1
+        self.checks += 1
+        transcript = await self.client.get_transcript(job.transcript_id)
+        status = transcript.get('status', 'processing')
+
+        if status == 'completed':
+            return self._finish(job, {"status": "success", "transcript": transcript})
+        if status == 'failed':
+            return self._finish(job, {"status": "error", "message": "Transcript processing failed",
+                                          "transcript_status": "failed"})
+        if status == 'error':
+            job.errors += 1
+            if job.errors >= MAX_ERRORS:
+                return self._finish(job, {"status": "error", "message": transcript.get('message', 'Status check failed')})
+        else:
+            job.errors = 0
+
+        if time.monotonic() >= job.deadline:
+            return self._finish(job, {
+                "status": "timeout",
+                "message": "Transcript processing is taking longer than expected"
+            })
+        job.delay = next_poll_delay(job.delay)
+        self._schedule(job, min(job.delay, max(0.0, job.deadline - time.monotonic())))
+
+    async def run(self):
+        """Poll until every tracked job has resolved."""
+        self._wakeup = asyncio.Event()
+        while self._queue:
+            due_at = self._queue[0][0]
+            wait = due_at - time.monotonic()
+            if wait > 0:
+                # Sleep until the next job is due, or until a new job is tracked
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            now = time.monotonic()
+            due = []
+            while self._queue and self._queue[0][0] <= now and len(due) < self.batch_size:
+                due.append(heapq.heappop(self._queue)[2])
+            await asyncio.gather(*(self._check(job) for job in due))
+        self._wakeup = None
+
+    async def wait(self, transcript_ids, durations=None):
+        """Track transcript_ids, poll them all and return their results in order."""
+        durations = durations or {}
+        futures = [self.track(tid, durations.get(tid)) for tid in transcript_ids]
+        await self.run()
+        return [future.result() for future in futures]
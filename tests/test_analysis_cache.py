@@ -0,0 +1,98 @@
+import threading
+import time
+
+import analysis_cache
+from analysis_cache import AnalysisCache, analysis_key
+
+KEY = analysis_key('नमस्ते दुनिया\n  आज की   बात ', 'v1', 'gpt-4o')
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def test_key_ignores_whitespace_but_not_model():
+    assert analysis_key('नमस्ते दुनिया\n\nआज की बात', 'v1', 'gpt-4o') == KEY
+    assert analysis_key('नमस्ते दुनिया\nआज की बात', 'v1', 'gpt-4o-mini') != KEY
+
+
+def test_concurrent_requests_compute_once(tmp_path):
+    cache = AnalysisCache(str(tmp_path / 'analyses.sqlite3'))
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(threading.current_thread().name)
+        started.set()
+        assert release.wait(5)
+        return {'summary': 'ok'}
+
+    results = {}
+
+    def request(name):
+        results[name] = cache.get_or_compute(KEY, compute, 'gpt-4o', 'v1')
+
+    leader = threading.Thread(target=request, args=('leader',), name='leader')
+    leader.start()
+    assert started.wait(5)
+    follower = threading.Thread(target=request, args=('follower',), name='follower')
+    follower.start()
+    # Only let the leader finish once the follower is waiting on its future
+    wait_until(lambda: cache.stats()['coalesced'] == 1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert calls == ['leader']
+    assert results['leader'] == {'summary': 'ok', 'cached': False}
+    assert results['follower'] == {'summary': 'ok', 'cached': True}
+    stats = cache.stats()
+    assert (stats['computed'], stats['coalesced'], stats['stores']) == (1, 1, 1)
+    assert cache.get(KEY) == {'summary': 'ok'}
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    path = str(tmp_path / 'analyses.sqlite3')
+    crashed = AnalysisCache(path, lease_seconds=-1)
+    assert crashed._acquire_lease(crashed._connect(), KEY)
+
+    cache = AnalysisCache(path)
+    result = cache.get_or_compute(KEY, lambda: {'summary': 'fresh'})
+
+    assert result == {'summary': 'fresh', 'cached': False}
+    assert cache.stats()['coalesced'] == 0
+    # The lease row is ours now, and released once the result is stored
+    assert cache._connect().execute("SELECT COUNT(*) FROM leases").fetchone()[0] == 0
+
+
+def test_waiter_takes_over_when_live_lease_lapses(tmp_path, monkeypatch):
+    monkeypatch.setattr(analysis_cache, 'POLL_INTERVAL', 0.02)
+    path = str(tmp_path / 'analyses.sqlite3')
+    other = AnalysisCache(path, lease_seconds=0.2)
+    assert other._acquire_lease(other._connect(), KEY)
+
+    cache = AnalysisCache(path)
+    result = cache.get_or_compute(KEY, lambda: {'summary': 'after lapse'})
+
+    assert result == {'summary': 'after lapse', 'cached': False}
+    stats = cache.stats()
+    assert (stats['coalesced'], stats['computed']) == (1, 1)
+
+
+def test_waiter_uses_result_stored_by_leaseholder(tmp_path, monkeypatch):
+    monkeypatch.setattr(analysis_cache, 'POLL_INTERVAL', 0.02)
+    path = str(tmp_path / 'analyses.sqlite3')
+    other = AnalysisCache(path)
+    assert other._acquire_lease(other._connect(), KEY)
+    timer = threading.Timer(0.1, other.put, args=(KEY, {'summary': 'theirs'}))
+    timer.start()
+
+    cache = AnalysisCache(path)
+    result = cache.get_or_compute(KEY, lambda: {'summary': 'ours'})
+    timer.join()
+
+    assert result == {'summary': 'theirs', 'cached': True}
+    assert cache.stats()['computed'] == 0
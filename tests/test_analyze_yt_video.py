@@ -0,0 +1,125 @@
+import json
+import re
+import threading
+
+import pytest
+
+import analyze_yt_video
+from analyze_yt_video import RATING_KEYS, analyze_transcript_chunked, chunk_transcript, reduce_analyses
+
+
+def partial(rating, overview, positives=(), negatives=(), suggestions=()):
+    return {'finalVerdict': {key: rating for key in RATING_KEYS},
+            'videoSummary': {'overview': overview, 'positivePoints': list(positives),
+                             'negativePoints': list(negatives), 'suggestions': list(suggestions)}}
+
+
+class FakeModel:
+    """Answers chunk prompts with the part number as every rating, and reduce prompts with a merged summary."""
+
+    def __init__(self, fail_reduce=False):
+        self.fail_reduce = fail_reduce
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self.lock:
+            self.prompts.append(prompt)
+        if 'consecutive parts' in prompt:
+            if self.fail_reduce:
+                raise RuntimeError('reduce unavailable')
+            reply = {'overview': 'whole video', 'positivePoints': ['a'], 'negativePoints': ['b'], 'suggestions': ['c']}
+        else:
+            part = int(re.search(r'part (\d+) of', prompt).group(1))
+            reply = partial(part, f'part {part}', [f'good {part}'])
+        return type('Response', (), {'text': 'Here you go:\n' + json.dumps(reply)})()
+
+
+@pytest.fixture
+def model(monkeypatch):
+    fake = FakeModel()
+    monkeypatch.setattr(analyze_yt_video, '_model', fake)
+    return fake
+
+
+ENTRIES = [{'text': f'line {i:02d} ' + 'x' * (i % 7), 'start': i * 2.0, 'duration': 2.0} for i in range(40)]
+
+
+def test_chunks_split_on_entry_boundaries_without_overlap():
+    chunks = chunk_transcript(ENTRIES, max_chars=60)
+
+    assert len(chunks) > 1
+    assert [chunk['index'] for chunk in chunks] == list(range(len(chunks)))
+    assert all(len(chunk['text']) <= 60 for chunk in chunks)
+    # Every entry lands in exactly one chunk, in order
+    lines = [line for chunk in chunks for line in chunk['text'].split('\n')]
+    assert lines == [entry['text'] for entry in ENTRIES]
+    position = 0
+    for chunk in chunks:
+        count = chunk['text'].count('\n') + 1
+        first, last = ENTRIES[position], ENTRIES[position + count - 1]
+        assert (chunk['start'], chunk['end']) == (first['start'], last['start'] + last['duration'])
+        position += count
+    for previous, following in zip(chunks, chunks[1:]):
+        assert previous['end'] <= following['start']
+
+
+def test_chunk_skips_blank_lines_and_keeps_oversized_lines_whole():
+    chunks = chunk_transcript(['short', '  ', 'y' * 50, 'tail'], max_chars=20)
+
+    assert [chunk['text'] for chunk in chunks] == ['short', 'y' * 50, 'tail']
+    assert all(chunk['start'] is None and chunk['end'] is None for chunk in chunks)
+
+
+def test_reduce_weights_ratings_by_chunk_length(model):
+    missing = partial(5, 'c')
+    missing['finalVerdict']['clarityOfContent'] = 'n/a'
+
+    analysis = reduce_analyses([partial(2, 'a'), partial(4, 'b'), missing], [100, 300, 100])
+
+    assert analysis['finalVerdict']['emotionalImpact'] == round((2 * 100 + 4 * 300 + 5 * 100) / 500, 1)
+    # Unrated chunks drop out of the average rather than counting as zero
+    assert analysis['finalVerdict']['clarityOfContent'] == round((2 * 100 + 4 * 300) / 400, 1)
+    assert analysis['videoSummary']['overview'] == 'whole video'
+    assert len(model.prompts) == 1 and '"overview": "b"' in model.prompts[0]
+
+
+def test_single_partial_skips_the_reduce_call(model):
+    only = partial(3, 'only part')
+
+    analysis = reduce_analyses([only], [10])
+
+    assert analysis['videoSummary'] is only['videoSummary']
+    assert model.prompts == []
+
+
+def test_reduce_falls_back_to_merging_summaries(model):
+    model.fail_reduce = True
+    partials = [partial(3, 'first.', ['p1', 'p2'], ['n1'], ['s1', 's2', 's3']),
+                partial(4, 'second.', ['p2', 'p3', 'p4'], ['n1', 'n2', 'n3'], ['s3', 's4', 's5', 's6'])]
+
+    summary = reduce_analyses(partials, [1, 1])['videoSummary']
+
+    assert summary == {'overview': 'first. second.', 'positivePoints': ['p1', 'p2', 'p3'],
+                       'negativePoints': ['n1', 'n2'], 'suggestions': ['s1', 's2', 's3', 's4', 's5']}
+
+
+def test_chunked_analysis_maps_every_chunk_and_reduces(model):
+    analysis = analyze_transcript_chunked(ENTRIES, max_chars=120, max_workers=3, retries=0)
+
+    chunks = chunk_transcript(ENTRIES, max_chars=120)
+    assert analysis['chunks'] == len(chunks)
+    chunk_prompts = [prompt for prompt in model.prompts if 'consecutive parts' not in prompt]
+    assert sorted(int(re.search(r'part (\d+) of', p).group(1)) for p in chunk_prompts) == list(range(1, len(chunks) + 1))
+    for chunk in chunks:
+        assert any(f'"""{chunk["text"]}"""' in prompt for prompt in chunk_prompts)
+    # Part n rates n, so the verdict is the length-weighted mean of the part numbers
+    weights = [len(chunk['text']) for chunk in chunks]
+    expected = round(sum((i + 1) * w for i, w in enumerate(weights)) / sum(weights), 1)
+    assert analysis['finalVerdict'] == {key: expected for key in RATING_KEYS}
+    assert analysis['videoSummary']['overview'] == 'whole video'
+
+
+def test_chunked_analysis_rejects_empty_transcript(model):
+    with pytest.raises(ValueError):
+        analyze_transcript_chunked('\n  \n')
@@ -0,0 +1,27 @@
+import asyncio
+import io
+import json
+import time
+
+import batch_analyze
+
+
+def test_latency_is_measured_from_when_fetch_takes_the_video(monkeypatch):
+    def slow_stage(item):
+        time.sleep(0.05)
+        item['analysis'] = {}
+
+    monkeypatch.setattr(batch_analyze, '_stage_functions',
+                        lambda *args: {name: slow_stage for name in batch_analyze.STAGES})
+    output = io.StringIO()
+
+    summary = asyncio.run(batch_analyze.run_pipeline(
+        [f"video{i:06d}" for i in range(6)], output,
+        workers={'fetch': 1, 'compact': 1, 'analyze': 1, 'save': 1}))
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert summary['done'] == 6
+    # With one worker per stage the sixth video waits ~0.25s to be fetched;
+    # that wait must not show up in its latency
+    assert all(0.19 <= line['latency'] < 0.4 for line in lines)
+    assert summary['latency']['end_to_end']['p99'] < 0.4
@@ -0,0 +1,101 @@
+import json
+import os
+
+import pytest
+
+import batch_convert_vtt
+from batch_convert_vtt import MANIFEST_NAME, batch_convert
+
+VTT = """WEBVTT
+
+00:00:00.000 --> 00:00:02.000
+{first}
+
+00:00:02.000 --> 00:00:04.000
+{second}
+"""
+
+
+def write_vtt(path, first='नमस्ते दोस्तों', second='आज की क्लास'):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(VTT.format(first=first, second=second), encoding='utf-8')
+    return path
+
+
+@pytest.fixture
+def lectures(tmp_path):
+    source = tmp_path / 'lectures'
+    write_vtt(source / 'intro.vtt')
+    write_vtt(source / 'week1' / 'day.vtt', 'पहला दिन')
+    write_vtt(source / 'week2' / 'day.vtt', 'दूसरा दिन')
+    return source
+
+
+def test_outputs_keep_subdirectories_under_output_dir(lectures, tmp_path):
+    out = tmp_path / 'out'
+
+    summary = batch_convert([str(lectures)], workers=2, formats=('txt', 'srt'), output_dir=str(out))
+
+    assert (summary['converted'], summary['skipped'], summary['failed']) == (3, 0, 0)
+    produced = sorted(str(path.relative_to(out)) for path in out.rglob('*') if path.is_file() and path.name != MANIFEST_NAME)
+    assert produced == ['intro.srt', 'intro.txt', os.path.join('week1', 'day.srt'), os.path.join('week1', 'day.txt'),
+                        os.path.join('week2', 'day.srt'), os.path.join('week2', 'day.txt')]
+    assert 'पहला दिन' in (out / 'week1' / 'day.txt').read_text(encoding='utf-8')
+    assert 'दूसरा दिन' in (out / 'week2' / 'day.txt').read_text(encoding='utf-8')
+    assert not list(lectures.rglob('*.txt'))
+
+
+def test_glob_pattern_is_relative_to_its_fixed_prefix(lectures, tmp_path):
+    out = tmp_path / 'out'
+
+    batch_convert([str(lectures / 'week*' / '*.vtt')], workers=1, output_dir=str(out))
+
+    assert (out / 'week1' / 'day.txt').exists() and (out / 'week2' / 'day.txt').exists()
+
+
+def test_inputs_writing_the_same_output_are_rejected(lectures, tmp_path):
+    with pytest.raises(ValueError, match='would both write'):
+        batch_convert([str(lectures / 'week1'), str(lectures / 'week2')], workers=1, output_dir=str(tmp_path / 'out'))
+
+
+def test_hash_check_skips_unchanged_content(lectures, tmp_path):
+    out = tmp_path / 'out'
+
+    def run(formats=('txt',)):
+        summary = batch_convert([str(lectures)], workers=2, formats=formats, check='hash', output_dir=str(out))
+        return summary['converted'], summary['skipped']
+
+    assert run() == (3, 0)
+    manifest = json.loads((out / MANIFEST_NAME).read_text(encoding='utf-8'))
+    assert set(manifest) == {str(path) for path in lectures.rglob('*.vtt')}
+    assert all(entry['formats'] == ['txt'] and entry['collapse'] for entry in manifest.values())
+
+    # A newer mtime with the same bytes is still up to date
+    intro = lectures / 'intro.vtt'
+    os.utime(intro, (os.path.getmtime(intro) + 100,) * 2)
+    assert run() == (0, 3)
+
+    write_vtt(lectures / 'week1' / 'day.vtt', 'पहला दिन, दोबारा')
+    assert run() == (1, 2)
+    assert 'दोबारा' in (out / 'week1' / 'day.txt').read_text(encoding='utf-8')
+
+    # Asking for a format the manifest doesn't record converts everything again
+    assert run(('txt', 'srt')) == (3, 0)
+
+
+def test_worker_errors_are_reported_and_retried(lectures, tmp_path, capsys):
+    out = tmp_path / 'out'
+    broken = lectures / 'week2' / 'broken.vtt'
+    broken.write_bytes(b'WEBVTT\n\n00:00:00.000 --> 00:00:01.000\n\xff\xfe broken\n')
+
+    summary = batch_convert([str(lectures)], workers=2, check='hash', output_dir=str(out))
+
+    assert (summary['converted'], summary['failed']) == (3, 1)
+    assert f"Error converting {broken}:" in capsys.readouterr().out
+    assert str(broken) not in json.loads((out / MANIFEST_NAME).read_text(encoding='utf-8'))
+
+    # The failed file is not recorded, so the next run tries it again and the exit status reports it
+    assert batch_convert_vtt.main([str(lectures), '--check', 'hash', '--output-dir', str(out), '--workers', '1']) == 1
+    output = capsys.readouterr().out
+    assert f"Error converting {broken}:" in output
+    assert 'Converted: 0  Skipped (up to date): 3  Failed: 1' in output
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import time
+
+import bulk_ingest
+from bulk_ingest import TokenBucket, ingest
+from transcript_fetcher import TranscriptBackend, TranscriptUnavailable, is_transient
+
+
+class FlakyBackend(TranscriptBackend):
+    """Fails with the given errors in turn, then returns a transcript."""
+
+    name = 'flaky'
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def fetch(self, video_id, language):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {'language': language, 'is_generated': True, 'entries': [{'text': 'नमस्ते', 'start': 0, 'duration': 1}]}
+
+
+def run_ingest(tmp_path, monkeypatch, backend, retries=3):
+    monkeypatch.setenv('TRANSCRIPT_CACHE_DISABLE', '1')
+    monkeypatch.setattr(bulk_ingest, 'backoff_delay', lambda attempt: 0)
+    checkpoint = tmp_path / 'checkpoint.jsonl'
+    summary = asyncio.run(ingest(['abcdefghijk'], rate=1000, retries=retries, checkpoint_path=str(checkpoint),
+                                 backends=[backend]))
+    records = [json.loads(line) for line in checkpoint.read_text(encoding='utf-8').splitlines()]
+    return summary, records
+
+
+def test_missing_transcript_is_not_retried(tmp_path, monkeypatch):
+    backend = FlakyBackend([TranscriptUnavailable('No transcripts listed')] * 4)
+
+    summary, records = run_ingest(tmp_path, monkeypatch, backend)
+
+    assert backend.calls == 1
+    assert (summary['failed'], summary['retries']) == (1, 0)
+    assert records[0]['status'] == 'failed' and records[0]['attempts'] == 1
+
+
+def test_network_errors_are_retried(tmp_path, monkeypatch):
+    backend = FlakyBackend([ConnectionError('reset'), TimeoutError('timed out')])
+
+    summary, records = run_ingest(tmp_path, monkeypatch, backend)
+
+    assert backend.calls == 3
+    assert (summary['done'], summary['retries']) == (1, 2)
+    assert records[0]['status'] == 'done'
+
+
+def test_is_transient():
+    class HTTPError(Exception):
+        def __init__(self, status):
+            self.response = type('Response', (), {'status_code': status})()
+
+    assert is_transient(HTTPError(429)) and is_transient(HTTPError(503))
+    assert not is_transient(HTTPError(404))
+    assert is_transient(Exception('ERROR: unable to download webpage: HTTP Error 429: Too Many Requests'))
+    assert not is_transient(TranscriptUnavailable('no captions'))
+    assert is_transient(TranscriptUnavailable('one backend timed out', transient=True))
+
+
+def test_token_bucket_paces_acquisitions_without_holding_the_lock():
+    async def main():
+        bucket = TokenBucket(rate=20, capacity=1)
+        started = time.monotonic()
+        times = []
+
+        async def take():
+            await bucket.acquire()
+            times.append(time.monotonic() - started)
+
+        tasks = [asyncio.ensure_future(take()) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        # Waiters sleep outside the lock, so it is free while they wait
+        assert not bucket._lock.locked()
+        await asyncio.gather(*tasks)
+        return times
+
+    times = asyncio.run(main())
+
+    assert times[0] < 0.03
+    assert 0.18 <= times[-1] < 0.4
@@ -0,0 +1,52 @@
+import glob
+import os
+
+from caption_dedupe import CollapseStats, collapse_captions, collapse_segments
+from parse_vtt import iter_captions
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_rolling_cues_keep_only_new_words():
+    cues = [
+        (0, 2000, 'नमस्कार दोस्तों स्वागत है'),
+        (2000, 2010, 'नमस्कार दोस्तों स्वागत है'),  # 10 ms bridge cue
+        (2010, 4000, 'नमस्कार दोस्तों स्वागत है आज की खबरें'),
+        (4000, 6000, 'आज की खबरें शुरू करते हैं'),
+    ]
+    stats = CollapseStats()
+
+    segments = list(collapse_segments(cues, stats))
+
+    assert [text for _, _, text in segments] == ['नमस्कार दोस्तों स्वागत है', 'आज की खबरें', 'शुरू करते हैं']
+    assert stats.cues_in == 4
+    assert stats.segments_out == 3
+
+
+def test_segments_never_overlap():
+    cues = [(0, 3000, 'one two three'), (1000, 4000, 'two three four five'), (2500, 5000, 'six')]
+
+    segments = list(collapse_segments(cues))
+
+    for (_, end, _), (start, _, _) in zip(segments, segments[1:]):
+        assert end <= start
+
+
+def test_short_accidental_overlap_is_kept():
+    cues = [(0, 1000, 'यह बहुत अच्छा'), (1000, 2000, 'अच्छा है')]
+
+    segments = list(collapse_segments(cues))
+
+    assert [text for _, _, text in segments] == ['यह बहुत अच्छा', 'अच्छा है']
+
+
+def test_bundled_lecture_collapses():
+    vtt_file = glob.glob(os.path.join(glob.escape(ROOT), '*[[]-PAD2MYt0B0].hi.vtt'))[0]
+    stats = CollapseStats()
+
+    captions = list(collapse_captions(iter_captions(vtt_file), stats))
+
+    assert stats.cues_in == 1619
+    assert len(captions) == stats.segments_out == 810
+    assert stats.reduction_ratio > 2.5
+    assert [c['index'] for c in captions[:3]] == [1, 2, 3]
@@ -0,0 +1,44 @@
+from caption_store import CaptionStore
+
+CAPTIONS = [
+    {'index': i + 1, 'start': f"00:00:{i:02d}.000", 'end': f"00:00:{i:02d}.900", 'text': f"पंक्ति {i + 1}"}
+    for i in range(30)
+]
+
+
+def test_records_match_the_captions_it_was_built_from():
+    store = CaptionStore.from_captions(CAPTIONS)
+
+    assert len(store) == 30
+    assert list(store) == CAPTIONS
+    assert store[-1] == CAPTIONS[-1]
+
+
+def test_slices_keep_original_indices():
+    store = CaptionStore.from_captions(CAPTIONS)
+
+    window = store[10:20]
+
+    assert len(window) == 10
+    assert window[0] == CAPTIONS[10]
+    assert window[0]['index'] == 11
+    assert list(window) == CAPTIONS[10:20]
+    assert window[2:4][0]['index'] == 13
+
+
+def test_save_and_memory_map(tmp_path):
+    path = str(tmp_path / 'lecture.caps')
+    CaptionStore.from_captions(CAPTIONS).save(path)
+
+    with CaptionStore.load(path) as loaded:
+        assert list(loaded) == CAPTIONS
+        assert list(loaded.entries())[1] == {'text': 'पंक्ति 2', 'start': 1.0, 'duration': 0.9}
+
+
+def test_from_json3_skips_empty_events():
+    body = '{"events": [{"tStartMs": 0, "dDurationMs": 1500, "segs": [{"utf8": "नमस्ते"}]},' \
+           ' {"tStartMs": 1500, "segs": [{"utf8": "\\n"}]}]}'
+
+    store = CaptionStore.from_json3(body)
+
+    assert list(store) == [{'index': 1, 'start': '00:00:00.000', 'end': '00:00:01.500', 'text': 'नमस्ते'}]
@@ -0,0 +1,37 @@
+import pytest
+
+from caption_timestamps import format_timestamps, ms_to_timestamp, parse_timestamps, timestamp_to_ms
+
+
+def test_scalar_round_trip():
+    assert timestamp_to_ms('01:02:03.456') == 3723456
+    assert timestamp_to_ms('02:03,4') == 123400
+    assert ms_to_timestamp(3723456) == '01:02:03.456'
+    assert ms_to_timestamp(3723456, ',') == '01:02:03,456'
+
+
+def test_column_conversion_matches_scalar_helpers():
+    timestamps = ['00:00:00.000', '00:01:02.345', '12:34:56.789', '59:59.999', '00:00:01,500', '123:00:00.000']
+
+    ms = [int(value) for value in parse_timestamps(timestamps)]
+
+    assert ms == [timestamp_to_ms(ts) for ts in timestamps]
+    assert format_timestamps(ms) == [ms_to_timestamp(value) for value in ms]
+    assert format_timestamps(ms[:2], ',') == ['00:00:00,000', '00:01:02,345']
+
+
+def test_empty_columns():
+    assert list(parse_timestamps([])) == []
+    assert format_timestamps([]) == []
+
+
+def test_invalid_timestamp_is_rejected():
+    with pytest.raises(ValueError):
+        parse_timestamps(['00:00:01.000', '00:0a:01.000'])
+
+
+def test_fallback_without_numpy(monkeypatch):
+    monkeypatch.setattr('caption_timestamps._np', None)
+
+    assert parse_timestamps(['00:01:02.345', '59:59.999']) == [62345, 3599999]
+    assert format_timestamps([62345]) == ['00:01:02.345']
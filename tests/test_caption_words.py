@@ -0,0 +1,84 @@
+import glob
+import os
+
+from caption_dedupe import collapse_captions
+from caption_words import extract_words, parse_timed_line
+from parse_vtt import iter_captions
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+VTT = """WEBVTT
+Kind: captions
+Language: hi
+
+00:00:01.000 --> 00:00:03.000 align:start position:0%
+ 
+नमस्कार<00:00:01.500><c> दोस्तों,</c><00:00:02.000><c> स्वागत</c>
+
+00:00:03.000 --> 00:00:03.010 align:start position:0%
+नमस्कार दोस्तों, स्वागत
+ 
+
+00:00:03.010 --> 00:00:05.000 align:start position:0%
+नमस्कार दोस्तों, स्वागत
+है<00:00:04.000><c> आज</c>
+"""
+
+
+def test_parse_timed_line_splits_words_at_inline_timestamps():
+    words = parse_timed_line('नमस्कार<00:00:01.500><c> दोस्तों,</c><00:00:02.000><c> स्वागत</c>', 1000, 3000)
+
+    assert words == [[1000, 1500, 'नमस्कार'], [1500, 2000, 'दोस्तों,'], [2000, 3000, 'स्वागत']]
+
+
+def test_lines_without_timing_are_ignored():
+    assert parse_timed_line('नमस्कार दोस्तों, स्वागत', 3000, 3010) == []
+
+
+def test_extract_words_builds_searchable_timeline(tmp_path):
+    vtt_file = tmp_path / 'lecture.hi.vtt'
+    vtt_file.write_text(VTT, encoding='utf-8')
+
+    timeline = extract_words(str(vtt_file))
+
+    assert timeline.text == 'नमस्कार दोस्तों, स्वागत है आज'
+    assert timeline.word(timeline.word_at(1700)) == (1500, 2000, 'दोस्तों,')
+    assert timeline.word_at(500) is None
+    assert timeline.text_between(2000, 4500) == 'स्वागत है आज'
+    assert timeline.word_at_offset(timeline.text.index('आज')) == 4
+
+
+def test_untagged_single_word_cue_is_timed_over_the_cue(tmp_path):
+    vtt_file = tmp_path / 'lecture.hi.vtt'
+    vtt_file.write_text(VTT + """
+00:00:05.000 --> 00:00:05.010 align:start position:0%
+है आज
+ 
+
+00:00:05.010 --> 00:00:06.000 align:start position:0%
+है आज
+नहीं?
+
+00:00:06.000 --> 00:00:06.010 align:start position:0%
+नहीं?
+ 
+
+00:00:06.010 --> 00:00:08.000 align:start position:0%
+नहीं?
+L&amp;T<00:00:07.000><c> शेयर</c>
+""", encoding='utf-8')
+
+    timeline = extract_words(str(vtt_file))
+
+    assert timeline.text == 'नमस्कार दोस्तों, स्वागत है आज नहीं? L&T शेयर'
+    assert timeline.word(5) == (5010, 6000, 'नहीं?')
+
+
+def test_bundled_lecture_timeline_matches_collapsed_text():
+    vtt_file = glob.glob(os.path.join(glob.escape(ROOT), '*[[]-PAD2MYt0B0].hi.vtt'))[0]
+
+    timeline = extract_words(vtt_file)
+    collapsed = ' '.join(c['text'] for c in collapse_captions(iter_captions(vtt_file)))
+
+    assert len(timeline) == len(collapsed.split()) == 6430
+    assert timeline.text.split() == collapsed.split()
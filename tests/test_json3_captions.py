@@ -0,0 +1,38 @@
+import io
+import json
+
+import pytest
+
+from json3_captions import decode_json3, iter_json3_events, segments_to_entries
+
+BODY = json.dumps({
+    'wireMagic': 'pb3',
+    'events': [
+        {'tStartMs': 0, 'dDurationMs': 2000, 'segs': [{'utf8': 'नमस्कार'}, {'utf8': ' दोस्तों', 'tOffsetMs': 600}]},
+        {'tStartMs': 2000, 'dDurationMs': 10, 'aAppend': 1, 'segs': [{'utf8': '\n'}]},
+        {'tStartMs': 2010, 'dDurationMs': 1990, 'segs': [{'utf8': 'आज की खबरें'}]},
+        {'tStartMs': 4000, 'dDurationMs': 500},
+    ],
+}, ensure_ascii=False)
+
+
+def test_events_are_decoded_across_chunk_boundaries():
+    data = BODY.encode('utf-8')
+    # Three-byte chunks split Devanagari characters and the "events" key
+    chunks = [data[i:i + 3] for i in range(0, len(data), 3)]
+
+    assert list(iter_json3_events(chunks)) == json.loads(BODY)['events']
+    assert list(iter_json3_events(io.BytesIO(data), chunk_size=5)) == json.loads(BODY)['events']
+
+
+def test_decode_json3_skips_append_and_empty_events():
+    segments = list(decode_json3(BODY, word_offsets=True))
+
+    assert [s['text'] for s in segments] == ['नमस्कार दोस्तों', 'आज की खबरें']
+    assert segments[0]['words'] == [(0, 'नमस्कार'), (600, 'दोस्तों')]
+    assert segments_to_entries(segments)[1] == {'text': 'आज की खबरें', 'start': 2.01, 'duration': 1.99}
+
+
+def test_truncated_body_is_an_error():
+    with pytest.raises(ValueError):
+        list(iter_json3_events(BODY[:len(BODY) // 2]))
@@ -0,0 +1,91 @@
+import time
+
+import media_info_cache
+from media_info_cache import MediaInfoCache, best_audio_url, info_expiry, url_expiry
+from sqlite_store import SQLiteStore
+
+
+def signed(expire, path_form=False):
+    if path_form:
+        return f'https://manifest.googlevideo.com/api/manifest/hls_playlist/expire/{int(expire)}/ei/abc/id/x/file/index.m3u8'
+    return f'https://rr1.googlevideo.com/videoplayback?expire={int(expire)}&ei=abc&itag=140&sig=xyz'
+
+
+def info(expire, subtitle_expire=None):
+    subtitle_url = ('https://www.youtube.com/api/timedtext?v=abc&lang=hi&fmt=vtt'
+                    + (f'&expire={int(subtitle_expire)}' if subtitle_expire else ''))
+    return {
+        'id': 'abc', 'title': 'Lecture', 'duration': 3600, 'http_headers': {'User-Agent': 'x'},
+        'formats': [
+            {'format_id': '140', 'url': signed(expire), 'acodec': 'mp4a', 'vcodec': 'none', 'abr': 128},
+            {'format_id': '18', 'url': signed(expire + 600), 'acodec': 'mp4a', 'vcodec': 'avc1', 'tbr': 500},
+            {'format_id': 'sb0', 'acodec': 'none', 'vcodec': 'none'},
+        ],
+        'automatic_captions': {'hi': [{'ext': 'vtt', 'url': subtitle_url, 'name': 'Hindi'}]},
+    }
+
+
+def test_url_expiry_reads_query_and_path_forms():
+    assert url_expiry(signed(1700000000)) == 1700000000.0
+    assert url_expiry(signed(1700000000, path_form=True)) == 1700000000.0
+    assert url_expiry('https://rr1.googlevideo.com/videoplayback?itag=140') is None
+    assert url_expiry('https://rr1.googlevideo.com/videoplayback?expire=soon') is None
+    assert url_expiry(None) is None
+
+
+def test_info_expiry_is_the_earliest_url_expiry():
+    assert info_expiry(info(2000)) == 2000
+    assert info_expiry(info(2000, subtitle_expire=1500)) == 1500
+    assert info_expiry({'formats': [{'url': 'https://example.com/a.mp4'}]}, default_ttl=60, now=1000) == 1060
+
+
+def test_put_trims_and_get_hits_until_the_margin():
+    cache = MediaInfoCache(':memory:', margin=600)
+    now = time.time()
+
+    trimmed = cache.put('abc', info(now + 3600))
+
+    assert 'http_headers' not in trimmed
+    assert [fmt['format_id'] for fmt in trimmed['formats']] == ['140', '18']
+    assert cache.get('abc') == trimmed
+    assert best_audio_url(trimmed) == signed(now + 3600)
+
+    cache.put('late', info(now + 300))  # inside the safety margin already
+    assert cache.get('late') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['expired'], stats['entries']) == (1, 1, 1, 1)
+
+
+def test_expired_urls_are_extracted_again(monkeypatch):
+    clock = type('Clock', (), {'now': 1_700_000_000.0, 'time': lambda self: self.now})()
+    monkeypatch.setattr(media_info_cache, 'time', clock)
+    cache = MediaInfoCache(':memory:', margin=600)
+    extractions = []
+
+    def extract():
+        extractions.append(clock.now)
+        return info(clock.now + 3600)
+
+    first = cache.get_or_extract('abc', extract)
+    clock.now += 2000
+    assert cache.get_or_extract('abc', extract) == first
+    clock.now += 1000  # 600s before the earliest expire=, inside the margin
+    second = cache.get_or_extract('abc', extract)
+
+    assert extractions == [1_700_000_000.0, 1_700_003_000.0]
+    assert url_expiry(best_audio_url(second)) == 1_700_006_600.0
+    stats = cache.stats()
+    assert (stats['hits'], stats['expired'], stats['stores']) == (1, 1, 2)
+
+
+def test_default_cache_follows_the_environment(tmp_path, monkeypatch):
+    monkeypatch.setattr(SQLiteStore, '_defaults', {})
+    monkeypatch.setenv('MEDIA_CACHE_DISABLE', '1')
+    assert media_info_cache.default_cache() is None
+
+    monkeypatch.delenv('MEDIA_CACHE_DISABLE')
+    monkeypatch.setenv('MEDIA_CACHE_PATH', str(tmp_path / 'media.sqlite3'))
+    cache = media_info_cache.default_cache()
+    assert isinstance(cache, MediaInfoCache) and cache.path == str(tmp_path / 'media.sqlite3')
+    assert media_info_cache.default_cache() is cache
+    assert (tmp_path / 'media.sqlite3').exists()
@@ -0,0 +1,231 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from supadata_client import AsyncSupaDataClient, CircuitBreaker, SupaDataClient, SupaDataError
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers each request with the next scripted (status, headers, body) response."""
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        self.server.requests.append((self.command, self.path))
+        status, headers, body = self.server.responses.pop(0) if self.server.responses else (200, {}, {})
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = _respond
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.requests = []
+    server.responses = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(server, **options):
+    options.setdefault('backoff_base', 0.01)
+    return SupaDataClient('test-session', timeout=5, base_url=f"http://127.0.0.1:{server.server_port}", **options)
+
+
+def test_429_is_retried_after_retry_after(server):
+    server.responses = [(429, {'Retry-After': '1'}, {'error': 'slow down'}), (200, {}, {'id': 'T1'})]
+    client = make_client(server)
+
+    started = time.monotonic()
+    result = client.get_transcript('T1')
+
+    assert result == {'id': 'T1'}
+    assert time.monotonic() - started >= 1.0
+    assert len(server.requests) == 2
+    assert client.stats()['retries'] == 1
+
+
+def test_post_is_not_retried_on_500(server):
+    server.responses = [(500, {}, {'error': 'boom'}), (200, {}, {'id': 'T1'})]
+    client = make_client(server)
+
+    result = client.create_transcript('https://example.com/audio.m4a', name='YouTube_abc_hi')
+
+    assert result['status'] == 'error'
+    assert result['status_code'] == 500
+    assert result['never_sent'] is False
+    assert server.requests == [('POST', '/transcripts')]
+
+
+def test_post_is_retried_when_rejected_with_429(server):
+    server.responses = [(429, {}, {'error': 'slow down'}), (200, {}, {'id': 'T1'})]
+    client = make_client(server)
+
+    assert client.create_transcript('https://example.com/audio.m4a') == {'id': 'T1'}
+    assert len(server.requests) == 2
+
+
+def test_circuit_breaker_opens_half_opens_and_closes(server):
+    breaker = CircuitBreaker(failure_threshold=2, reset_after=0.2)
+    client = make_client(server, max_retries=0, breaker=breaker)
+    server.responses = [(500, {}, {}), (500, {}, {})]
+
+    client.get_transcript('T1')
+    assert breaker.state == 'closed'
+    client.get_transcript('T1')
+    assert breaker.state == 'open'
+
+    # While open, requests are refused without reaching the server
+    result = client.get_transcript('T1')
+    assert result['circuit_open'] is True
+    assert result['never_sent'] is True
+    assert len(server.requests) == 2
+
+    # After the cool-down one trial request goes through; a failure re-opens the circuit
+    time.sleep(0.25)
+    server.responses = [(503, {}, {})]
+    client.get_transcript('T1')
+    assert len(server.requests) == 3
+    assert breaker.state == 'open'
+
+    # A successful trial closes it again
+    time.sleep(0.25)
+    server.responses = [(200, {}, {'id': 'T1'})]
+    assert client.get_transcript('T1') == {'id': 'T1'}
+    assert breaker.state == 'closed'
+    assert client.stats()['circuit_opened'] == 2
+
+
+def test_half_open_circuit_lets_a_single_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_after=0.05)
+    assert breaker.record_failure() is True
+
+    time.sleep(0.06)
+    assert breaker.allow() is True
+    assert breaker.state == 'half_open'
+    assert breaker.allow() is False
+
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.allow() is True
+
+
+def test_half_open_trial_that_raises_reopens_the_circuit(server, monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_after=0.1)
+    client = make_client(server, max_retries=0, breaker=breaker)
+    server.responses = [(500, {}, {})]
+    client.get_transcript('T1')
+    assert breaker.state == 'open'
+
+    def broken_request(**kwargs):
+        raise RuntimeError('decoder bug')
+
+    time.sleep(0.15)
+    with monkeypatch.context() as patch:
+        patch.setattr(client.session, 'request', broken_request)
+        with pytest.raises(RuntimeError):
+            client.get_transcript('T1')
+    # Not stuck half-open: the circuit re-opened, and lets the next trial through after the cool-down
+    assert breaker.state == 'open'
+    time.sleep(0.15)
+    server.responses = [(200, {}, {'id': 'T1'})]
+    assert client.get_transcript('T1') == {'id': 'T1'}
+    assert breaker.state == 'closed'
+
+
+class SlowCalls:
+    """Stands in for a SupaDataClient method, recording how many calls overlap."""
+
+    def __init__(self, result, delay=0.05, watch=None):
+        self.result = result
+        self.delay = delay
+        self.watch = watch
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        self.max_watched = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, *args):
+        with self.lock:
+            self.calls.append(args)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            if self.watch is not None:
+                self.max_watched = max(self.max_watched, self.watch.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.running -= 1
+        return self.result(*args)
+
+
+def test_async_client_keeps_max_in_flight_requests_outstanding():
+    async def main():
+        async with AsyncSupaDataClient('test-session', max_in_flight=3, timeout=5) as client:
+            slow = SlowCalls(lambda tid: {'id': tid, 'status': 'completed'}, watch=client)
+            client.client.get_transcript = slow
+            results = await asyncio.gather(*(client.get_transcript(f'T{i}') for i in range(10)))
+            return client, slow, results
+
+    client, slow, results = asyncio.run(main())
+
+    assert [r['id'] for r in results] == [f'T{i}' for i in range(10)]
+    assert slow.max_running == 3
+    # The semaphore, not just the executor, holds the rest back
+    assert slow.max_watched == 3
+    assert client.in_flight == 0 and client.completed == 10
+
+
+def test_async_iter_transcripts_prefetches_pages():
+    listing = [{'id': f'T{i}'} for i in range(35)]
+
+    async def main():
+        async with AsyncSupaDataClient('test-session', max_in_flight=8, timeout=5) as client:
+            pages = SlowCalls(lambda limit, offset: {'data': listing[offset:offset + limit]})
+            client.client.list_transcripts = pages
+            items = [item async for item in client.iter_transcripts(page_size=10, prefetch=2)]
+            return pages, items
+
+    pages, items = asyncio.run(main())
+
+    assert items == listing
+    offsets = sorted(offset for _, offset in pages.calls)
+    assert offsets[:4] == [0, 10, 20, 30] and set(offsets) <= {0, 10, 20, 30, 40, 50}
+    # The first page and the two after it were requested together
+    assert pages.max_running >= 3
+
+
+def test_async_iter_transcripts_raises_on_a_failed_page():
+    def page(limit, offset):
+        if offset == 10:
+            return {'status': 'error', 'message': 'HTTP 502'}
+        return {'data': [{'id': f'T{offset + i}'} for i in range(limit)]}
+
+    async def main():
+        async with AsyncSupaDataClient('test-session', max_in_flight=4, timeout=5) as client:
+            client.client.list_transcripts = SlowCalls(page, delay=0.01)
+            seen = []
+            with pytest.raises(SupaDataError, match='HTTP 502'):
+                async for item in client.iter_transcripts(page_size=10, prefetch=1):
+                    seen.append(item['id'])
+            return seen
+
+    assert asyncio.run(main()) == [f'T{i}' for i in range(10)]
@@ -0,0 +1,98 @@
+import time
+from datetime import datetime, timezone
+
+from supadata_jobs import JobQueue, transcript_name
+
+
+class ListingClient:
+    def __init__(self, page):
+        self.page = page
+
+    def list_transcripts(self, limit=10, offset=0):
+        return self.page
+
+
+def stale_submitting(queue, video_id):
+    queue.enqueue(video_id)
+    queue.claim(video_id, 'hi')
+    queue._connect().execute("UPDATE jobs SET updated = ? WHERE video_id = ?", (time.time() - 3600, video_id))
+
+
+def test_recover_adopts_by_name_and_requeues_the_rest():
+    queue = JobQueue(':memory:')
+    stale_submitting(queue, 'a')
+    stale_submitting(queue, 'b')
+
+    result = queue.recover(ListingClient({'data': [{'id': 'T1', 'name': transcript_name('a', 'hi')}]}))
+
+    assert result == (1, 1)
+    assert queue.get('a', 'hi')['state'] == 'submitted' and queue.get('a', 'hi')['transcript_id'] == 'T1'
+    assert queue.get('b', 'hi')['state'] == 'queued'
+
+
+def test_recover_changes_nothing_when_listing_fails():
+    queue = JobQueue(':memory:')
+    stale_submitting(queue, 'a')
+
+    assert queue.recover(ListingClient({'status': 'error', 'message': '503 Service Unavailable'})) == (0, 0)
+    assert queue.get('a', 'hi')['state'] == 'submitting'
+
+
+def test_jobs_with_a_transcript_id_are_not_requeued():
+    queue = JobQueue(':memory:')
+    for video_id in ('a', 'b'):
+        queue.enqueue(video_id)
+        queue.claim(video_id, 'hi')
+    queue.release('a', 'hi', 'no audio URL')
+    queue.mark_failed('a', 'hi', 'no audio URL')
+    queue.mark_submitted('b', 'hi', 'T2')
+    queue.mark_failed('b', 'hi', 'Transcript processing failed')
+
+    assert queue.requeue('b') is False
+    assert queue.requeue_failed() == 1
+    assert queue.get('a', 'hi')['state'] == 'queued'
+    assert queue.get('b', 'hi')['state'] == 'failed'
+
+    assert queue.requeue_failed(resubmit=True) == 1
+    assert queue.get('b', 'hi')['state'] == 'queued' and queue.get('b', 'hi')['transcript_id'] is None
+
+
+class PagedListingClient:
+    """A newest-first listing of count transcripts, one created per minute before now."""
+
+    def __init__(self, count, now):
+        self.items = [{'id': f"T{i}", 'name': f"other_{i}",
+                       'created_at': datetime.fromtimestamp(now - 60 * i, timezone.utc).isoformat()}
+                      for i in range(count)]
+        self.offsets = []
+
+    def list_transcripts(self, limit=10, offset=0):
+        self.offsets.append(offset)
+        return {'data': self.items[offset:offset + limit]}
+
+
+def test_recover_pages_back_to_the_oldest_stale_job():
+    queue = JobQueue(':memory:')
+    stale_submitting(queue, 'a')
+    now = time.time()
+    queue._connect().execute("UPDATE jobs SET created = ?", (now - 3 * 3600,))
+    client = PagedListingClient(1000, now)
+    client.items[150]['name'] = transcript_name('a', 'hi')
+
+    assert queue.recover(client) == (1, 0)
+    assert queue.get('a', 'hi')['transcript_id'] == 'T150'
+    # Stops once the listing is older than the job (plus clock skew), not at the end
+    assert max(client.offsets) == 150
+
+
+def test_recover_leaves_jobs_older_than_the_listing_reach_unresolved():
+    queue = JobQueue(':memory:')
+    stale_submitting(queue, 'a')
+    stale_submitting(queue, 'b')
+    now = time.time()
+    queue._connect().execute("UPDATE jobs SET created = ? WHERE video_id = 'a'", (now - 30 * 60,))
+    queue._connect().execute("UPDATE jobs SET created = ? WHERE video_id = 'b'", (now - 10 * 3600,))
+
+    assert queue.recover(PagedListingClient(1000, now), max_pages=4) == (0, 1)
+    assert queue.get('a', 'hi')['state'] == 'queued'
+    assert queue.get('b', 'hi')['state'] == 'submitting'
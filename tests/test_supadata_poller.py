@@ -0,0 +1,159 @@
+import asyncio
+import time
+
+import pytest
+
+import supadata_poller
+from supadata_poller import TranscriptPoller, first_poll_delay, job_deadline, next_poll_delay
+
+
+class FakeClient:
+    """get_transcript answers each transcript ID from its script of statuses; the last one repeats."""
+
+    def __init__(self, scripts, latency=0.0):
+        self.scripts = {tid: list(statuses) for tid, statuses in scripts.items()}
+        self.latency = latency
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def get_transcript(self, transcript_id):
+        self.calls.append((transcript_id, time.monotonic()))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        script = self.scripts[transcript_id]
+        status = script.pop(0) if len(script) > 1 else script[0]
+        if status == 'completed':
+            return {'id': transcript_id, 'status': 'completed', 'content': f'text of {transcript_id}'}
+        if status == 'error':
+            return {'status': 'error', 'message': 'HTTP 503'}
+        return {'id': transcript_id, 'status': status}
+
+    def times(self, transcript_id):
+        return [at for tid, at in self.calls if tid == transcript_id]
+
+
+@pytest.fixture
+def fast(monkeypatch):
+    """Scale the schedule down to milliseconds and remove the jitter."""
+    monkeypatch.setattr(supadata_poller, 'REALTIME_FACTOR', 0.01)
+    monkeypatch.setattr(supadata_poller, 'MIN_INTERVAL', 0.01)
+    monkeypatch.setattr(supadata_poller, 'MAX_INTERVAL', 0.2)
+    monkeypatch.setattr(supadata_poller, 'BACKOFF', 2.0)
+    monkeypatch.setattr(supadata_poller, 'MIN_DEADLINE', 5.0)
+    monkeypatch.setattr(supadata_poller.random, 'uniform', lambda low, high: 1.0)
+
+
+def test_schedule_helpers():
+    assert first_poll_delay(None) == 2 * supadata_poller.MIN_INTERVAL
+    assert first_poll_delay(60) == 6.0
+    assert first_poll_delay(3600) == supadata_poller.MAX_INTERVAL
+    assert 1.5 * 0.9 <= next_poll_delay(1.0) <= 1.5 * 1.1
+    assert next_poll_delay(1000) <= supadata_poller.MAX_INTERVAL * 1.1
+    assert job_deadline(60) == supadata_poller.MIN_DEADLINE
+    assert job_deadline(3600) == 3 * 3600
+
+
+def test_first_checks_follow_the_duration_seeded_heap(fast):
+    client = FakeClient({'long': ['completed'], 'short': ['completed'], 'medium': ['completed']})
+
+    results = asyncio.run(TranscriptPoller(client).wait(
+        ['long', 'short', 'medium'], {'long': 10, 'short': 2, 'medium': 5}))
+
+    assert [tid for tid, _ in client.calls] == ['short', 'medium', 'long']
+    assert [r['transcript_id'] for r in results] == ['long', 'short', 'medium']
+    assert all(r['status'] == 'success' and r['checks'] == 1 for r in results)
+    assert results[1]['transcript']['content'] == 'text of short'
+
+
+def test_pending_checks_back_off_geometrically(fast):
+    client = FakeClient({'job': ['processing', 'queued', 'processing', 'processing', 'completed']})
+
+    [result] = asyncio.run(TranscriptPoller(client).wait(['job'], {'job': 2}))
+
+    assert result['status'] == 'success' and result['checks'] == 5
+    times = client.times('job')
+    gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+    # 0.04, 0.08, 0.16, then capped at MAX_INTERVAL
+    for gap, expected in zip(gaps, (0.04, 0.08, 0.16, 0.2)):
+        assert expected * 0.8 <= gap <= expected + 0.1
+
+
+def test_failed_job_is_terminal(fast):
+    client = FakeClient({'job': ['processing', 'failed', 'completed']})
+    seen = []
+
+    async def main():
+        poller = TranscriptPoller(client)
+        future = poller.track('job', 1, callback=seen.append)
+        await poller.run()
+        return future.result()
+
+    result = asyncio.run(main())
+
+    assert result['status'] == 'error' and result['transcript_status'] == 'failed'
+    assert result['checks'] == 2 and len(client.calls) == 2
+    assert seen == [result]
+
+
+def test_status_errors_give_up_only_when_consecutive(fast):
+    flaky = ['error'] * (supadata_poller.MAX_ERRORS - 1) + ['processing'] + ['error'] * 2 + ['completed']
+    client = FakeClient({'flaky': flaky, 'down': ['error']})
+
+    flaky_result, down_result = asyncio.run(TranscriptPoller(client).wait(['flaky', 'down'], {'flaky': 1, 'down': 1}))
+
+    assert flaky_result['status'] == 'success' and flaky_result['checks'] == len(flaky)
+    assert down_result['status'] == 'error' and 'transcript_status' not in down_result
+    assert down_result['message'] == 'HTTP 503' and down_result['checks'] == supadata_poller.MAX_ERRORS
+
+
+def test_job_times_out_at_its_deadline(fast, monkeypatch):
+    monkeypatch.setattr(supadata_poller, 'MIN_DEADLINE', 0.3)
+    client = FakeClient({'stuck': ['processing'], 'quick': ['processing', 'completed']})
+
+    stuck, quick = asyncio.run(TranscriptPoller(client).wait(['stuck', 'quick']))
+
+    assert quick['status'] == 'success'
+    assert stuck['status'] == 'timeout'
+    assert 0.3 <= stuck['elapsed'] < 0.6
+    # The last check is pulled in to the deadline rather than overshooting it
+    assert client.times('stuck')[-1] - client.times('stuck')[0] < 0.4
+
+
+def test_due_jobs_are_checked_in_bounded_batches(fast):
+    ids = [f'job{i}' for i in range(7)]
+    client = FakeClient({tid: ['completed'] for tid in ids}, latency=0.02)
+
+    async def main():
+        poller = TranscriptPoller(client, batch_size=3)
+        futures = [poller.track(tid, 1) for tid in ids]
+        assert poller.track('job0', 1) is futures[0]
+        await poller.run()
+        return poller, [future.result() for future in futures]
+
+    poller, results = asyncio.run(main())
+
+    assert client.max_in_flight == 3
+    assert poller.checks == len(ids) and all(r['status'] == 'success' for r in results)
+
+
+def test_job_tracked_while_running_is_picked_up(fast):
+    client = FakeClient({'slow': ['processing', 'processing', 'completed'], 'late': ['completed']})
+
+    async def main():
+        poller = TranscriptPoller(client)
+        slow = poller.track('slow', 10)  # first check after 0.1 s
+        runner = asyncio.ensure_future(poller.run())
+        await asyncio.sleep(0.01)
+        late = poller.track('late', 1)  # due after 0.01 s, well before slow
+        await runner
+        return slow.result(), late.result()
+
+    slow, late = asyncio.run(main())
+
+    assert slow['status'] == late['status'] == 'success'
+    assert client.calls[0][0] == 'late'
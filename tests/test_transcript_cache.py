@@ -0,0 +1,34 @@
+import time
+
+from transcript_cache import TranscriptCache
+
+RESULT = {'language': 'hi', 'is_generated': True, 'entries': [{'text': 'नमस्ते', 'start': 0.0, 'duration': 1.0}]}
+
+
+def test_request_string_hits_after_fetch():
+    cache = TranscriptCache(':memory:')
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return dict(RESULT)
+
+    assert cache.get_or_fetch('abc', 'hi,en', fetch)['cached'] is False
+    assert cache.get_or_fetch('abc', 'hi,en', fetch)['cached'] is True
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['stores']) == (1, 1, 1)
+
+
+def test_alias_to_expired_entry_counts_one_miss():
+    cache = TranscriptCache(':memory:', ttl=0.01)
+    cache.put('abc', RESULT, 'hi,en')
+    time.sleep(0.02)
+
+    assert cache.get_or_fetch('abc', 'hi,en', lambda: None) is None
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['expired']) == (0, 1, 1)
+    # The dangling alias is gone, so the next lookup is a plain miss
+    assert cache.get_requested('abc', 'hi,en') is None
+    assert cache.stats()['misses'] == 2
@@ -0,0 +1,14 @@
+from transcript_compaction import CompactionStats, compact_transcript, normalize_text
+
+
+def test_sound_tags_are_removed_but_other_brackets_are_content():
+    stats = CompactionStats()
+
+    text = compact_transcript('[संगीत]\n[Music] नमस्कार दोस्तों\n( applause )\n(x+y)² = [x+y][x+y]\nसंदर्भ [1] ♪♪', stats=stats)
+
+    assert text == 'नमस्कार दोस्तों\n(x+y)² = [x+y][x+y]\nसंदर्भ [1]'
+    assert stats.markers == 4
+
+
+def test_zero_width_characters_are_dropped():
+    assert normalize_text('न\u200bम\ufeffस्ते\u00ad') == 'नमस्ते'
@@ -0,0 +1,39 @@
+import io
+
+from parse_vtt import iter_captions
+from process_youtube_with_supadata import export_segments
+from transcript_export import export_transcript
+
+
+def test_vtt_cue_text_is_escaped(tmp_path):
+    captions = [
+        {'text': 'A --> B & <c>', 'start': 0.0, 'end': 1.0},
+        {'text': 'first line\n\nafter a blank line', 'start': 1.0, 'end': 2.0},
+    ]
+    path = tmp_path / 'out.vtt'
+
+    export_transcript(captions, {'vtt': str(path)})
+
+    assert path.read_text(encoding='utf-8') == (
+        "WEBVTT\n\n"
+        "00:00:00.000 --> 00:00:01.000\nA --&gt; B &amp; &lt;c&gt;\n\n"
+        "00:00:01.000 --> 00:00:02.000\nfirst line\nafter a blank line\n\n")
+    assert [c['text'] for c in iter_captions(str(path))] == ['A --> B & <c>', 'first line after a blank line']
+
+
+def test_srt_cue_text_has_no_blank_lines():
+    out = io.StringIO()
+
+    export_transcript([{'text': 'one\n\ntwo', 'start': 0.0, 'end': 1.5}], {'srt': out})
+
+    assert out.getvalue() == "1\n00:00:00,000 --> 00:00:01,500\none\ntwo\n\n"
+
+
+def test_supadata_segments_without_times_export():
+    segments = [{'text': 'no times'}, {'text': 'start only', 'start': 2.5}, {'text': 'both', 'start': 3, 'end': 4}]
+    out = io.StringIO()
+
+    export_transcript(export_segments(segments), {'vtt': out})
+
+    assert out.getvalue().splitlines()[2::3] == [
+        '00:00:00.000 --> 00:00:00.000', '00:00:02.500 --> 00:00:02.500', '00:00:03.000 --> 00:00:04.000']
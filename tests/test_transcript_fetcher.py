@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from transcript_fetcher import TranscriptBackend, TranscriptFetcher, TranscriptUnavailable
+
+RESULT = {'language': 'hi', 'is_generated': True, 'entries': [{'text': 'नमस्ते', 'start': 0.0, 'duration': 1.0}]}
+
+
+class FakeBackend(TranscriptBackend):
+    def __init__(self, name, delay=0.0, fail=False, hedge=True):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.hedge = hedge
+        self.calls = 0
+
+    def fetch(self, video_id, language):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise TranscriptUnavailable(f"{self.name} failed")
+        return dict(RESULT)
+
+
+def test_hedging_starts_the_next_free_backend():
+    slow, fast = FakeBackend('slow', delay=0.5), FakeBackend('fast')
+    with TranscriptFetcher([slow, fast], hedge_after=0.05, cache=False) as fetcher:
+        assert fetcher.fetch('abc')['backend'] == 'fast'
+
+
+def test_paid_backend_is_not_hedged_while_free_ones_run():
+    slow = FakeBackend('slow', delay=0.3)
+    paid = FakeBackend('paid', hedge=False)
+    with TranscriptFetcher([paid, slow], hedge_after=0.05, cache=False) as fetcher:
+        assert fetcher.fetch('abc')['backend'] == 'slow'
+    assert paid.calls == 0
+
+
+def test_paid_backend_runs_after_every_free_one_failed():
+    free = [FakeBackend('a', fail=True), FakeBackend('b', delay=0.1, fail=True)]
+    paid = FakeBackend('paid', hedge=False)
+    for hedge_after in (None, 0.01):
+        with TranscriptFetcher([paid] + free, hedge_after=hedge_after, cache=False) as fetcher:
+            assert fetcher.fetch('abc')['backend'] == 'paid'
+    assert [backend.calls for backend in free] == [2, 2]
+    assert paid.calls == 2
+
+
+def test_all_failures_are_reported():
+    backends = [FakeBackend('a', fail=True), FakeBackend('paid', fail=True, hedge=False)]
+    with TranscriptFetcher(backends, hedge_after=0.01, cache=False) as fetcher:
+        with pytest.raises(TranscriptUnavailable) as error:
+            fetcher.fetch('abc')
+    assert set(error.value.errors) == {'a', 'paid'}
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+import youtube_transcript_helper
+from youtube_transcript_helper import CAPTION_TRACKS_MARKER, _BalancedArrayScanner, fetch_caption_tracks
+
+TRACKS = [
+    {'baseUrl': 'https://www.youtube.com/api/timedtext?v=abc&lang=hi&x=]', 'languageCode': 'hi',
+     'name': {'simpleText': 'Hindi "auto" [generated] \\ {x}'}, 'kind': 'asr'},
+    {'baseUrl': 'https://www.youtube.com/api/timedtext?v=abc&lang=en', 'languageCode': 'en',
+     'name': {'simpleText': 'English'}},
+]
+TRACKS_JSON = json.dumps(TRACKS).encode('utf-8')
+PAGE = (b'<html><script>var ytInitialPlayerResponse = {"captions":{"playerCaptionsTracklistRenderer":'
+        b'{' + CAPTION_TRACKS_MARKER + TRACKS_JSON + b',"audioTracks":[]}}};</script>' + b'x' * 5000 + b'</html>')
+
+
+class FakeResponse:
+    def __init__(self, chunks, status_code=200):
+        self.chunks = chunks
+        self.status_code = status_code
+        self.consumed = 0
+        self.closed = False
+        self.raw = self
+
+    def iter_content(self, chunk_size):
+        for chunk in self.chunks:
+            self.consumed += 1
+            yield chunk
+
+    def tell(self):
+        return sum(len(chunk) for chunk in self.chunks[:self.consumed])
+
+    def close(self):
+        self.closed = True
+
+
+def fetch_with_chunks(monkeypatch, chunks, status_code=200):
+    response = FakeResponse(chunks, status_code)
+    session = type('Session', (), {'get': lambda self, url, **kwargs: response})()
+    monkeypatch.setattr(youtube_transcript_helper, 'get_session', lambda: session)
+    tracks, stats = fetch_caption_tracks('abcdefghijk')
+    assert response.closed
+    return tracks, stats, response
+
+
+def split_at(data, *positions):
+    bounds = [0, *positions, len(data)]
+    return [data[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def test_tracks_are_parsed_and_the_rest_of_the_page_is_not_read(monkeypatch):
+    chunks = split_at(PAGE, len(PAGE) - 4000, len(PAGE) - 2000)
+
+    tracks, stats, response = fetch_with_chunks(monkeypatch, chunks)
+
+    assert tracks == TRACKS
+    assert response.consumed == 1 and not stats['read_full_page']
+
+
+@pytest.mark.parametrize('label, offset', [
+    ('inside a string', PAGE.index(b'Hindi') + 3),
+    ('inside an escape sequence', PAGE.index(b'\\"auto') + 1),
+    ('on an escaped backslash', PAGE.index(b'\\\\') + 1),
+    ('on a bracket inside a string', PAGE.index(b'[generated') + 1),
+    ('inside the marker', PAGE.index(CAPTION_TRACKS_MARKER) + 5),
+    ('between "captionTracks": and [', PAGE.index(CAPTION_TRACKS_MARKER) + len(CAPTION_TRACKS_MARKER)),
+])
+def test_chunk_boundaries(monkeypatch, label, offset):
+    tracks, _, _ = fetch_with_chunks(monkeypatch, split_at(PAGE, offset))
+
+    assert tracks == TRACKS, label
+
+
+def test_every_byte_in_its_own_chunk(monkeypatch):
+    tracks, _, _ = fetch_with_chunks(monkeypatch, [PAGE[i:i + 1] for i in range(len(PAGE))])
+
+    assert tracks == TRACKS
+
+
+def test_page_without_captions(monkeypatch):
+    page = b'<html><script>var ytInitialPlayerResponse = {"playabilityStatus":{}};</script></html>'
+
+    tracks, stats, _ = fetch_with_chunks(monkeypatch, split_at(page, 20, 40))
+
+    assert tracks is None
+    assert stats['read_full_page'] and stats['bytes_read'] == len(page)
+
+
+def test_error_status_returns_no_tracks(monkeypatch):
+    tracks, stats, _ = fetch_with_chunks(monkeypatch, [PAGE], status_code=429)
+
+    assert tracks is None and stats['status_code'] == 429
+
+
+def test_scanner_resumes_across_feeds():
+    scanner = _BalancedArrayScanner()
+    data = bytearray(b'[{"a": "]\\"}"}, [1]]tail')
+
+    assert scanner.feed(data[:9]) == -1
+    assert scanner.feed(data, 9) == data.index(b'tail')
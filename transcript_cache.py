@@ -0,0 +1,183 @@
+"""
+Persistent transcript cache shared by every fetch path.
+
+Transcripts are stored in SQLite keyed by (video_id, language_code,
+is_generated), zlib-compressed, with a TTL and LRU eviction once the
+stored size passes max_bytes. A request such as "hi, else en" is also
+remembered as an alias to the track it resolved to, so repeated requests
+for a video whose Hindi track is missing are still served from cache.
+Hit/miss counters are kept in the database, so they add up across the
+CLI, the Flask API and any worker processes using the same file.
+
+Set TRANSCRIPT_CACHE_PATH to move the database, or TRANSCRIPT_CACHE_DISABLE=1
+to turn caching off.
+"""
+import json
+import os
+import time
+import zlib
+
+from sqlite_store import SQLiteStore
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'transcripts.sqlite3')
+DEFAULT_TTL = 7 * 24 * 3600  # seconds
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+UNKNOWN_KIND = -1  # is_generated not reported by the backend
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    video_id TEXT NOT NULL,
+    language_code TEXT NOT NULL,
+    is_generated INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (video_id, language_code, is_generated)
+);
+CREATE INDEX IF NOT EXISTS transcripts_accessed ON transcripts (accessed);
+CREATE TABLE IF NOT EXISTS aliases (
+    video_id TEXT NOT NULL,
+    requested TEXT NOT NULL,
+    language_code TEXT NOT NULL,
+    is_generated INTEGER NOT NULL,
+    PRIMARY KEY (video_id, requested)
+);
+"""
+
+
+def _kind(is_generated):
+    return UNKNOWN_KIND if is_generated is None else int(bool(is_generated))
+
+
+class TranscriptCache(SQLiteStore):
+    """SQLite-backed transcript cache; safe to share between threads and processes."""
+
+    SCHEMA = SCHEMA
+    TABLE = 'transcripts'
+    SIZED = True
+    COUNTERS = ('hits', 'misses', 'stores', 'evictions', 'expired')
+    ENV_PREFIX = 'TRANSCRIPT_CACHE'
+    DEFAULT_PATH = DEFAULT_PATH
+
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        super().__init__(path)
+
+    def get(self, video_id, language_code, is_generated=None, count=True):
+        """
+        Return a cached transcript dict or None.
+
+        With is_generated=None any kind matches, manual tracks first.
+        count=False leaves the hit/miss counters to the caller.
+        """
+        conn = self._connect()
+        now = time.time()
+        query = ("SELECT is_generated, payload, created FROM transcripts "
+                 "WHERE video_id = ? AND language_code = ?")
+        params = [video_id, language_code]
+        if is_generated is not None:
+            query += " AND is_generated = ?"
+            params.append(_kind(is_generated))
+        query += " ORDER BY is_generated = 1, is_generated"
+
+        for kind, payload, created in conn.execute(query, params).fetchall():
+            if now - created > self.ttl:
+                conn.execute("DELETE FROM transcripts WHERE video_id = ? AND language_code = ? AND is_generated = ?",
+                             (video_id, language_code, kind))
+                self._count(conn, 'expired')
+                continue
+            conn.execute("UPDATE transcripts SET accessed = ? WHERE video_id = ? AND language_code = ? "
+                         "AND is_generated = ?", (now, video_id, language_code, kind))
+            if count:
+                self._count(conn, 'hits')
+            result = json.loads(zlib.decompress(payload))
+            result['cached'] = True
+            return result
+
+        if count:
+            self._count(conn, 'misses')
+        return None
+
+    def put(self, video_id, result, requested=None):
+        """
+        Store a fetch result ({'language', 'is_generated', 'entries', ...}).
+
+        requested, if given, records which request string resolved to this
+        track (e.g. 'hi,en') for get_requested().
+        """
+        conn = self._connect()
+        now = time.time()
+        result = {k: v for k, v in result.items() if k != 'cached'}
+        payload = zlib.compress(json.dumps(result, ensure_ascii=False).encode('utf-8'), 6)
+        kind = _kind(result.get('is_generated'))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (video_id, result['language'], kind, payload, len(payload), now, now))
+            if requested:
+                conn.execute("INSERT OR REPLACE INTO aliases VALUES (?, ?, ?, ?)",
+                             (video_id, requested, result['language'], kind))
+            self._count(conn, 'stores')
+            self._evict(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        rows = conn.execute("SELECT video_id, language_code, is_generated, size FROM transcripts "
+                            "ORDER BY accessed").fetchall()
+        for video_id, language_code, kind, size in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM transcripts WHERE video_id = ? AND language_code = ? AND is_generated = ?",
+                         (video_id, language_code, kind))
+            total -= size
+            evicted += 1
+        self._count(conn, 'evictions', evicted)
+
+    def get_requested(self, video_id, requested):
+        """Return the transcript a previous request string resolved to, or None."""
+        conn = self._connect()
+        row = conn.execute("SELECT language_code, is_generated FROM aliases WHERE video_id = ? AND requested = ?",
+                           (video_id, requested)).fetchone()
+        result = None
+        if row is not None:
+            language_code, kind = row
+            result = self.get(video_id, language_code, None if kind == UNKNOWN_KIND else bool(kind), count=False)
+            if result is None:
+                # The entry expired or was evicted; drop the alias along with it
+                conn.execute("DELETE FROM aliases WHERE video_id = ? AND requested = ?", (video_id, requested))
+        # One lookup, one hit or miss, however many tables it went through
+        self._count(conn, 'hits' if result is not None else 'misses')
+        return result
+
+    def get_or_fetch(self, video_id, requested, fetch):
+        """Return the cached result for requested, or call fetch() and cache what it returns."""
+        result = self.get_requested(video_id, requested)
+        if result is not None:
+            return result
+        result = fetch()
+        if result is not None and result.get('entries'):
+            self.put(video_id, result, requested)
+            result['cached'] = False
+        return result
+
+    def purge_expired(self):
+        """Delete entries older than the TTL and return how many were removed."""
+        conn = self._connect()
+        removed = conn.execute("DELETE FROM transcripts WHERE created < ?", (time.time() - self.ttl,)).rowcount
+        self._count(conn, 'expired', removed)
+        return removed
+
+
+def default_cache():
+    """Return the process-wide cache, or None if TRANSCRIPT_CACHE_DISABLE is set."""
+    return TranscriptCache.default()
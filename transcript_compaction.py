@@ -0,0 +1,159 @@
+"""
+Shrink a transcript before it is put into an analysis prompt.
+
+Auto-captions carry text that costs tokens without telling the model
+anything: [संगीत]/[Music] sound tags, empty cues, lines repeated by the
+rolling layout, stray whitespace and inconsistent danda punctuation. Each
+compaction step removes one kind of noise; the default steps never touch
+spoken words, so everything the rubric is judged on (content, structure,
+promotional mentions for commercial balance) survives. The optional
+'fillers' step also drops standalone hesitation sounds.
+"""
+import re
+import unicodedata
+
+DEFAULT_STEPS = ('markers', 'normalize', 'dedupe')
+ALL_STEPS = DEFAULT_STEPS + ('fillers',)
+DEDUPE_WINDOW = 5  # lines a repeat is looked for in
+
+# Sound-tag words YouTube and caption authors put in brackets, e.g. [संगीत], [Music], (applause)
+SOUND_TAGS = ('संगीत', 'तालियां', 'तालियाँ', 'हंसी', 'हँसी', 'प्रशंसा', 'music', 'applause', 'laughter',
+              'cheering', 'cheers', 'silence', 'inaudible', 'noise')
+# Only those tags (and music notes) are removed; other bracketed text such as [x+y] or a citation is content
+MARKER_RE = re.compile(r'[\[(]\s*(?:%s)\s*[\])]|[♪♫]+' % '|'.join(SOUND_TAGS), re.IGNORECASE)
+# Hesitation sounds only; words like तो/अच्छा/मतलब often carry meaning and are kept
+FILLERS = frozenset(('उम्म', 'अम्म', 'हम्म', 'ऊं', 'अं', 'um', 'umm', 'uh', 'uhh', 'hmm', 'er', 'erm'))
+
+_ZERO_WIDTH_RE = re.compile('[\u200b\ufeff\u00ad]')
+_PIPE_DANDA_RE = re.compile(r'(?<=[ऀ-ॿ])\s*\|(?!\|)')
+_DOUBLE_DANDA_RE = re.compile(r'।\s*।|\|\|')
+_SPACE_BEFORE_PUNCT_RE = re.compile(r'\s+([।॥,?!.:;])')
+_REPEATED_PUNCT_RE = re.compile(r'([।॥,?!])\1+')
+_WHITESPACE_RE = re.compile(r'\s+')
+_WORD_EDGE_PUNCT = '.,!?;:।॥"\'-…'
+
+
+def estimate_tokens(text):
+    """
+    Rough token count: ~4 ASCII characters per token, ~2 for Devanagari and
+    other scripts, which tokenizers split much more finely.
+    """
+    ascii_chars = sum(1 for ch in text if ch < '\x80')
+    return round(ascii_chars / 4 + (len(text) - ascii_chars) / 2)
+
+
+class CompactionStats:
+    """Counters describing what a compaction pass removed."""
+
+    def __init__(self):
+        self.lines_in = 0
+        self.lines_out = 0
+        self.chars_in = 0
+        self.chars_out = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.markers = 0
+        self.duplicates = 0
+        self.fillers = 0
+
+    @property
+    def chars_saved(self):
+        return self.chars_in - self.chars_out
+
+    @property
+    def tokens_saved(self):
+        return self.tokens_in - self.tokens_out
+
+    def to_dict(self):
+        return {
+            'lines_in': self.lines_in,
+            'lines_out': self.lines_out,
+            'chars_in': self.chars_in,
+            'chars_out': self.chars_out,
+            'chars_saved': self.chars_saved,
+            'tokens_in': self.tokens_in,
+            'tokens_out': self.tokens_out,
+            'tokens_saved': self.tokens_saved,
+            'markers': self.markers,
+            'duplicates': self.duplicates,
+            'fillers': self.fillers,
+        }
+
+    def __str__(self):
+        percent = 100 * self.chars_saved / self.chars_in if self.chars_in else 0.0
+        return (f"{self.lines_in} -> {self.lines_out} lines, {self.chars_in} -> {self.chars_out} chars "
+                f"({percent:.1f}% saved, ~{self.tokens_saved} tokens); {self.markers} markers, "
+                f"{self.duplicates} duplicates, {self.fillers} fillers dropped")
+
+
+def normalize_text(text):
+    """NFC-normalize, drop zero-width characters, tidy danda punctuation and whitespace."""
+    text = _ZERO_WIDTH_RE.sub('', unicodedata.normalize('NFC', text))
+    text = _DOUBLE_DANDA_RE.sub('॥', text)
+    text = _PIPE_DANDA_RE.sub('।', text)
+    text = _SPACE_BEFORE_PUNCT_RE.sub(r'\1', text)
+    text = _REPEATED_PUNCT_RE.sub(r'\1', text)
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+def _drop_fillers(text, fillers, stats):
+    words = []
+    for word in text.split():
+        if word.strip(_WORD_EDGE_PUNCT).lower() in fillers:
+            stats.fillers += 1
+        else:
+            words.append(word)
+    return ' '.join(words)
+
+
+def compact_lines(lines, steps=DEFAULT_STEPS, stats=None, fillers=FILLERS):
+    """
+    Lazily compact an iterable of transcript lines (or entries).
+
+    Items are plain strings or dicts with a 'text' key (youtube_transcript_api
+    entries, caption records); dicts are yielded as copies with the new text,
+    so timings survive. Lines that end up empty are dropped.
+    """
+    if stats is None:
+        stats = CompactionStats()
+    unknown = set(steps) - set(ALL_STEPS)
+    if unknown:
+        raise ValueError(f"Unknown compaction steps: {', '.join(sorted(unknown))}")
+
+    recent = []
+    for item in lines:
+        text = item if isinstance(item, str) else item['text']
+        stats.lines_in += 1
+        stats.chars_in += len(text)
+        stats.tokens_in += estimate_tokens(text)
+
+        if 'markers' in steps:
+            text, count = MARKER_RE.subn(' ', text)
+            stats.markers += count
+        if 'normalize' in steps:
+            text = normalize_text(text)
+        if 'fillers' in steps:
+            text = _drop_fillers(text, fillers, stats)
+        text = text.strip()
+        if not text:
+            continue
+        if 'dedupe' in steps:
+            key = text.casefold()
+            if key in recent:
+                stats.duplicates += 1
+                continue
+            recent.append(key)
+            if len(recent) > DEDUPE_WINDOW:
+                recent.pop(0)
+
+        stats.lines_out += 1
+        stats.chars_out += len(text)
+        stats.tokens_out += estimate_tokens(text)
+        yield text if isinstance(item, str) else {**item, 'text': text}
+
+
+def compact_transcript(transcript, steps=DEFAULT_STEPS, stats=None, fillers=FILLERS):
+    """Compact plain text (one segment per line) or a list of entries; returns the same kind."""
+    if isinstance(transcript, str):
+        return "\n".join(compact_lines(transcript.splitlines(), steps, stats, fillers))
+    return list(compact_lines(transcript, steps, stats, fillers))
@@ -0,0 +1,143 @@
+"""
+Single-pass transcript export to txt, srt, vtt, jsonl and json.
+
+export_transcript walks the captions once, a batch at a time: each batch
+gets its timestamps converted and formatted in one vectorised call per
+column and is appended to every requested output with a single buffered
+write, so asking for five formats costs one parse rather than five.
+
+Captions can be parse_vtt records ('start'/'end' as "HH:MM:SS.mmm"),
+records that already carry 'start_ms'/'end_ms', or fetcher entries with
+'start' (and 'end' or 'duration') in seconds.
+"""
+import json
+import os
+import sys
+from itertools import islice
+
+from caption_timestamps import format_timestamps, parse_timestamps
+
+FORMATS = ('txt', 'srt', 'vtt', 'jsonl', 'json')
+BATCH_SIZE = 1024
+BUFFER_SIZE = 1 << 16
+
+
+def _timed_batches(captions, batch_size=BATCH_SIZE):
+    """Yield (batch, starts_ms, ends_ms) for successive batches of captions."""
+    captions = iter(captions)
+    while True:
+        batch = list(islice(captions, batch_size))
+        if not batch:
+            return
+        first = batch[0]
+        if 'start_ms' in first:
+            starts = [c['start_ms'] for c in batch]
+            ends = [c['end_ms'] for c in batch]
+        elif isinstance(first['start'], str):
+            starts = parse_timestamps([c['start'] for c in batch])
+            ends = parse_timestamps([c['end'] for c in batch])
+            starts = starts if isinstance(starts, list) else starts.tolist()
+            ends = ends if isinstance(ends, list) else ends.tolist()
+        else:
+            starts = [round(c['start'] * 1000) for c in batch]
+            ends = [round(c['end'] * 1000) if 'end' in c else round((c['start'] + c.get('duration', 0)) * 1000)
+                    for c in batch]
+        yield batch, starts, ends
+
+
+def output_paths(base_path, formats):
+    """Map each format to base_path plus its extension."""
+    return {fmt: f"{base_path}.{fmt}" for fmt in formats}
+
+
+def _cue_text(text):
+    """Drop blank lines from cue text; a blank line would end the cue early."""
+    if '\n' not in text and '\r' not in text:
+        return text
+    return '\n'.join(line for line in text.splitlines() if line.strip())
+
+
+def _vtt_text(text):
+    """Escape cue text for WebVTT, so markup characters and '-->' are read as text."""
+    return _cue_text(text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;'))
+
+
+def _json_record(index, caption, start, end, start_ms, end_ms):
+    return json.dumps({
+        'index': index,
+        'start': start,
+        'end': end,
+        'start_ms': start_ms,
+        'end_ms': end_ms,
+        'text': caption['text']
+    }, ensure_ascii=False)
+
+
+def export_transcript(captions, outputs, source_name=None, batch_size=BATCH_SIZE):
+    """
+    Write captions to every output in one pass and return the caption count.
+
+    outputs maps a format from FORMATS to a path or an open text file
+    (e.g. {'txt': 'a.txt', 'jsonl': sys.stdout}). The jsonl output is
+    flushed after every batch so readers can consume it while the export
+    is still running.
+    """
+    unknown = set(outputs) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Unsupported export format(s): {', '.join(sorted(unknown))}")
+
+    files = {}
+    owned = []
+    try:
+        for fmt, target in outputs.items():
+            if isinstance(target, (str, os.PathLike)):
+                target = open(target, 'w', encoding='utf-8', buffering=BUFFER_SIZE)
+                owned.append(target)
+            files[fmt] = target
+
+        if 'txt' in files:
+            files['txt'].write(f"Transcript from: {source_name or 'transcript'}\n" + "=" * 80 + "\n\n")
+        if 'vtt' in files:
+            files['vtt'].write("WEBVTT\n\n")
+        if 'json' in files:
+            files['json'].write("[")
+
+        count = 0
+        for batch, starts_ms, ends_ms in _timed_batches(captions, batch_size):
+            starts = format_timestamps(starts_ms)
+            ends = format_timestamps(ends_ms)
+            first = count + 1
+            rows = list(zip(range(first, first + len(batch)), batch, starts, ends, starts_ms, ends_ms))
+
+            if 'txt' in files:
+                files['txt'].write(''.join(f"[{s} --> {e}]\n{c['text']}\n\n" for _, c, s, e, _, _ in rows))
+            if 'vtt' in files:
+                files['vtt'].write(''.join(
+                    f"{s} --> {e}\n{_vtt_text(c['text'])}\n\n" for _, c, s, e, _, _ in rows))
+            if 'srt' in files:
+                srt_starts = format_timestamps(starts_ms, ',')
+                srt_ends = format_timestamps(ends_ms, ',')
+                files['srt'].write(''.join(
+                    f"{i}\n{s} --> {e}\n{_cue_text(c['text'])}\n\n"
+                    for (i, c, *_), s, e in zip(rows, srt_starts, srt_ends)))
+            if 'jsonl' in files or 'json' in files:
+                records = [_json_record(*row) for row in rows]
+                if 'jsonl' in files:
+                    files['jsonl'].write('\n'.join(records) + '\n')
+                    files['jsonl'].flush()
+                if 'json' in files:
+                    files['json'].write(('\n' if count == 0 else ',\n') + ',\n'.join(records))
+
+            count += len(batch)
+
+        if 'json' in files:
+            files['json'].write("\n]\n" if count else "]\n")
+        return count
+    finally:
+        for f in owned:
+            f.close()
+
+
+def stream_jsonl(captions, out=None, batch_size=64):
+    """Stream captions as JSON Lines to out (stdout by default), flushing every batch."""
+    return export_transcript(captions, {'jsonl': out or sys.stdout}, batch_size=batch_size)
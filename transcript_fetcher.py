@@ -0,0 +1,353 @@
+"""
+Unified transcript fetcher with pluggable backends.
+
+Every backend returns the youtube_transcript_api entry shape
+({'text', 'start', 'duration'} in seconds), so callers don't care where a
+transcript came from. TranscriptFetcher tries backends in a configurable
+order. In hedged mode the next backend is started as soon as the current
+one has been running longer than hedge_after seconds (or has failed), and
+the first success wins, so one slow backend no longer adds its whole
+timeout to every request. Backends that cost money (SupaData) are never
+part of the race: they run one at a time, only after every other backend
+has failed. Per-backend latency and success counts are kept for every
+attempt.
+"""
+import re
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class TranscriptUnavailable(Exception):
+    """
+    Raised when no backend could produce a transcript.
+
+    transient is True when at least one backend failed for a reason that
+    may go away (network error, HTTP 429 or 5xx) rather than because the
+    video has no suitable transcript; only then is retrying worthwhile.
+    """
+
+    def __init__(self, message, errors=None, transient=False):
+        super().__init__(message)
+        self.errors = errors or {}
+        self.transient = transient
+
+
+# youtube_transcript_api errors that mean "try again later" rather than "no transcript"
+TRANSIENT_ERROR_NAMES = frozenset(('TooManyRequests', 'RequestBlocked', 'IpBlocked', 'YouTubeRequestFailed'))
+_TRANSIENT_HTTP_RE = re.compile(r'HTTP Error (?:429|5\d\d)')
+
+
+def is_transient(error):
+    """True if error is worth retrying: a network failure, timeout, HTTP 429 or 5xx."""
+    if isinstance(error, TranscriptUnavailable):
+        return error.transient
+    if isinstance(error, (ConnectionError, TimeoutError)) or type(error).__name__ in TRANSIENT_ERROR_NAMES:
+        return True
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None) or getattr(error, 'code', None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    try:
+        import requests
+    except ImportError:
+        pass
+    else:
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True
+    import urllib.error
+    if isinstance(error, urllib.error.URLError):
+        return True
+    # yt-dlp reports HTTP failures in its DownloadError message
+    return bool(_TRANSIENT_HTTP_RE.search(str(error)))
+
+
+class TranscriptBackend:
+    """Base class: subclasses set name and implement fetch()."""
+
+    name = 'backend'
+    hedge = True  # False for paid backends, which must never be started speculatively
+
+    def fetch(self, video_id, language):
+        """Return {'language', 'is_generated', 'entries'} or raise TranscriptUnavailable."""
+        raise NotImplementedError
+
+
+class YouTubeTranscriptApiBackend(TranscriptBackend):
+    """youtube_transcript_api, preferring the requested language and then English."""
+
+    name = 'youtube_transcript_api'
+
+    def fetch(self, video_id, language):
+        from transcript_languages import fetch_preferred_transcript
+
+        # The fetcher caches whole results itself
+        result = fetch_preferred_transcript(video_id, [language, 'en'], cache=False)
+        if result is None:
+            raise TranscriptUnavailable(f"No transcripts listed for {video_id}")
+        return result
+
+
+class CaptionTracksBackend(TranscriptBackend):
+    """Scrape captionTracks from the watch page (youtube_transcript_helper)."""
+
+    name = 'caption_tracks'
+
+    def fetch(self, video_id, language):
+        import youtube_transcript_helper
+        from json3_captions import segments_to_entries
+
+        result = youtube_transcript_helper.get_transcript(video_id, language)
+        if 'error' in result:
+            raise TranscriptUnavailable(result['error'])
+        entries = segments_to_entries(result['segments'])
+        if not entries:
+            raise TranscriptUnavailable(f"Empty {language} caption track for {video_id}")
+        return {'language': language, 'is_generated': None, 'entries': entries}
+
+
+class YtDlpBackend(TranscriptBackend):
+    """Subtitles or automatic captions located by yt-dlp, decoded in memory."""
+
+    name = 'yt_dlp'
+
+    def fetch(self, video_id, language):
+        from ytdlp_subtitles import fetch_subtitles, segments_to_entries
+
+        result = fetch_subtitles(video_id, language)
+        if result is None:
+            raise TranscriptUnavailable(f"yt-dlp found no {language} subtitles for {video_id}")
+        return {'language': language, 'is_generated': result['is_generated'],
+                'entries': segments_to_entries(result['segments'])}
+
+
+class SupaDataBackend(TranscriptBackend):
+    """Speech-to-text through SupaData; slow and billed, so only tried once every free backend failed."""
+
+    name = 'supadata'
+    hedge = False
+
+    def fetch(self, video_id, language):
+        from process_youtube_with_supadata import process_youtube_video
+
+        result = process_youtube_video(video_id, language)
+        if result.get('status') != 'success':
+            raise TranscriptUnavailable(result.get('message', 'SupaData transcription failed'))
+        transcript = result['transcript']
+        entries = [
+            {
+                'text': segment.get('text', ''),
+                'start': segment.get('start', 0),
+                'duration': segment.get('end', segment.get('start', 0)) - segment.get('start', 0)
+            }
+            for segment in transcript.get('segments', [])
+        ]
+        if not entries and transcript.get('text'):
+            entries = [{'text': transcript['text'], 'start': 0.0, 'duration': transcript.get('duration', 0)}]
+        return {'language': transcript.get('language', language), 'is_generated': True, 'entries': entries}
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (YouTubeTranscriptApiBackend, CaptionTracksBackend, YtDlpBackend, SupaDataBackend)
+}
+DEFAULT_ORDER = ('youtube_transcript_api', 'caption_tracks', 'yt_dlp', 'supadata')
+
+
+class BackendStats:
+    """Attempt/success counters and recent latencies for one backend."""
+
+    def __init__(self, window=200):
+        self.attempts = 0
+        self.successes = 0
+        self.failures = 0
+        self.last_error = None
+        self.latencies = deque(maxlen=window)
+
+    def record(self, latency, error=None):
+        self.attempts += 1
+        self.latencies.append(latency)
+        if error is None:
+            self.successes += 1
+        else:
+            self.failures += 1
+            self.last_error = error
+
+    def percentile(self, p):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def to_dict(self):
+        return {
+            'attempts': self.attempts,
+            'successes': self.successes,
+            'failures': self.failures,
+            'success_rate': self.successes / self.attempts if self.attempts else None,
+            'p50_latency': self.percentile(50),
+            'p95_latency': self.percentile(95),
+            'last_error': self.last_error,
+        }
+
+
+class TranscriptFetcher:
+    """
+    Fetch transcripts through an ordered chain of backends.
+
+    order lists backend names (or TranscriptBackend instances). With
+    hedge_after=None backends are tried strictly one after another; with a
+    number of seconds the next backend is started whenever the running ones
+    have not answered within that time. Either way, backends with
+    hedge=False (SupaData) are tried last, one at a time, and only after
+    every other backend has failed. Results are served from and stored
+    in the persistent transcript cache (the shared default one unless cache
+    is given; cache=False disables it).
+    """
+
+    def __init__(self, order=DEFAULT_ORDER, hedge_after=None, max_workers=None, cache=None):
+        self.backends = [BACKENDS[b]() if isinstance(b, str) else b for b in order]
+        if not self.backends:
+            raise ValueError("At least one transcript backend is required")
+        if cache is None:
+            from transcript_cache import default_cache
+            cache = default_cache()
+        self.cache = cache or None
+        self.hedge_after = hedge_after
+        self._stats = {backend.name: BackendStats() for backend in self.backends}
+        self._lock = threading.Lock()
+        self._executor = None
+        if hedge_after is not None:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers or 4 * len(self.backends),
+                                                thread_name_prefix='transcript-backend')
+
+    def _attempt(self, backend, video_id, language):
+        started = time.perf_counter()
+        try:
+            result = backend.fetch(video_id, language)
+            if not result.get('entries'):
+                raise TranscriptUnavailable(f"{backend.name} returned an empty transcript")
+        except Exception as e:
+            with self._lock:
+                self._stats[backend.name].record(time.perf_counter() - started, str(e))
+            raise
+        with self._lock:
+            self._stats[backend.name].record(time.perf_counter() - started)
+        result['backend'] = backend.name
+        result['video_id'] = video_id
+        return result
+
+    def fetch(self, video_id, language='hi'):
+        """Return the cached or first successful backend result, or raise TranscriptUnavailable."""
+        if self.cache is None:
+            return self._fetch_uncached(video_id, language)
+        return self.cache.get_or_fetch(video_id, language, lambda: self._fetch_uncached(video_id, language))
+
+    def _fetch_uncached(self, video_id, language):
+        if self._executor is None:
+            return self._fetch_sequential(video_id, language)
+        return self._fetch_hedged(video_id, language)
+
+    def _fetch_sequential(self, video_id, language):
+        errors = {}
+        transient = False
+        for backend in sorted(self.backends, key=lambda backend: not backend.hedge):
+            try:
+                return self._attempt(backend, video_id, language)
+            except Exception as e:
+                errors[backend.name] = str(e)
+                transient = transient or is_transient(e)
+        raise TranscriptUnavailable(f"No backend could fetch a transcript for {video_id}", errors, transient)
+
+    def _fetch_hedged(self, video_id, language):
+        errors = {}
+        transient = False
+        remaining = [backend for backend in self.backends if backend.hedge]
+        running = {}
+
+        def launch_next():
+            backend = remaining.pop(0)
+            running[self._executor.submit(self._attempt, backend, video_id, language)] = backend
+
+        if remaining:
+            launch_next()
+        while running:
+            done, _ = wait(running, timeout=self.hedge_after if remaining else None,
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                # Nobody answered in time: hedge with the next backend
+                launch_next()
+                continue
+            for future in done:
+                backend = running.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    errors[backend.name] = str(e)
+                    transient = transient or is_transient(e)
+            # A failure doesn't need to wait for the hedge delay
+            if remaining:
+                launch_next()
+
+        # Paid backends only once every free one has failed, strictly in order
+        for backend in self.backends:
+            if not backend.hedge:
+                try:
+                    return self._attempt(backend, video_id, language)
+                except Exception as e:
+                    errors[backend.name] = str(e)
+                    transient = transient or is_transient(e)
+        raise TranscriptUnavailable(f"No backend could fetch a transcript for {video_id}", errors, transient)
+
+    def stats(self):
+        """Return per-backend attempt, success and latency statistics."""
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in self._stats.items()}
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python transcript_fetcher.py <youtube_video_id> [language_code] [hedge_after_seconds]")
+        print("Example: python transcript_fetcher.py -PAD2MYt0B0 hi 3")
+        sys.exit(1)
+
+    video_id = sys.argv[1]
+    language = sys.argv[2] if len(sys.argv) > 2 else 'hi'
+    hedge_after = float(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    with TranscriptFetcher(hedge_after=hedge_after) as fetcher:
+        try:
+            result = fetcher.fetch(video_id, language)
+        except TranscriptUnavailable as e:
+            print(f"\nFailed to fetch transcript: {e}")
+            for name, error in e.errors.items():
+                print(f"- {name}: {error}")
+            result = None
+
+        if result:
+            transcript = result['entries']
+            print(f"\nTranscript via {result['backend']} ({result['language']}), first 20 entries:")
+            print("-" * 50)
+            for i, entry in enumerate(transcript[:20]):
+                print(f"{i+1}. [{entry['start']:.2f}s] {entry['text']}")
+            if len(transcript) > 20:
+                print(f"\n... and {len(transcript) - 20} more entries")
+
+        if fetcher.cache is not None:
+            print(f"\nCache stats: {fetcher.cache.stats()}")
+        print("\nBackend stats:")
+        for name, stats in fetcher.stats().items():
+            if stats['attempts']:
+                print(f"- {name}: {stats['successes']}/{stats['attempts']} ok, p50 {stats['p50_latency']:.2f}s")
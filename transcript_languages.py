@@ -0,0 +1,98 @@
+"""
+Pick the best caption track from a single transcript listing.
+
+The old fetch scripts asked YouTube for 'hi', then 'en', then listed the
+tracks and fetched again, costing up to four round trips when the first
+choice was missing. Here the listing is fetched once (and cached per video
+for a short time), the track is chosen locally from a preference list, and
+exactly one caption fetch is made.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_PREFERENCES = ('hi', 'en')
+LISTING_TTL = 300  # seconds
+MAX_CACHED_LISTINGS = 256
+
+_listings = OrderedDict()
+_listings_lock = threading.Lock()
+
+
+def list_tracks(video_id, ttl=LISTING_TTL):
+    """Return the caption tracks of a video, reusing a listing younger than ttl seconds."""
+    now = time.monotonic()
+    with _listings_lock:
+        cached = _listings.get(video_id)
+        if cached and now - cached[0] < ttl:
+            _listings.move_to_end(video_id)
+            return cached[1]
+
+    from youtube_transcript_api import YouTubeTranscriptApi
+
+    tracks = list(YouTubeTranscriptApi.list_transcripts(video_id))
+    with _listings_lock:
+        _listings[video_id] = (now, tracks)
+        _listings.move_to_end(video_id)
+        while len(_listings) > MAX_CACHED_LISTINGS:
+            _listings.popitem(last=False)
+    return tracks
+
+
+def forget_tracks(video_id=None):
+    """Drop the cached listing for one video, or for all videos."""
+    with _listings_lock:
+        if video_id is None:
+            _listings.clear()
+        else:
+            _listings.pop(video_id, None)
+
+
+def choose_track(tracks, preferences=DEFAULT_PREFERENCES, allow_any=True):
+    """
+    Choose a track locally: languages in preference order, manual before
+    auto-generated within a language, then (if allow_any) any remaining
+    track, again manual first. Returns None when nothing matches.
+    """
+    by_kind = sorted(tracks, key=lambda track: bool(track.is_generated))
+    for language in preferences:
+        for track in by_kind:
+            if track.language_code == language:
+                return track
+    if allow_any and by_kind:
+        return by_kind[0]
+    return None
+
+
+def resolve_transcript(video_id, preferences=DEFAULT_PREFERENCES, allow_any=True):
+    """Return the preferred track object for a video, or None."""
+    return choose_track(list_tracks(video_id), preferences, allow_any)
+
+
+def fetch_preferred_transcript(video_id, preferences=DEFAULT_PREFERENCES, allow_any=True, cache=None):
+    """
+    Fetch the best available transcript with one listing and one caption fetch.
+
+    Results go through the persistent transcript cache (the shared default
+    one unless cache is given; cache=False bypasses it). Returns
+    {'language', 'language_name', 'is_generated', 'entries'} or None when
+    the video has no suitable track.
+    """
+    def fetch():
+        track = resolve_transcript(video_id, preferences, allow_any)
+        if track is None:
+            return None
+        return {
+            'language': track.language_code,
+            'language_name': track.language,
+            'is_generated': track.is_generated,
+            'entries': list(track.fetch())
+        }
+
+    if cache is None:
+        from transcript_cache import default_cache
+        cache = default_cache()
+    if not cache:
+        return fetch()
+    requested = ','.join(preferences) + ('|any' if allow_any else '')
+    return cache.get_or_fetch(video_id, requested, fetch)
@@ -1,8 +1,18 @@
 import requests
 import json
 import re
+import time
+from requests.adapters import HTTPAdapter
+from json3_captions import decode_json3
 from urllib.parse import urlparse, parse_qs
 
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+CAPTION_TRACKS_MARKER = b'"captionTracks":'
+CHUNK_SIZE = 16 * 1024
+POOL_SIZE = 16
+
+_session = None
+
 def extract_video_id(url):
     """Extract video ID from YouTube URL"""
     # Handle various YouTube URL formats
@@ -18,36 +28,134 @@ def extract_video_id(url):
             return match.group(1)
     return url  # If no match, return the input as is (might already be an ID)
 
-def get_transcript(video_url, language='hi'):
-    """Fetch transcript from YouTube video"""
+class _BalancedArrayScanner:
+    """Incrementally find the end of a JSON array, honouring strings and escapes."""
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, data, start=0):
+        """Scan data from start; return the index just past the closing bracket, or -1."""
+        for i in range(start, len(data)):
+            c = data[i]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif c == 0x5C:  # backslash
+                    self.escaped = True
+                elif c == 0x22:  # double quote
+                    self.in_string = False
+            elif c == 0x22:
+                self.in_string = True
+            elif c == 0x5B or c == 0x7B:  # [ {
+                self.depth += 1
+            elif c == 0x5D or c == 0x7D:  # ] }
+                self.depth -= 1
+                if self.depth == 0:
+                    return i + 1
+        return -1
+
+
+def get_session():
+    """Return the shared keep-alive session used for watch pages and caption files."""
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept-Encoding': 'gzip, deflate',
+            'Accept-Language': 'en-US,en;q=0.9',
+        })
+        _session = session
+    return _session
+
+
+def fetch_caption_tracks(video_id, timeout=15):
+    """
+    Stream the watch page and stop as soon as the captionTracks array is complete.
+
+    Returns (tracks, stats) where tracks is the parsed list (None if the page
+    has no caption tracks) and stats reports the decoded bytes read, the bytes
+    received on the wire (gzip) and the time until the tracks were extracted.
+    """
+    started = time.perf_counter()
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    response = get_session().get(url, stream=True, timeout=timeout)
+    stats = {'status_code': response.status_code, 'bytes_read': 0, 'wire_bytes': 0,
+             'time_to_tracks': None, 'read_full_page': False}
+    try:
+        if response.status_code != 200:
+            return None, stats
+
+        buffer = bytearray()
+        array_start = -1
+        scanner = None
+        scanned = 0
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            stats['bytes_read'] += len(chunk)
+            buffer += chunk
+
+            if array_start < 0:
+                marker_at = buffer.find(CAPTION_TRACKS_MARKER)
+                if marker_at < 0:
+                    # Keep only a tail long enough to catch a marker split across chunks
+                    del buffer[:max(0, len(buffer) - len(CAPTION_TRACKS_MARKER))]
+                    continue
+                array_start = buffer.find(b'[', marker_at + len(CAPTION_TRACKS_MARKER))
+                if array_start < 0:
+                    continue
+                del buffer[:array_start]
+                array_start = 0
+                scanner = _BalancedArrayScanner()
+
+            end = scanner.feed(buffer, scanned)
+            if end < 0:
+                scanned = len(buffer)
+                continue
+
+            stats['time_to_tracks'] = time.perf_counter() - started
+            stats['wire_bytes'] = response.raw.tell()
+            return json.loads(bytes(buffer[:end]).decode('utf-8')), stats
+
+        stats['read_full_page'] = True
+        stats['wire_bytes'] = response.raw.tell()
+        return None, stats
+    finally:
+        # Closing before the body is exhausted drops the rest of the page
+        response.close()
+
+
+def get_transcript(video_url, language='hi', word_offsets=False):
+    """
+    Fetch transcript from YouTube video.
+
+    Returns {'video_id', 'language', 'segments', 'stats'}, where segments are
+    decoded from the json3 stream as it arrives ({'start_ms', 'duration_ms',
+    'text'}, plus 'words' with word_offsets=True), or {'error': ...}.
+    """
     try:
         # Extract video ID from URL
         video_id = extract_video_id(video_url)
         print(f"Extracted video ID: {video_id}")
         
-        # Try to get transcript directly
-        url = f"https://youtube.com/watch?v={video_id}"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        # First, get the video page to extract caption tracks
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            return {"error": f"Failed to fetch video page: {response.status_code}"}
-            
-        # Extract caption tracks from the page
-        caption_tracks = re.findall(r'"captionTracks":(\[.*?\])', response.text)
-        if not caption_tracks:
-            return {"error": "No caption tracks found in video page"}
-            
-        # Parse the JSON data
+        # First, stream the video page just far enough to extract caption tracks
         try:
-            caption_tracks = json.loads(caption_tracks[0])
+            caption_tracks, stats = fetch_caption_tracks(video_id)
         except json.JSONDecodeError:
             return {"error": "Failed to parse caption tracks"}
+        if stats['status_code'] != 200:
+            return {"error": f"Failed to fetch video page: {stats['status_code']}"}
+        if not caption_tracks:
+            return {"error": "No caption tracks found in video page", "stats": stats}
             
-        print(f"Found {len(caption_tracks)} caption tracks")
+        print(f"Found {len(caption_tracks)} caption tracks "
+              f"({stats['bytes_read']} bytes read, {stats['wire_bytes']} on the wire, "
+              f"{stats['time_to_tracks']:.2f}s to tracks)")
         
         # Try to find the requested language
         caption_url = None
@@ -60,17 +168,18 @@ def get_transcript(video_url, language='hi'):
         if not caption_url:
             return {"error": f"No {language} captions found"}
             
-        # Fetch the captions
-        response = requests.get(f"{caption_url}&fmt=json3")
-        if response.status_code != 200:
-            return {"error": f"Failed to fetch captions: {response.status_code}"}
+        # Fetch the captions over the same pooled connection, decoding the
+        # json3 events into segments while the body streams in
+        with get_session().get(f"{caption_url}&fmt=json3", stream=True, timeout=15) as response:
+            if response.status_code != 200:
+                return {"error": f"Failed to fetch captions: {response.status_code}"}
+            segments = list(decode_json3(response.iter_content(chunk_size=CHUNK_SIZE), word_offsets))
             
-        # Parse and return the captions
-        captions = response.json()
         return {
             "video_id": video_id,
             "language": language,
-            "captions": captions.get('events', [])
+            "segments": segments,
+            "stats": stats
         }
         
     except Exception as e:
@@ -92,11 +201,9 @@ if __name__ == "__main__":
     if 'error' in result:
         print(f"Error: {result['error']}")
     else:
-        print(f"\nSuccessfully fetched {len(result.get('captions', []))} captions in {result.get('language')}:")
-        for i, caption in enumerate(result.get('captions', [])[:10]):  # Show first 10 captions
-            if 'segs' in caption and caption['segs']:
-                text = ' '.join(seg.get('utf8', '') for seg in caption['segs'] if seg.get('utf8'))
-                if text.strip():
-                    print(f"{i+1}. {text}")
-        if len(result.get('captions', [])) > 10:
-            print(f"... and {len(result.get('captions', [])) - 10} more captions")
+        segments = result.get('segments', [])
+        print(f"\nSuccessfully fetched {len(segments)} captions in {result.get('language')}:")
+        for i, segment in enumerate(segments[:10]):  # Show first 10 captions
+            print(f"{i+1}. [{segment['start_ms'] / 1000:.2f}s] {segment['text']}")
+        if len(segments) > 10:
+            print(f"... and {len(segments) - 10} more captions")
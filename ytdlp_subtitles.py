@@ -0,0 +1,117 @@
+"""
+Fetch subtitles through yt-dlp with one extraction per video, in memory.
+
+The old download_transcript flow extracted the video info, then called
+ydl.download() (a second extraction), wrote a .vtt, renamed it and read it
+back. Here the subtitle URL is taken from the first info dict, fetched with
+the same YoutubeDL's opener and decoded straight from memory: json3 through
+json3_captions, vtt through parse_vtt plus rolling-caption collapsing. One
+YoutubeDL is kept per thread and reused across videos, and extractions are
+shared through media_info_cache until their URLs expire.
+"""
+import io
+import threading
+
+from caption_dedupe import collapse_segments
+from json3_captions import decode_json3
+from parse_vtt import iter_captions
+from youtube_transcript_helper import extract_video_id
+
+# Preferred subtitle formats, cheapest to decode first
+FORMAT_PREFERENCE = ('json3', 'vtt')
+YDL_OPTS = {'skip_download': True, 'quiet': True, 'no_warnings': True}
+
+_local = threading.local()
+
+
+def get_ydl():
+    """Return this thread's shared YoutubeDL (YoutubeDL is not thread-safe)."""
+    ydl = getattr(_local, 'ydl', None)
+    if ydl is None:
+        import yt_dlp
+
+        ydl = yt_dlp.YoutubeDL(YDL_OPTS)
+        _local.ydl = ydl
+    return ydl
+
+
+def extract_info(video, ydl=None, cache=None):
+    """
+    Extract video metadata without downloading anything.
+
+    The trimmed info is served from the media info cache while its URLs are
+    valid (the shared default cache unless cache is given; cache=False
+    always extracts and returns the full info dict).
+    """
+    video_id = extract_video_id(video)
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    if cache is None:
+        from media_info_cache import default_cache
+        cache = default_cache()
+    if not cache:
+        return (ydl or get_ydl()).extract_info(url, download=False)
+    return cache.get_or_extract(video_id, lambda: (ydl or get_ydl()).extract_info(url, download=False))
+
+
+def available_languages(info):
+    """Return (manual, automatic) subtitle language codes listed in info."""
+    return sorted(info.get('subtitles') or {}), sorted(info.get('automatic_captions') or {})
+
+
+def choose_subtitle(info, language):
+    """
+    Pick a subtitle format for language: manual subtitles before automatic
+    captions, json3 before vtt. Returns (format_dict, is_generated) or
+    (None, None).
+    """
+    for key, is_generated in (('subtitles', False), ('automatic_captions', True)):
+        formats = [f for f in (info.get(key) or {}).get(language) or [] if f.get('url')]
+        for ext in FORMAT_PREFERENCE:
+            for fmt in formats:
+                if fmt.get('ext') == ext:
+                    return fmt, is_generated
+    return None, None
+
+
+def decode_subtitle(body, ext):
+    """Decode a json3 or vtt subtitle body into collapsed (start_ms, end_ms, text) segments."""
+    if ext == 'json3':
+        cues = ((s['start_ms'], s['start_ms'] + s['duration_ms'], s['text']) for s in decode_json3(body))
+    elif ext == 'vtt':
+        text = body.decode('utf-8') if isinstance(body, bytes) else body
+        cues = ((c['start_ms'], c['end_ms'], c['text'])
+                for c in iter_captions(io.StringIO(text), include_ms=True))
+    else:
+        raise ValueError(f"Unsupported subtitle format: {ext}")
+    return list(collapse_segments(cues))
+
+
+def fetch_subtitles(video, language='hi', info=None, ydl=None):
+    """
+    Return {'language', 'is_generated', 'ext', 'info', 'segments'} or None
+    when the video has no subtitles in language.
+
+    Pass info to reuse an earlier extraction; otherwise one is made with the
+    shared YoutubeDL (or taken from the media info cache).
+    """
+    ydl = ydl or get_ydl()
+    if info is None:
+        info = extract_info(video, ydl)
+    fmt, is_generated = choose_subtitle(info, language)
+    if fmt is None:
+        return None
+    with ydl.urlopen(fmt['url']) as response:
+        body = response.read()
+    return {
+        'language': language,
+        'is_generated': is_generated,
+        'ext': fmt['ext'],
+        'info': info,
+        'segments': decode_subtitle(body, fmt['ext'])
+    }
+
+
+def segments_to_entries(segments):
+    """Convert (start_ms, end_ms, text) segments to youtube_transcript_api entries."""
+    return [{'text': text, 'start': start / 1000, 'duration': (end - start) / 1000}
+            for start, end, text in segments]